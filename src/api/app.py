@@ -1,14 +1,22 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from dataclasses import asdict
-from datetime import datetime
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from concurrent.futures import Future
+from dataclasses import asdict, replace
+from functools import partial
+from datetime import datetime, timedelta
 import os
 from pathlib import Path
-from typing import Any, Literal
+import secrets
+import time
+import zlib
+from typing import Any, AsyncIterator, Callable, Iterable, Literal
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field, field_validator, model_validator
 
 from ..characters.models import (
@@ -20,12 +28,10 @@ from ..characters.models import (
     CharacterTraits,
 )
 from ..characters.storage import (
+    APERCU_HISTORIQUE,
     CharacterRepository,
     create_character,
     delete_character,
-    get_character,
-    list_characters,
-    update_character,
 )
 from ..media_generation.models import (
     CharacterProfile as MediaCharacterProfile,
@@ -42,30 +48,109 @@ from ..media_generation.models import (
     get_video_mime_type,
     validate_max_size,
 )
+from ..media_generation.cancellation import (
+    CANCELLED,
+    CancellationToken,
+    GenerationInterrupted,
+    cancellation_scope,
+)
 from ..media_generation.orchestrator import MediaGenerationOrchestrator
+from ..media_generation.resilience import BreakerPolicy, CircuitOpen, RetryPolicy
 from ..media_generation.local import CommandTemplate, LocalImageCommandModel, LocalVideoCommandModel
+from ..persistence import SUPPRESSION, ConflitVersion, JournalChangements, encoder_json
+from ..prompts.compilation import compiler_template
 from ..prompts.storage import PromptRepository
 from ..scenarios.models import Acte, Scene, Scenario
-from ..scenarios.storage import ScenarioRepository
+from ..scenarios.storage import IdentifiantDuplique, ScenarioRepository
 
+from .estimation import EstimateurDurees
+from .executeurs import PoolsExecution
 from .models import RenderAsset, RenderJob
+from .ordonnanceur import PRIORITES, FileSaturee, OrdonnanceurRendus
+from .reprise import rendus_orphelins
+from .memoire import (
+    SuiviAllocations,
+    compter_objets,
+    memoire_processus,
+    rapport_depot,
+    taille_profonde,
+)
+from .profils_media import CacheProfilsMedia
+from .profiling import ConfigurationProfilage, RouteProfilee, profileur
+from .transfert import (
+    COLLECTIONS,
+    LONGUEUR_LIGNE_MAX_DEFAUT,
+    OCTETS_PAR_MORCEAU,
+    TAILLE_LOT_DEFAUT,
+    ImportNdjson,
+    exporter_ndjson,
+)
 from .storage import (
     RenderRepository,
+    RenduActif,
     create_render,
     delete_render,
     get_render,
     list_renders,
-    update_render,
 )
 
 DEFAULT_MODEL_NAME = os.getenv("SEIDRA_DEFAULT_MODEL_NAME", "stub")
 LOCAL_IMAGE_COMMAND = os.getenv("SEIDRA_LOCAL_IMAGE_COMMAND")
 LOCAL_VIDEO_COMMAND = os.getenv("SEIDRA_LOCAL_VIDEO_COMMAND")
+# "file" : les commandes écrivent dans {output_path} ; "stdout" : elles écrivent le média
+# sur leur sortie standard, recopiée au fil de l'eau dans les artefacts.
+LOCAL_OUTPUT_MODE = os.getenv("SEIDRA_LOCAL_OUTPUT_MODE", "file")
 ARTIFACTS_DIR = Path(os.getenv("SEIDRA_ARTIFACTS_DIR", "data/artifacts"))
 CHARACTERS_STORE_PATH = Path(os.getenv("SEIDRA_CHARACTERS_STORE", "data/characters.json"))
 RENDERS_STORE_PATH = Path(os.getenv("SEIDRA_RENDERS_STORE", "data/renders.json"))
 PROMPTS_STORE_PATH = Path(os.getenv("SEIDRA_PROMPTS_STORE", "data/prompts.json"))
 SCENARIOS_STORE_PATH = Path(os.getenv("SEIDRA_SCENARIOS_STORE", "data/scenarios.json"))
+ADMIN_TOKEN = os.getenv("SEIDRA_ADMIN_TOKEN")
+CHANGES_CAPACITY = int(os.getenv("SEIDRA_CHANGES_CAPACITY", "10000"))
+GZIP_MIN_SIZE = int(os.getenv("SEIDRA_GZIP_MIN_SIZE", "1024"))
+GZIP_COMPRESSION_LEVEL = int(os.getenv("SEIDRA_GZIP_COMPRESSION_LEVEL", "6"))
+PROMPT_BATCH_MAX = int(os.getenv("SEIDRA_PROMPT_BATCH_MAX", "10000"))
+# Mises à jour d'état par requête POST /characters/etats, appliquées sous le verrou d'écriture.
+STATE_BATCH_MAX = int(os.getenv("SEIDRA_STATE_BATCH_MAX", "1000"))
+# Lignes NDJSON regroupées par morceau de réponse lors du rendu par lot.
+RENDUS_PAR_MORCEAU = 256
+# Longueur maximale, en octets, d'une ligne de POST /admin/import.
+IMPORT_LINE_MAX = int(os.getenv("SEIDRA_IMPORT_LINE_MAX", str(LONGUEUR_LIGNE_MAX_DEFAUT)))
+RENDER_WORKERS = int(os.getenv("SEIDRA_RENDER_WORKERS", "2"))
+RENDER_AGING_SECONDS = float(os.getenv("SEIDRA_RENDER_AGING_SECONDS", "60"))
+# Poids du partage équitable, au format "projet-a=3,projet-b=1" (1 par défaut).
+RENDER_OWNER_WEIGHTS = os.getenv("SEIDRA_RENDER_OWNER_WEIGHTS", "")
+# "equitable" (partage pondéré) ou "court_dabord" (durée estimée la plus courte).
+RENDER_SCHEDULING = os.getenv("SEIDRA_RENDER_SCHEDULING", "equitable")
+# Profondeur maximale de la file des rendus (0 : illimitée), au total et par modèle
+# au format "local=8,*=50" ("*" s'applique aux modèles non cités).
+RENDER_QUEUE_MAX = int(os.getenv("SEIDRA_RENDER_QUEUE_MAX", "1000"))
+RENDER_QUEUE_MAX_PER_MODEL = os.getenv("SEIDRA_RENDER_QUEUE_MAX_PER_MODEL", "")
+# Durée maximale d'exécution d'un rendu par modèle, en secondes, au format
+# "local=900,*=3600" ; sans entrée applicable, le rendu n'est pas limité.
+RENDER_TIMEOUTS = os.getenv("SEIDRA_RENDER_TIMEOUTS", "")
+# Un rendu en cours renouvelle son bail à chaque battement ; sans battement pendant
+# la durée du bail, il est repris (ou passé en échec après RENDER_MAX_ATTEMPTS essais).
+RENDER_HEARTBEAT_SECONDS = float(os.getenv("SEIDRA_RENDER_HEARTBEAT_SECONDS", "30"))
+RENDER_LEASE_SECONDS = float(os.getenv("SEIDRA_RENDER_LEASE_SECONDS", str(3 * RENDER_HEARTBEAT_SECONDS)))
+RENDER_MAX_ATTEMPTS = int(os.getenv("SEIDRA_RENDER_MAX_ATTEMPTS", "3"))
+# Tentatives par génération en cas d'erreur passagère du générateur (1 : aucune reprise),
+# espacées d'une attente exponentielle aléatoire à partir de GENERATION_RETRY_DELAY.
+GENERATION_ATTEMPTS = int(os.getenv("SEIDRA_GENERATION_ATTEMPTS", "1"))
+GENERATION_RETRY_DELAY = float(os.getenv("SEIDRA_GENERATION_RETRY_DELAY", "1"))
+# Codes de sortie des commandes locales à retenter, ex. "75,111" ; les autres sont définitifs.
+GENERATION_TRANSIENT_EXIT_CODES = frozenset(
+    int(code) for code in os.getenv("SEIDRA_GENERATION_TRANSIENT_EXIT_CODES", "").split(",") if code.strip()
+)
+# Disjoncteur par modèle : ouvert quand la part d'échecs des BREAKER_WINDOW dernières
+# générations (au moins BREAKER_MIN_CALLS) atteint BREAKER_THRESHOLD, pour BREAKER_OPEN_SECONDS.
+BREAKER_THRESHOLD = float(os.getenv("SEIDRA_BREAKER_THRESHOLD", "0.5"))
+BREAKER_WINDOW = int(os.getenv("SEIDRA_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("SEIDRA_BREAKER_MIN_CALLS", "5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("SEIDRA_BREAKER_OPEN_SECONDS", "30"))
+# Threads des endpoints synchrones (CRUD) et des traitements par lot (import, export...).
+CRUD_THREADS = int(os.getenv("SEIDRA_CRUD_THREADS", "40"))
+BATCH_THREADS = int(os.getenv("SEIDRA_BATCH_THREADS", "4"))
 
 
 class CharacterProfilePayload(BaseModel):
@@ -128,6 +213,22 @@ class CharacterStatePayload(BaseModel):
         return value
 
 
+class CharacterStateUpdateRequest(BaseModel):
+    statut: str | None = None
+    localisation: str | None = None
+    etat_emotionnel: str | None = None
+    variables: dict[str, Any] = Field(default_factory=dict)
+
+
+class CharacterStateBatchUpdate(CharacterStateUpdateRequest):
+    identifiant: str = Field(..., min_length=1)
+    version: int | None = None
+
+
+class CharacterStateBatchRequest(BaseModel):
+    mises_a_jour: list[CharacterStateBatchUpdate] = Field(..., min_length=1, max_length=STATE_BATCH_MAX)
+
+
 class CharacterCreateRequest(BaseModel):
     profil: CharacterProfilePayload
     traits: CharacterTraitsPayload | None = None
@@ -142,6 +243,17 @@ class CharacterUpdateRequest(BaseModel):
     etat: CharacterStatePayload | None = None
 
 
+class CharacterBatchUpdate(BaseModel):
+    identifiant: str = Field(..., min_length=1)
+    modifications: CharacterUpdateRequest
+
+
+class CharacterBatchRequest(BaseModel):
+    creations: list[CharacterCreateRequest] = Field(default_factory=list)
+    mises_a_jour: list[CharacterBatchUpdate] = Field(default_factory=list)
+    atomique: bool = True
+
+
 class MediaCharacterProfilePayload(BaseModel):
     identifier: str = Field(..., min_length=1)
     name: str = Field(..., min_length=1)
@@ -200,6 +312,11 @@ class PromptExecutionRequest(BaseModel):
     contexte: dict[str, Any] = Field(default_factory=dict)
 
 
+class PromptExecutionBatchRequest(BaseModel):
+    version: int | None = None
+    contextes: list[dict[str, Any]] = Field(..., min_length=1, max_length=PROMPT_BATCH_MAX)
+
+
 class SceneScenarioPayload(BaseModel):
     identifiant: str | None = None
     titre: str = Field(..., min_length=1)
@@ -229,6 +346,37 @@ class ActePayload(BaseModel):
         return value
 
 
+class ActeUpdateRequest(BaseModel):
+    identifiant: str | None = None
+    titre: str | None = None
+    metadonnees: dict[str, Any] | None = None
+    position: int | None = Field(default=None, ge=0)
+
+    @field_validator("identifiant", "titre")
+    @classmethod
+    def valider_titre(cls, value: str | None) -> str | None:
+        if value is not None and not value.strip():
+            raise ValueError("doit être renseigné")
+        return value
+
+
+class SceneScenarioUpdateRequest(BaseModel):
+    identifiant: str | None = None
+    titre: str | None = None
+    resume: str | None = None
+    personnages_ids: list[str] | None = None
+    metadonnees: dict[str, Any] | None = None
+    acte_id: str | None = None
+    position: int | None = Field(default=None, ge=0)
+
+    @field_validator("identifiant", "titre", "resume")
+    @classmethod
+    def valider_champs_requis(cls, value: str | None) -> str | None:
+        if value is not None and not value.strip():
+            raise ValueError("doit être renseigné")
+        return value
+
+
 class ScenarioCreateRequest(BaseModel):
     titre: str = Field(..., min_length=1)
     description: str | None = None
@@ -276,7 +424,8 @@ class MediaResolutionPayload(BaseModel):
 class ScenePayload(BaseModel):
     identifier: str = Field(..., min_length=1)
     summary: str = Field(..., min_length=1)
-    characters: list[MediaCharacterProfilePayload]
+    characters: list[MediaCharacterProfilePayload] = Field(default_factory=list)
+    character_ids: list[str] = Field(default_factory=list)
     location: str | None = None
     mood: str | None = None
 
@@ -287,6 +436,13 @@ class ScenePayload(BaseModel):
             raise ValueError("doit être renseigné")
         return value
 
+    @field_validator("character_ids")
+    @classmethod
+    def valider_character_ids(cls, value: list[str]) -> list[str]:
+        if any(not identifiant.strip() for identifiant in value):
+            raise ValueError("chaque identifiant de personnage doit être renseigné")
+        return value
+
 
 class ImageConfigPayload(BaseModel):
     resolution: MediaResolutionPayload
@@ -329,6 +485,10 @@ class RenderRequest(BaseModel):
     image_config: ImageConfigPayload | None = None
     video_config: VideoConfigPayload | None = None
     model_name: str = DEFAULT_MODEL_NAME
+    priorite: Literal["interactif", "normal", "lot"] = "normal"
+    proprietaire: str = Field("defaut", min_length=1)
+    # Échéance du rendu comptée depuis sa soumission, attente en file comprise.
+    delai_secondes: float | None = Field(None, gt=0)
 
     @field_validator("model_name")
     @classmethod
@@ -363,6 +523,13 @@ class RenderResponse(BaseModel):
     asset: dict[str, Any] | None
     cree_le: str
     termine_le: str | None
+    priorite: str = "normal"
+    proprietaire: str = "defaut"
+    demarre_le: str | None = None
+    erreur: str | None = None
+    tentatives: int = 0
+    echeance: str | None = None
+    file: dict[str, Any] | None = None
 
 
 class RenderAssetPayload(BaseModel):
@@ -392,19 +559,40 @@ class RenderUpdateRequest(BaseModel):
         return value
 
 
+class ProfilageConfigurationRequest(BaseModel):
+    actif: bool = True
+    taux: float = Field(0.0, ge=0, le=1)
+    routes: list[str] = Field(default_factory=list)
+    intervalle_ms: float = Field(5.0, gt=0)
+    fenetre_secondes: float = Field(60.0, gt=0)
+
+
+class TracemallocRequest(BaseModel):
+    actif: bool
+    profondeur: int = Field(10, ge=1, le=100)
+
+
+class InstantaneMemoireRequest(BaseModel):
+    nom: str = Field(..., min_length=1)
+
+    @field_validator("nom")
+    @classmethod
+    def valider_nom(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("doit être renseigné")
+        return value
+
+
 class BasicPromptRenderer:
     def render(self, scene: SceneSpec, prompt: PromptSpec) -> str:
-        variables = defaultdict(
-            str,
-            {
-                **prompt.variables,
-                "scene_summary": scene.summary,
-                "scene_location": scene.location or "",
-                "scene_mood": scene.mood or "",
-                "characters": ", ".join(character.name for character in scene.characters),
-            },
-        )
-        return prompt.template.format_map(variables)
+        variables = {
+            **prompt.variables,
+            "scene_summary": scene.summary,
+            "scene_location": scene.location or "",
+            "scene_mood": scene.mood or "",
+            "characters": ", ".join(character.name for character in scene.characters),
+        }
+        return compiler_template(prompt.template).rendre(variables)
 
 
 class StubImageModel:
@@ -474,13 +662,93 @@ class StubVideoModel:
         )
 
 
-app = FastAPI(title="SeidraLocal API", version="0.1.0")
-character_repo = CharacterRepository(CHARACTERS_STORE_PATH)
-render_repo = RenderRepository(RENDERS_STORE_PATH)
-prompt_repo = PromptRepository(PROMPTS_STORE_PATH)
-scenario_repo = ScenarioRepository(SCENARIOS_STORE_PATH)
+pools = PoolsExecution(threads_crud=CRUD_THREADS, threads_lots=BATCH_THREADS)
+
+
+@asynccontextmanager
+async def _cycle_de_vie(_: FastAPI) -> AsyncIterator[None]:
+    pools.configurer()
+    await pools.crud(reprendre_rendus_orphelins, demarrage=True)
+    entretien = asyncio.create_task(_entretenir_rendus())
+    try:
+        yield
+    finally:
+        entretien.cancel()
+        with suppress(asyncio.CancelledError):
+            await entretien
+
+
+async def _entretenir_rendus() -> None:
+    """Renouvelle les baux des rendus en cours et reprend ceux dont le bail a expiré."""
+
+    while True:
+        await asyncio.sleep(RENDER_HEARTBEAT_SECONDS)
+        await pools.crud(_battre_rendus_actifs)
+        await pools.crud(reprendre_rendus_orphelins)
 
-orchestrator = MediaGenerationOrchestrator(prompt_renderer=BasicPromptRenderer())
+
+app = FastAPI(title="SeidraLocal API", version="0.1.0", lifespan=_cycle_de_vie)
+app.router.route_class = RouteProfilee
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=GZIP_MIN_SIZE,
+    compresslevel=GZIP_COMPRESSION_LEVEL,
+)
+journal_changements = JournalChangements(CHANGES_CAPACITY)
+character_repo = CharacterRepository(CHARACTERS_STORE_PATH, journal=journal_changements)
+render_repo = RenderRepository(RENDERS_STORE_PATH, journal=journal_changements)
+prompt_repo = PromptRepository(PROMPTS_STORE_PATH, journal=journal_changements)
+scenario_repo = ScenarioRepository(SCENARIOS_STORE_PATH, journal=journal_changements)
+profils_media = CacheProfilsMedia(character_repo)
+depots_par_collection = {
+    "characters": character_repo,
+    "prompts": prompt_repo,
+    "scenarios": scenario_repo,
+    "renders": render_repo,
+}
+
+suivi_allocations = SuiviAllocations()
+
+
+def _lire_paires(valeur: str) -> dict[str, str]:
+    """Analyse un réglage au format "cle=valeur,cle=valeur"."""
+
+    return {
+        cle.strip(): brut.strip()
+        for cle, _, brut in (element.partition("=") for element in valeur.split(",") if element.strip())
+    }
+
+
+ordonnanceur = OrdonnanceurRendus(
+    workers=RENDER_WORKERS,
+    poids={proprietaire: float(poids) for proprietaire, poids in _lire_paires(RENDER_OWNER_WEIGHTS).items()},
+    vieillissement_secondes=RENDER_AGING_SECONDS,
+    mode=RENDER_SCHEDULING,
+    limite_file=RENDER_QUEUE_MAX or None,
+    limites_groupes={
+        modele: int(limite) for modele, limite in _lire_paires(RENDER_QUEUE_MAX_PER_MODEL).items()
+    },
+)
+delais_modeles = {modele: float(delai) for modele, delai in _lire_paires(RENDER_TIMEOUTS).items()}
+# Jetons d'annulation des rendus en file ou en cours, par identifiant.
+jetons_rendus: dict[str, CancellationToken] = {}
+estimateur_durees = EstimateurDurees()
+estimateur_durees.charger(list_renders(render_repo))
+
+orchestrator = MediaGenerationOrchestrator(
+    prompt_renderer=BasicPromptRenderer(),
+    retry_policy=RetryPolicy(
+        attempts=GENERATION_ATTEMPTS,
+        base_delay=GENERATION_RETRY_DELAY,
+        transient_exit_codes=GENERATION_TRANSIENT_EXIT_CODES,
+    ),
+    breaker_policy=BreakerPolicy(
+        failure_threshold=BREAKER_THRESHOLD,
+        window=BREAKER_WINDOW,
+        min_calls=BREAKER_MIN_CALLS,
+        open_seconds=BREAKER_OPEN_SECONDS,
+    ),
+)
 asset_base_path = Path(__file__).resolve().parents[2] / ARTIFACTS_DIR
 orchestrator.register_image_model("stub", StubImageModel(asset_base_path))
 orchestrator.register_video_model("stub", StubVideoModel(asset_base_path))
@@ -490,6 +758,7 @@ if LOCAL_IMAGE_COMMAND:
         LocalImageCommandModel(
             asset_base_path,
             CommandTemplate(LOCAL_IMAGE_COMMAND),
+            output_mode=LOCAL_OUTPUT_MODE,
         ),
     )
 if LOCAL_VIDEO_COMMAND:
@@ -498,58 +767,130 @@ if LOCAL_VIDEO_COMMAND:
         LocalVideoCommandModel(
             asset_base_path,
             CommandTemplate(LOCAL_VIDEO_COMMAND),
+            output_mode=LOCAL_OUTPUT_MODE,
         ),
     )
 
 
 @app.post("/characters", status_code=201)
 def creer_personnage(payload: CharacterCreateRequest) -> dict[str, Any]:
-    profil = CharacterProfile(**payload.profil.model_dump())
-    traits = CharacterTraits(**payload.traits.model_dump()) if payload.traits else None
-    historique = _build_character_history(payload.historique) if payload.historique else None
-    etat = CharacterState(**payload.etat.model_dump()) if payload.etat else None
-    character = create_character(
-        character_repo,
-        profil,
-        traits=traits,
-        historique=historique,
-        etat=etat,
-    )
+    character = _creer_personnage(payload)
     return _character_to_payload(character)
 
 
-@app.get("/characters")
-def lister_personnages() -> list[dict[str, Any]]:
-    return [_character_to_payload(character) for character in list_characters(character_repo)]
+@app.post("/characters/lot")
+def traiter_lot_personnages(payload: CharacterBatchRequest) -> dict[str, Any]:
+    resultats: list[dict[str, Any]] = []
+    with character_repo.transaction():
+        for index, creation in enumerate(payload.creations):
+            character = _creer_personnage(creation)
+            resultats.append(
+                {
+                    "operation": "creation",
+                    "index": index,
+                    "statut": 201,
+                    "identifiant": character.identifiant,
+                }
+            )
+        for index, element in enumerate(payload.mises_a_jour):
+            resultat = {"operation": "mise_a_jour", "index": index, "identifiant": element.identifiant}
+            try:
+                character_repo.modifier(
+                    element.identifiant,
+                    partial(_appliquer_modifications_personnage, payload=element.modifications),
+                )
+            except FileNotFoundError as exc:
+                resultats.append({**resultat, "statut": 404, "erreur": str(exc)})
+                continue
+            resultats.append({**resultat, "statut": 200})
+        erreurs = sum(1 for resultat in resultats if "erreur" in resultat)
+        if erreurs and payload.atomique:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "erreur": f"Lot annulé: {erreurs} opération(s) en échec, aucune appliquée.",
+                    "resultats": resultats,
+                },
+            )
+    return {"appliquees": len(resultats) - erreurs, "erreurs": erreurs, "resultats": resultats}
 
 
-@app.get("/characters/{identifiant}")
-def lire_personnage(identifiant: str) -> dict[str, Any]:
+@app.post("/characters/etats")
+def modifier_etats_personnages(payload: CharacterStateBatchRequest) -> dict[str, Any]:
+    lot = [
+        (
+            element.identifiant,
+            element.model_dump(exclude_unset=True, exclude={"identifiant", "version"}),
+            element.version,
+        )
+        for element in payload.mises_a_jour
+    ]
+    resultats = []
+    for element, resultat in zip(payload.mises_a_jour, character_repo.modifier_etats(lot)):
+        if isinstance(resultat, Exception):
+            resultats.append(
+                {
+                    "identifiant": element.identifiant,
+                    "statut": _statut_erreur_etat(resultat),
+                    "erreur": str(resultat),
+                }
+            )
+            continue
+        etat, version = resultat
+        resultats.append(
+            {"identifiant": element.identifiant, "statut": 200, "etat": etat, "version": version}
+        )
+    erreurs = sum(1 for resultat in resultats if "erreur" in resultat)
+    return {"appliquees": len(resultats) - erreurs, "erreurs": erreurs, "resultats": resultats}
+
+
+@app.get("/characters", response_model=list[dict[str, Any]])
+def lister_personnages(
+    fields: str | None = None,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    champs = _parser_champs(fields)
+    etag = _etag_liste(character_repo.revision_collection, champs)
+    if _correspond_etag(if_none_match, etag):
+        return _reponse_non_modifiee(etag)
+    return _reponse_json_liste(character_repo.lister_json(champs), etag=etag)
+
+
+@app.get("/characters/{identifiant}", response_model=dict[str, Any])
+def lire_personnage(
+    identifiant: str,
+    fields: str | None = None,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    champs = _parser_champs(fields)
     try:
-        character = get_character(character_repo, identifiant)
+        etag = _etag(character_repo.revision(identifiant), champs)
+        if _correspond_etag(if_none_match, etag):
+            return _reponse_non_modifiee(etag)
+        contenu = character_repo.lire_json(identifiant, champs)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-    return _character_to_payload(character)
+    return _reponse_json(contenu, etag=etag)
 
 
 @app.put("/characters/{identifiant}")
 def remplacer_personnage(identifiant: str, payload: CharacterCreateRequest) -> dict[str, Any]:
+    def remplacer(character: Character) -> Character:
+        return Character(
+            identifiant=identifiant,
+            profil=CharacterProfile(**payload.profil.model_dump()),
+            traits=CharacterTraits(**payload.traits.model_dump()) if payload.traits else CharacterTraits(),
+            historique=_build_character_history(payload.historique),
+            etat=CharacterState(**payload.etat.model_dump()) if payload.etat else None,
+            cree_le=character.cree_le,
+            modifie_le=character.modifie_le,
+            version_schema=character.version_schema,
+        )
+
     try:
-        character = get_character(character_repo, identifiant)
+        character_mis_a_jour = character_repo.modifier(identifiant, remplacer)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-
-    character_mis_a_jour = Character(
-        identifiant=identifiant,
-        profil=CharacterProfile(**payload.profil.model_dump()),
-        traits=CharacterTraits(**payload.traits.model_dump()) if payload.traits else CharacterTraits(),
-        historique=_build_character_history(payload.historique),
-        etat=CharacterState(**payload.etat.model_dump()) if payload.etat else None,
-        cree_le=character.cree_le,
-        modifie_le=character.modifie_le,
-        version_schema=character.version_schema,
-    )
-    character_mis_a_jour = update_character(character_repo, character_mis_a_jour)
     return _character_to_payload(character_mis_a_jour)
 
 
@@ -559,46 +900,108 @@ def mettre_a_jour_personnage(
     payload: CharacterUpdateRequest,
 ) -> dict[str, Any]:
     try:
-        character = get_character(character_repo, identifiant)
+        character_mis_a_jour = character_repo.modifier(
+            identifiant,
+            partial(_appliquer_modifications_personnage, payload=payload),
+        )
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return _character_to_payload(character_mis_a_jour)
 
-    character_mis_a_jour = Character(
-        identifiant=identifiant,
-        profil=(
-            CharacterProfile(**payload.profil.model_dump())
-            if payload.profil
-            else character.profil
-        ),
-        traits=(
-            CharacterTraits(**payload.traits.model_dump())
-            if payload.traits
-            else character.traits
-        ),
-        historique=(
-            _build_character_history(payload.historique)
-            if payload.historique
-            else character.historique
-        ),
-        etat=(
-            CharacterState(**payload.etat.model_dump())
-            if payload.etat
-            else character.etat
-        ),
-        cree_le=character.cree_le,
-        modifie_le=character.modifie_le,
-        version_schema=character.version_schema,
+
+@app.patch("/characters/{identifiant}/etat")
+def modifier_etat_personnage(
+    identifiant: str,
+    payload: CharacterStateUpdateRequest,
+    if_match: str | None = Header(None),
+) -> Response:
+    modifications = payload.model_dump(exclude_unset=True)
+    try:
+        etat, version = character_repo.modifier_etat(
+            identifiant,
+            modifications,
+            version=_version_if_match(if_match),
+        )
+    except (FileNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=_statut_erreur_etat(exc), detail=str(exc)) from exc
+    return _reponse_json(
+        encoder_json({"identifiant": identifiant, "etat": etat, "version": version}),
+        etag=_etag(version),
     )
-    character_mis_a_jour = update_character(character_repo, character_mis_a_jour)
-    return _character_to_payload(character_mis_a_jour)
 
 
 @app.delete("/characters/{identifiant}", status_code=204)
-def supprimer_personnage(identifiant: str) -> None:
+def supprimer_personnage(identifiant: str, force: bool = False) -> None:
+    # Les écritures de scénarios vérifient les personnages sous ce même verrou :
+    # aucune nouvelle référence ne peut s'intercaler avant la suppression.
+    with scenario_repo.verrouiller():
+        if not character_repo.existe(identifiant):
+            raise HTTPException(status_code=404, detail=f"Personnage introuvable: {identifiant}")
+        if scenario_repo.est_reference(identifiant):
+            if not force:
+                raise HTTPException(
+                    status_code=409,
+                    detail={
+                        "erreur": "Personnage référencé par des scènes ; utilisez force=true pour l'en retirer.",
+                        "scenes": scenario_repo.references_personnage(identifiant),
+                    },
+                )
+            scenario_repo.retirer_personnage(identifiant)
+        try:
+            delete_character(character_repo, identifiant)
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.post("/characters/{identifiant}/historique", status_code=201)
+def ajouter_evenement_personnage(
+    identifiant: str,
+    payload: CharacterHistoryEntryPayload,
+) -> dict[str, Any]:
+    evenement = CharacterHistoryEntry(**payload.model_dump())
+    try:
+        indice = character_repo.ajouter_evenement(identifiant, evenement)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return {"indice": indice, **asdict(evenement)}
+
+
+@app.get("/characters/{identifiant}/historique")
+def lire_historique_personnage(
+    identifiant: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=1000),
+) -> Response:
     try:
-        delete_character(character_repo, identifiant)
+        total, evenements = character_repo.lire_historique(identifiant, debut=offset, limite=limit)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    suivant = offset + len(evenements)
+    return _reponse_json(
+        encoder_json(
+            {
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+                "suivant": suivant if suivant < total else None,
+                "evenements": evenements,
+            }
+        )
+    )
+
+
+@app.get("/characters/{identifiant}/scenes")
+def lister_scenes_personnage(identifiant: str) -> list[dict[str, Any]]:
+    if not character_repo.existe(identifiant):
+        raise HTTPException(status_code=404, detail=f"Personnage introuvable: {identifiant}")
+    return scenario_repo.references_personnage(identifiant)
+
+
+@app.get("/characters/{identifiant}/scenarios")
+def lister_scenarios_personnage(identifiant: str) -> list[dict[str, Any]]:
+    if not character_repo.existe(identifiant):
+        raise HTTPException(status_code=404, detail=f"Personnage introuvable: {identifiant}")
+    return scenario_repo.scenarios_personnage(identifiant)
 
 
 @app.post("/prompts", status_code=201)
@@ -614,18 +1017,33 @@ def creer_prompt(payload: PromptCreateRequest) -> dict[str, Any]:
     return _prompt_to_payload(prompt)
 
 
-@app.get("/prompts")
-def lister_prompts() -> list[dict[str, Any]]:
-    return [_prompt_to_payload(prompt) for prompt in prompt_repo.lister()]
+@app.get("/prompts", response_model=list[dict[str, Any]])
+def lister_prompts(
+    fields: str | None = None,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    champs = _parser_champs(fields)
+    etag = _etag_liste(prompt_repo.revision_collection, champs)
+    if _correspond_etag(if_none_match, etag):
+        return _reponse_non_modifiee(etag)
+    return _reponse_json_liste(prompt_repo.lister_json(champs), etag=etag)
 
 
-@app.get("/prompts/{identifiant}")
-def lire_prompt(identifiant: str) -> dict[str, Any]:
+@app.get("/prompts/{identifiant}", response_model=dict[str, Any])
+def lire_prompt(
+    identifiant: str,
+    fields: str | None = None,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    champs = _parser_champs(fields)
     try:
-        prompt = prompt_repo.lire(identifiant)
+        etag = _etag(prompt_repo.revision(identifiant), champs)
+        if _correspond_etag(if_none_match, etag):
+            return _reponse_non_modifiee(etag)
+        contenu = prompt_repo.lire_json(identifiant, champs)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-    return _prompt_to_payload(prompt)
+    return _reponse_json(contenu, etag=etag)
 
 
 @app.put("/prompts/{identifiant}")
@@ -661,6 +1079,29 @@ def enregistrer_execution_prompt(
     return asdict(execution)
 
 
+@app.post("/prompts/{identifiant}/executions/lot", status_code=201)
+async def executer_prompt_lot(
+    identifiant: str,
+    payload: PromptExecutionBatchRequest,
+) -> StreamingResponse:
+    try:
+        version, executions = await pools.lot(
+            prompt_repo.enregistrer_executions,
+            identifiant,
+            payload.contextes,
+            version=payload.version,
+        )
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(
+        pools.iterer_lot(_rendre_executions(version, executions)),
+        status_code=201,
+        media_type="application/x-ndjson",
+    )
+
+
 @app.post("/scenarios", status_code=201)
 def creer_scenario(payload: ScenarioCreateRequest) -> dict[str, Any]:
     scenario = Scenario(
@@ -669,21 +1110,46 @@ def creer_scenario(payload: ScenarioCreateRequest) -> dict[str, Any]:
         description=payload.description,
         actes=_build_actes(payload.actes),
     )
-    _verifier_coherence_scenario(scenario)
-    try:
-        scenario = scenario_repo.creer(
-            scenario.titre,
-            description=scenario.description,
-            actes=scenario.actes,
-        )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    with scenario_repo.verrouiller():
+        _verifier_coherence_scenario(scenario)
+        try:
+            scenario = scenario_repo.creer(
+                scenario.titre,
+                description=scenario.description,
+                actes=scenario.actes,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
     return asdict(scenario)
 
 
-@app.get("/scenarios")
-def lister_scenarios() -> list[dict[str, Any]]:
-    return [asdict(scenario) for scenario in scenario_repo.lister()]
+@app.get("/scenarios", response_model=list[dict[str, Any]])
+def lister_scenarios(
+    fields: str | None = None,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    champs = _parser_champs(fields)
+    etag = _etag_liste(scenario_repo.revision_collection, champs)
+    if _correspond_etag(if_none_match, etag):
+        return _reponse_non_modifiee(etag)
+    return _reponse_json_liste(scenario_repo.lister_json(champs), etag=etag)
+
+
+@app.get("/scenarios/{identifiant}", response_model=dict[str, Any])
+def lire_scenario(
+    identifiant: str,
+    fields: str | None = None,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    champs = _parser_champs(fields)
+    try:
+        etag = _etag(scenario_repo.revision(identifiant), champs)
+        if _correspond_etag(if_none_match, etag):
+            return _reponse_non_modifiee(etag)
+        contenu = scenario_repo.lire_json(identifiant, champs)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return _reponse_json(contenu, etag=etag)
 
 
 @app.put("/scenarios/{identifiant}")
@@ -697,120 +1163,869 @@ def mettre_a_jour_scenario(
         description=payload.description,
         actes=_build_actes(payload.actes),
     )
-    _verifier_coherence_scenario(scenario)
+    with scenario_repo.verrouiller():
+        _verifier_coherence_scenario(scenario)
+        try:
+            scenario = scenario_repo.mettre_a_jour(scenario)
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return asdict(scenario)
+
+
+@app.post("/scenarios/{identifiant}/actes", status_code=201)
+def ajouter_acte_scenario(
+    identifiant: str,
+    payload: ActePayload,
+    position: int | None = Query(None, ge=0),
+) -> dict[str, Any]:
+    acte = _build_actes([payload])[0]
+    with scenario_repo.verrouiller():
+        for scene in acte.scenes:
+            _verifier_personnages_scene(scene.identifiant, scene.personnages_ids)
+        try:
+            return scenario_repo.ajouter_acte(identifiant, acte, position=position)
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except IdentifiantDuplique as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.patch("/scenarios/{identifiant}/actes/{acte_id}")
+def modifier_acte_scenario(
+    identifiant: str,
+    acte_id: str,
+    payload: ActeUpdateRequest,
+) -> dict[str, Any]:
+    champs = payload.model_dump(exclude_none=True, exclude={"position"})
     try:
-        scenario = scenario_repo.mettre_a_jour(scenario)
+        return scenario_repo.modifier_acte(identifiant, acte_id, champs, position=payload.position)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except IdentifiantDuplique as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-    return asdict(scenario)
+
+
+@app.delete("/scenarios/{identifiant}/actes/{acte_id}", status_code=204)
+def supprimer_acte_scenario(identifiant: str, acte_id: str) -> None:
+    try:
+        scenario_repo.supprimer_acte(identifiant, acte_id)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.post("/scenarios/{identifiant}/actes/{acte_id}/scenes", status_code=201)
+def ajouter_scene_scenario(
+    identifiant: str,
+    acte_id: str,
+    payload: SceneScenarioPayload,
+    position: int | None = Query(None, ge=0),
+) -> dict[str, Any]:
+    scene = _build_scene_scenario(payload)
+    with scenario_repo.verrouiller():
+        _verifier_personnages_scene(scene.identifiant, scene.personnages_ids)
+        try:
+            return scenario_repo.ajouter_scene(identifiant, acte_id, scene, position=position)
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except IdentifiantDuplique as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.patch("/scenarios/{identifiant}/actes/{acte_id}/scenes/{scene_id}")
+def modifier_scene_scenario(
+    identifiant: str,
+    acte_id: str,
+    scene_id: str,
+    payload: SceneScenarioUpdateRequest,
+) -> dict[str, Any]:
+    champs = payload.model_dump(exclude_none=True, exclude={"acte_id", "position"})
+    with scenario_repo.verrouiller():
+        if "personnages_ids" in champs:
+            _verifier_personnages_scene(scene_id, champs["personnages_ids"])
+        try:
+            return scenario_repo.modifier_scene(
+                identifiant,
+                acte_id,
+                scene_id,
+                champs,
+                acte_cible=payload.acte_id,
+                position=payload.position,
+            )
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except IdentifiantDuplique as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.delete("/scenarios/{identifiant}/actes/{acte_id}/scenes/{scene_id}", status_code=204)
+def supprimer_scene_scenario(identifiant: str, acte_id: str, scene_id: str) -> None:
+    try:
+        scenario_repo.supprimer_scene(identifiant, acte_id, scene_id)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/changes")
+def lister_changements(
+    since: int | None = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    inclure_donnees: bool = False,
+) -> Response:
+    sequence_courante = journal_changements.sequence_courante
+    if since is None:
+        changements, resynchronisation = [], False
+    else:
+        changements, resynchronisation = journal_changements.depuis(since, limite=limit + 1)
+    complet = len(changements) <= limit
+    changements = changements[:limit]
+    elements = []
+    for changement in changements:
+        element = encoder_json(asdict(changement))
+        if inclure_donnees:
+            element = element[:-1] + b',"donnees":' + _donnees_changement(changement) + b"}"
+        elements.append(element)
+    suivant = changements[-1].sequence if changements else (since if since is not None else sequence_courante)
+    if resynchronisation:
+        suivant = sequence_courante
+    entete = encoder_json(
+        {
+            "sequence_courante": sequence_courante,
+            "suivant": suivant,
+            "complet": complet,
+            "resynchronisation_requise": resynchronisation,
+        }
+    )
+    return _reponse_json(entete[:-1] + b',"changements":[' + b",".join(elements) + b"]}")
 
 
 @app.post("/renders", response_model=RenderResponse, status_code=201)
-def lancer_rendu(payload: RenderRequest) -> RenderResponse:
+async def lancer_rendu(payload: RenderRequest, response: Response, attendre: bool = True) -> RenderResponse:
+    rendu, future = await pools.crud(_soumettre_rendu, payload)
+    if not attendre:
+        response.status_code = 202
+        return _render_to_response(rendu, file=ordonnanceur.position(rendu.identifiant))
+
+    try:
+        # L'attente n'occupe aucun thread ; ``shield`` évite qu'une déconnexion
+        # du client n'annule la tâche déjà enregistrée.
+        rendu_termine = await asyncio.shield(asyncio.wrap_future(future))
+    except asyncio.CancelledError:
+        if not future.cancelled():
+            raise
+        raise HTTPException(status_code=409, detail="Rendu annulé avant son exécution") from None
+    except GenerationInterrupted as exc:
+        if exc.reason == CANCELLED:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
+    except CircuitOpen as exc:
+        raise _modele_indisponible(exc) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return _render_to_response(rendu_termine)
+
+
+def _soumettre_rendu(payload: RenderRequest) -> tuple[RenderJob, Future]:
+    """Valide, enregistre et met en file un rendu ; lève HTTPException en cas de refus."""
+
+    scene, prompt, config = _preparer_rendu(payload)
+    try:
+        orchestrator.breaker(payload.type, payload.model_name).check()
+    except CircuitOpen as exc:
+        raise _modele_indisponible(exc) from exc
+    try:
+        ordonnanceur.verifier_admission(payload.model_name)
+    except FileSaturee as exc:
+        raise _file_saturee(exc) from exc
+
+    echeance = None
+    if payload.delai_secondes is not None:
+        echeance = (datetime.utcnow() + timedelta(seconds=payload.delai_secondes)).isoformat()
+    rendu = create_render(
+        render_repo,
+        type_rendu=payload.type,
+        scene=_scene_to_payload(payload.scene, scene),
+        prompt=payload.prompt.model_dump(),
+        configuration=(payload.image_config or payload.video_config).model_dump(),
+        modele=payload.model_name,
+        statut="en_attente",
+        priorite=payload.priorite,
+        proprietaire=payload.proprietaire,
+        echeance=echeance,
+    )
+    try:
+        future = _mettre_en_file(rendu, scene, prompt, config, delai_secondes=payload.delai_secondes)
+    except FileSaturee as exc:
+        # La file s'est remplie depuis la vérification : le rendu n'a jamais été admis.
+        delete_render(render_repo, rendu.identifiant)
+        raise _file_saturee(exc) from exc
+    return rendu, future
+
+
+def _preparer_rendu(
+    payload: RenderRequest,
+) -> tuple[SceneSpec, PromptSpec, ImageGenerationConfig | VideoGenerationConfig]:
     if payload.type == "image":
         if payload.image_config is None:
             raise HTTPException(status_code=400, detail="image_config manquant pour un rendu image")
         config = _build_image_config(payload.image_config)
+        modeles = orchestrator.image_models
     else:
         if payload.video_config is None:
             raise HTTPException(status_code=400, detail="video_config manquant pour un rendu video")
         config = _build_video_config(payload.video_config)
+        modeles = orchestrator.video_models
+    if payload.model_name not in modeles:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Modèle '{payload.model_name}' introuvable. Disponibles: {sorted(modeles)}",
+        )
+    return _build_scene(payload.scene), _build_prompt(payload.prompt), config
+
+
+def _mettre_en_file(
+    rendu: RenderJob,
+    scene: SceneSpec,
+    prompt: PromptSpec,
+    config: ImageGenerationConfig | VideoGenerationConfig,
+    *,
+    delai_secondes: float | None = None,
+) -> Future:
+    """Place un rendu enregistré dans la file ; tout refus autre que FileSaturee le passe en échec."""
+
+    duree_estimee = estimateur_durees.estimer(rendu.type_rendu, rendu.modele, rendu.configuration)
+    jeton = CancellationToken()
+    jeton.limit(delai_secondes)
+    jetons_rendus[rendu.identifiant] = jeton
+    try:
+        return ordonnanceur.soumettre(
+            rendu.identifiant,
+            partial(_executer_rendu, rendu.identifiant, rendu.type_rendu, scene, prompt, config, jeton),
+            priorite=rendu.priorite,
+            proprietaire=rendu.proprietaire,
+            groupe=rendu.modele,
+            cout=duree_estimee if duree_estimee is not None else 1.0,
+            duree_estimee=duree_estimee,
+        )
+    except FileSaturee:
+        jetons_rendus.pop(rendu.identifiant, None)
+        raise
+    except Exception as exc:
+        jetons_rendus.pop(rendu.identifiant, None)
+        render_repo.modifier(rendu.identifiant, partial(RenderJob.echouer, erreur=_message_erreur(exc)))
+        raise
 
-    scene = _build_scene(payload.scene)
-    prompt = _build_prompt(payload.prompt)
-    rendu = create_render(
-        render_repo,
-        type_rendu=payload.type,
-        scene=payload.scene.model_dump(),
-        prompt=payload.prompt.model_dump(),
-        configuration=(payload.image_config or payload.video_config).model_dump(),
-        modele=payload.model_name,
+
+def _message_erreur(exc: BaseException) -> str:
+    return str(exc) or type(exc).__name__
+
+
+def _battre_rendus_actifs() -> None:
+    render_repo.renouveler_baux(list(jetons_rendus))
+
+
+def reprendre_rendus_orphelins(*, demarrage: bool = False) -> dict[str, int]:
+    """Remet en file les rendus orphelins, ou les passe en échec une fois les essais épuisés.
+
+    Un rendu dont l'échéance est passée pendant l'interruption expire au lieu d'être repris.
+    """
+
+    bilan = {"repris": 0, "echecs": 0, "expires": 0}
+    orphelins = rendus_orphelins(
+        list_renders(render_repo),
+        actifs=set(jetons_rendus),
+        bail_secondes=RENDER_LEASE_SECONDS,
+        demarrage=demarrage,
+    )
+    for rendu in orphelins:
+        try:
+            if _delai_restant(rendu) == 0:
+                render_repo.modifier(
+                    rendu.identifiant,
+                    partial(RenderJob.expirer, motif="Échéance dépassée pendant l'interruption du serveur."),
+                )
+                bilan["expires"] += 1
+                continue
+            motif = _reprendre_rendu(rendu)
+            if motif is None:
+                bilan["repris"] += 1
+                continue
+            render_repo.modifier(rendu.identifiant, partial(RenderJob.echouer, erreur=motif))
+        except FileNotFoundError:
+            continue
+        bilan["echecs"] += 1
+    return bilan
+
+
+def _reprendre_rendu(rendu: RenderJob) -> str | None:
+    """Remet un rendu orphelin en file ; retourne le motif d'échec s'il ne peut pas l'être."""
+
+    if rendu.tentatives >= RENDER_MAX_ATTEMPTS:
+        return f"Exécution interrompue par un arrêt du serveur, {rendu.tentatives} tentative(s) épuisée(s)."
+    try:
+        scene, prompt, config = _preparer_rendu(_requete_depuis_rendu(rendu))
+    except HTTPException as exc:
+        return f"Reprise impossible : {exc.detail}"
+    except ValueError as exc:
+        return f"Reprise impossible : {exc}"
+    rendu = render_repo.modifier(rendu.identifiant, RenderJob.reprendre)
+    try:
+        _mettre_en_file(rendu, scene, prompt, config, delai_secondes=_delai_restant(rendu))
+    except FileSaturee as exc:
+        return f"Reprise impossible : {exc}"
+    return None
+
+
+def _delai_restant(rendu: RenderJob) -> float | None:
+    """Secondes avant l'échéance enregistrée du rendu (0 si dépassée), ou None sans échéance."""
+
+    if rendu.echeance is None:
+        return None
+    restant = datetime.fromisoformat(rendu.echeance) - datetime.utcnow()
+    return max(restant.total_seconds(), 0.0)
+
+
+def _requete_depuis_rendu(rendu: RenderJob) -> RenderRequest:
+    # Les personnages enregistrés sont déjà résolus : ne pas les relire depuis character_ids.
+    configuration = {f"{rendu.type_rendu}_config": rendu.configuration}
+    return RenderRequest(
+        type=rendu.type_rendu,
+        scene={**rendu.scene, "character_ids": []},
+        prompt=rendu.prompt,
+        model_name=rendu.modele,
+        priorite=rendu.priorite,
+        proprietaire=rendu.proprietaire,
+        **configuration,
     )
 
+
+def _file_saturee(exc: FileSaturee) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.reessayer_dans)},
+    )
+
+
+def _modele_indisponible(exc: CircuitOpen) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _executer_rendu(
+    identifiant: str,
+    type_rendu: str,
+    scene: SceneSpec,
+    prompt: PromptSpec,
+    config: ImageGenerationConfig | VideoGenerationConfig,
+    jeton: CancellationToken,
+) -> RenderJob:
+    """Exécute un rendu sorti de la file ; l'échec est consigné sur le rendu.
+
+    Le délai du modèle court à partir du démarrage ; l'échéance demandée à la
+    soumission s'applique si elle est plus proche.
+    """
+
     try:
-        if payload.type == "image":
-            asset = orchestrator.generate_image(
-                scene=scene,
-                prompt=prompt,
-                config=config,
-                model_name=payload.model_name,
-            )
-        else:
-            asset = orchestrator.generate_video(
+        rendu = _consigner_issue(identifiant, RenderJob.demarrer)
+        if rendu is None:
+            raise GenerationInterrupted(CANCELLED)
+        jeton.limit(delais_modeles.get(rendu.modele, delais_modeles.get("*")))
+        debut = time.monotonic()
+        try:
+            asset = _generer_rendu(rendu, type_rendu, scene, prompt, config, jeton)
+        except GenerationInterrupted as exc:
+            transition = RenderJob.annuler if exc.reason == CANCELLED else RenderJob.expirer
+            _consigner_issue(identifiant, partial(transition, motif=str(exc)))
+            raise
+        except Exception as exc:
+            _consigner_issue(identifiant, partial(RenderJob.echouer, erreur=_message_erreur(exc)))
+            raise
+        estimateur_durees.observer(type_rendu, rendu.modele, rendu.configuration, time.monotonic() - debut)
+        termine = _consigner_issue(
+            identifiant,
+            partial(RenderJob.terminer, asset=_media_asset_to_render_asset(asset)),
+        )
+        if termine is None:
+            # Supprimé pendant la génération : le résultat n'a plus de rendu où être consigné.
+            raise GenerationInterrupted(CANCELLED)
+        return termine
+    finally:
+        # Retiré une fois l'issue enregistrée, pour que la reprise ne le croie jamais orphelin.
+        jetons_rendus.pop(identifiant, None)
+
+
+def _consigner_issue(identifiant: str, transition: Callable[[RenderJob], RenderJob]) -> RenderJob | None:
+    """Applique ``transition`` au rendu ; ``None`` s'il a été supprimé entre-temps."""
+
+    try:
+        return render_repo.modifier(identifiant, transition)
+    except FileNotFoundError:
+        return None
+
+
+def _generer_rendu(
+    rendu: RenderJob,
+    type_rendu: str,
+    scene: SceneSpec,
+    prompt: PromptSpec,
+    config: ImageGenerationConfig | VideoGenerationConfig,
+    jeton: CancellationToken,
+) -> MediaAsset:
+    with cancellation_scope(jeton):
+        if type_rendu == "image":
+            return orchestrator.generate_image(
                 scene=scene,
                 prompt=prompt,
                 config=config,
-                model_name=payload.model_name,
+                model_name=rendu.modele,
             )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return orchestrator.generate_video(
+            scene=scene,
+            prompt=prompt,
+            config=config,
+            model_name=rendu.modele,
+        )
 
-    rendu_termine = rendu.terminer(_media_asset_to_render_asset(asset))
-    update_render(render_repo, rendu_termine)
-    return _render_to_response(rendu_termine)
 
+@app.get("/renders/file")
+def lire_file_rendus() -> dict[str, Any]:
+    return {
+        "priorites": list(PRIORITES),
+        **ordonnanceur.etat(),
+        "estimations": estimateur_durees.etat(),
+    }
 
-@app.get("/renders")
-def lister_rendus() -> list[RenderResponse]:
-    return [_render_to_response(rendu) for rendu in list_renders(render_repo)]
 
+@app.get("/renders", response_model=list[RenderResponse])
+def lister_rendus(
+    fields: str | None = None,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    champs = _parser_champs(fields)
+    etag = _etag_liste(render_repo.revision_collection, champs)
+    if _correspond_etag(if_none_match, etag):
+        return _reponse_non_modifiee(etag)
+    return _reponse_json_liste(render_repo.lister_json(champs), etag=etag)
 
-@app.get("/renders/{identifiant}")
-def lire_rendu(identifiant: str) -> RenderResponse:
+
+@app.get("/renders/{identifiant}", response_model=RenderResponse)
+def lire_rendu(
+    identifiant: str,
+    fields: str | None = None,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    champs = _parser_champs(fields)
+    try:
+        etag = _etag(render_repo.revision(identifiant), champs)
+        if _correspond_etag(if_none_match, etag):
+            return _reponse_non_modifiee(etag)
+        contenu = render_repo.lire_json(identifiant, champs)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return _reponse_json(contenu, etag=etag)
+
+
+@app.get("/renders/{identifiant}/file")
+def lire_position_rendu(identifiant: str) -> dict[str, Any]:
     try:
         rendu = get_render(render_repo, identifiant)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-    return _render_to_response(rendu)
+    return {
+        "identifiant": identifiant,
+        "statut": rendu.statut,
+        "priorite": rendu.priorite,
+        "proprietaire": rendu.proprietaire,
+        "file": ordonnanceur.position(identifiant),
+    }
 
 
-@app.patch("/renders/{identifiant}", response_model=RenderResponse)
-def mettre_a_jour_rendu(identifiant: str, payload: RenderUpdateRequest) -> RenderResponse:
+@app.post("/renders/{identifiant}/annulation", response_model=RenderResponse)
+def annuler_rendu(identifiant: str, response: Response) -> RenderResponse:
+    """Annule un rendu : immédiatement s'il est en file, sinon en arrêtant sa génération."""
+
     try:
         rendu = get_render(render_repo, identifiant)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    if ordonnanceur.annuler(identifiant):
+        jetons_rendus.pop(identifiant, None)
+        rendu = render_repo.modifier(
+            identifiant,
+            partial(RenderJob.annuler, motif="Rendu annulé avant son exécution."),
+        )
+        return _render_to_response(rendu)
+    jeton = jetons_rendus.get(identifiant)
+    if jeton is None or not jeton.cancel():
+        raise HTTPException(status_code=409, detail=f"Rendu {identifiant} déjà terminé ({rendu.statut}).")
+    # L'arrêt est asynchrone : le statut passe à "annule" quand la génération s'interrompt.
+    response.status_code = 202
+    return _render_to_response(rendu)
 
-    asset = RenderAsset(**payload.asset.model_dump()) if payload.asset else rendu.asset
-    statut = payload.statut if payload.statut is not None else rendu.statut
-    termine_le = rendu.termine_le
-    if payload.statut == "termine" and termine_le is None:
-        termine_le = datetime.utcnow().isoformat()
 
-    rendu_mis_a_jour = RenderJob(
-        identifiant=rendu.identifiant,
-        type_rendu=rendu.type_rendu,
-        scene=rendu.scene,
-        prompt=rendu.prompt,
-        configuration=rendu.configuration,
-        modele=rendu.modele,
-        statut=statut,
-        asset=asset,
-        cree_le=rendu.cree_le,
-        termine_le=termine_le,
-    )
-    rendu_mis_a_jour = update_render(render_repo, rendu_mis_a_jour)
+@app.patch("/renders/{identifiant}", response_model=RenderResponse)
+def mettre_a_jour_rendu(identifiant: str, payload: RenderUpdateRequest) -> RenderResponse:
+    def appliquer(rendu: RenderJob) -> RenderJob:
+        asset = RenderAsset(**payload.asset.model_dump()) if payload.asset else rendu.asset
+        statut = payload.statut if payload.statut is not None else rendu.statut
+        termine_le = rendu.termine_le
+        if payload.statut == "termine" and termine_le is None:
+            termine_le = datetime.utcnow().isoformat()
+        return replace(rendu, statut=statut, asset=asset, termine_le=termine_le)
+
+    try:
+        rendu_mis_a_jour = render_repo.modifier(identifiant, appliquer)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
     return _render_to_response(rendu_mis_a_jour)
 
 
 @app.delete("/renders/{identifiant}", status_code=204)
 def supprimer_rendu(identifiant: str) -> None:
     try:
-        delete_render(render_repo, identifiant)
+        delete_render(render_repo, identifiant, termine_seulement=True)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except RenduActif as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+def _verifier_admin(x_admin_token: str | None = Header(None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Administration désactivée (SEIDRA_ADMIN_TOKEN absent)")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+
+@app.get("/admin/profilage", dependencies=[Depends(_verifier_admin)])
+def lire_profilage() -> dict[str, Any]:
+    return profileur.etat()
+
+
+@app.put("/admin/profilage", dependencies=[Depends(_verifier_admin)])
+def configurer_profilage(payload: ProfilageConfigurationRequest) -> dict[str, Any]:
+    profileur.configurer(
+        ConfigurationProfilage(
+            actif=payload.actif,
+            taux=payload.taux,
+            routes=tuple(payload.routes),
+            intervalle_secondes=payload.intervalle_ms / 1000,
+            fenetre_secondes=payload.fenetre_secondes,
+        )
+    )
+    return profileur.etat()
+
+
+@app.get(
+    "/admin/profilage/piles",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(_verifier_admin)],
+)
+def lire_piles_profilage(inclure_precedente: bool = True) -> str:
+    return profileur.piles_repliees(inclure_precedente=inclure_precedente)
+
+
+@app.delete("/admin/profilage/piles", status_code=204, dependencies=[Depends(_verifier_admin)])
+def reinitialiser_profilage() -> None:
+    profileur.reinitialiser()
+
+
+@app.get("/admin/memoire", dependencies=[Depends(_verifier_admin)])
+def lire_memoire(
+    top: int = Query(5, ge=0),
+    objets: bool = False,
+    allocations: int = Query(0, ge=0),
+) -> dict[str, Any]:
+    depots = {
+        "characters": character_repo,
+        "renders": render_repo,
+        "prompts": prompt_repo,
+        "scenarios": scenario_repo,
+    }
+    rapport: dict[str, Any] = {
+        "processus": memoire_processus(),
+        "depots": {nom: rapport_depot(depot.structures_memoire(), top=top) for nom, depot in depots.items()},
+        "journal_changements_octets": taille_profonde(journal_changements),
+        "profils_media_octets": taille_profonde(profils_media.structures_memoire()),
+        "orchestrateur_octets": taille_profonde(orchestrator),
+        "tracemalloc_actif": suivi_allocations.actif,
+    }
+    if objets:
+        rapport["objets"] = compter_objets()
+    if allocations and suivi_allocations.actif:
+        rapport["allocations"] = suivi_allocations.sites(limite=allocations)
+    return rapport
+
+
+@app.put("/admin/memoire/tracemalloc", dependencies=[Depends(_verifier_admin)])
+def configurer_tracemalloc(payload: TracemallocRequest) -> dict[str, Any]:
+    if payload.actif:
+        suivi_allocations.demarrer(payload.profondeur)
+    else:
+        suivi_allocations.arreter()
+    return {"tracemalloc_actif": suivi_allocations.actif, "instantanes": suivi_allocations.noms()}
+
+
+@app.post("/admin/memoire/instantanes", status_code=201, dependencies=[Depends(_verifier_admin)])
+def prendre_instantane_memoire(payload: InstantaneMemoireRequest, limite: int = 20) -> dict[str, Any]:
+    try:
+        suivi_allocations.prendre_instantane(payload.nom)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return {"nom": payload.nom, "allocations": suivi_allocations.sites(payload.nom, limite=limite)}
+
+
+@app.get("/admin/memoire/instantanes", dependencies=[Depends(_verifier_admin)])
+def lister_instantanes_memoire() -> list[str]:
+    return suivi_allocations.noms()
+
+
+@app.get("/admin/memoire/instantanes/{avant}/diff/{apres}", dependencies=[Depends(_verifier_admin)])
+def comparer_instantanes_memoire(avant: str, apres: str, limite: int = 20) -> list[dict[str, Any]]:
+    try:
+        return suivi_allocations.comparer(avant, apres, limite=limite)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.get("/admin/executeurs", dependencies=[Depends(_verifier_admin)])
+async def lire_executeurs() -> dict[str, Any]:
+    return {
+        **pools.etat(),
+        "rendus": {"threads": ordonnanceur.workers, "occupes": ordonnanceur.etat()["en_cours"]},
+    }
+
+
+@app.get("/admin/disjoncteurs", dependencies=[Depends(_verifier_admin)])
+def lire_disjoncteurs() -> list[dict[str, Any]]:
+    return orchestrator.breaker_states()
+
+
+@app.delete(
+    "/admin/disjoncteurs/{type_rendu}/{modele}",
+    status_code=204,
+    dependencies=[Depends(_verifier_admin)],
+)
+def refermer_disjoncteur(type_rendu: Literal["image", "video"], modele: str) -> None:
+    modeles = orchestrator.image_models if type_rendu == "image" else orchestrator.video_models
+    if modele not in modeles:
+        raise HTTPException(status_code=404, detail=f"Modèle '{modele}' introuvable.")
+    orchestrator.breaker(type_rendu, modele).reset()
+
+
+@app.get("/admin/export", dependencies=[Depends(_verifier_admin)])
+def exporter_donnees(collections: str | None = None) -> StreamingResponse:
+    noms = list(COLLECTIONS)
+    if collections:
+        noms = [nom.strip() for nom in collections.split(",") if nom.strip()]
+        inconnues = sorted(set(noms) - set(COLLECTIONS))
+        if inconnues:
+            raise HTTPException(status_code=400, detail=f"Collections inconnues: {', '.join(inconnues)}")
+    return StreamingResponse(
+        pools.iterer_lot(exporter_ndjson(depots_par_collection, noms)),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="seidra-export.ndjson"'},
+    )
+
+
+@app.post("/admin/import", dependencies=[Depends(_verifier_admin)])
+async def importer_donnees(
+    request: Request,
+    politique: Literal["fusion", "remplacement"] = "fusion",
+    taille_lot: int = Query(TAILLE_LOT_DEFAUT, ge=1),
+    strict: bool = False,
+) -> dict[str, Any]:
+    importeur = ImportNdjson(
+        depots_par_collection,
+        politique=politique,
+        taille_lot=taille_lot,
+        strict=strict,
+        longueur_ligne_max=IMPORT_LINE_MAX,
+    )
+    # Les morceaux reçus sont découpés en lignes dans le pool des lots, par paquets.
+    morceaux: list[bytes] = []
+    taille = 0
+    try:
+        async for morceau in request.stream():
+            morceaux.append(morceau)
+            taille += len(morceau)
+            if taille >= OCTETS_PAR_MORCEAU:
+                await pools.lot(importeur.ajouter_morceaux, morceaux)
+                morceaux, taille = [], 0
+        await pools.lot(importeur.ajouter_morceaux, morceaux)
+        return await pools.lot(importeur.terminer)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail={"erreur": str(exc), "rapport": importeur.rapport},
+        ) from exc
 
 
 def _character_to_payload(character: Any) -> dict[str, Any]:
-    return asdict(character)
+    payload = asdict(character)
+    evenements = payload["historique"]["evenements"]
+    payload["historique"] = {
+        "total": len(evenements),
+        "evenements": evenements[-APERCU_HISTORIQUE:],
+    }
+    return payload
 
 
 def _prompt_to_payload(prompt: Any) -> dict[str, Any]:
     return asdict(prompt)
 
 
+def _reponse_json(contenu: bytes, *, etag: str | None = None) -> Response:
+    headers = {"ETag": etag} if etag else None
+    return Response(content=contenu, media_type="application/json", headers=headers)
+
+
+def _reponse_json_liste(elements: Iterable[bytes], *, etag: str | None = None) -> Response:
+    return _reponse_json(b"[" + b",".join(elements) + b"]", etag=etag)
+
+
+def _rendre_executions(version: Any, executions: list[Any]) -> Iterable[bytes]:
+    """Rend chaque contexte avec le template compilé de la version, une ligne NDJSON par exécution."""
+
+    template = version.compile
+    lignes = []
+    for index, execution in enumerate(executions):
+        ligne = {"index": index, "execution": execution.identifiant}
+        try:
+            ligne["rendu"] = template.rendre({**version.variables, **execution.contexte})
+        except (AttributeError, IndexError, KeyError, TypeError, ValueError) as exc:
+            ligne["erreur"] = f"{type(exc).__name__}: {exc}"
+        lignes.append(encoder_json(ligne) + b"\n")
+        if len(lignes) >= RENDUS_PAR_MORCEAU:
+            yield b"".join(lignes)
+            lignes = []
+    if lignes:
+        yield b"".join(lignes)
+
+
+def _donnees_changement(changement: Any) -> bytes:
+    if changement.operation == SUPPRESSION:
+        return b"null"
+    try:
+        return depots_par_collection[changement.collection].lire_json(changement.identifiant)
+    except FileNotFoundError:
+        return b"null"
+
+
+def _parser_champs(fields: str | None) -> tuple[str, ...] | None:
+    if not fields:
+        return None
+    champs = tuple(champ.strip() for champ in fields.split(",") if champ.strip())
+    return champs or None
+
+
+def _etag(revision: int, champs: tuple[str, ...] | None = None) -> str:
+    return f'W/"{revision}{_suffixe_etag(champs)}"'
+
+
+def _etag_liste(revision: int, champs: tuple[str, ...] | None = None) -> str:
+    return f'W/"liste-{revision}{_suffixe_etag(champs)}"'
+
+
+def _suffixe_etag(champs: tuple[str, ...] | None) -> str:
+    if not champs:
+        return ""
+    return f"-{zlib.crc32(','.join(champs).encode('utf-8')):08x}"
+
+
+def _correspond_etag(en_tete: str | None, etag: str) -> bool:
+    """Comparaison faible (RFC 9110) d'un en-tête If-None-Match / If-Match."""
+
+    if not en_tete:
+        return False
+    if en_tete.strip() == "*":
+        return True
+    valeur = etag.removeprefix("W/")
+    return any(candidat.strip().removeprefix("W/") == valeur for candidat in en_tete.split(","))
+
+
+def _version_if_match(en_tete: str | None) -> int | None:
+    """Extrait la révision d'un en-tête If-Match (``W/"<révision>"``) ; ``*`` n'impose rien."""
+
+    if en_tete is None or en_tete.strip() == "*":
+        return None
+    try:
+        return int(en_tete.strip().removeprefix("W/").strip('"'))
+    except ValueError as exc:
+        raise HTTPException(status_code=412, detail=f"If-Match non reconnu: {en_tete}") from exc
+
+
+def _statut_erreur_etat(exc: Exception) -> int:
+    if isinstance(exc, FileNotFoundError):
+        return 404
+    if isinstance(exc, ConflitVersion):
+        return 412
+    return 400
+
+
+def _reponse_non_modifiee(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def _creer_personnage(payload: CharacterCreateRequest) -> Character:
+    return create_character(
+        character_repo,
+        CharacterProfile(**payload.profil.model_dump()),
+        traits=CharacterTraits(**payload.traits.model_dump()) if payload.traits else None,
+        historique=_build_character_history(payload.historique) if payload.historique else None,
+        etat=CharacterState(**payload.etat.model_dump()) if payload.etat else None,
+    )
+
+
+def _appliquer_modifications_personnage(
+    character: Character,
+    payload: CharacterUpdateRequest,
+) -> Character:
+    return Character(
+        identifiant=character.identifiant,
+        profil=(
+            CharacterProfile(**payload.profil.model_dump())
+            if payload.profil
+            else character.profil
+        ),
+        traits=(
+            CharacterTraits(**payload.traits.model_dump())
+            if payload.traits
+            else character.traits
+        ),
+        historique=(
+            _build_character_history(payload.historique)
+            if payload.historique
+            else character.historique
+        ),
+        etat=(
+            CharacterState(**payload.etat.model_dump())
+            if payload.etat
+            else character.etat
+        ),
+        cree_le=character.cree_le,
+        modifie_le=character.modifie_le,
+        version_schema=character.version_schema,
+    )
+
+
 def _build_character_history(payload: CharacterHistoryPayload | None) -> CharacterHistory:
     if payload is None:
         return CharacterHistory()
@@ -823,6 +2038,13 @@ def _build_scene(payload: ScenePayload) -> SceneSpec:
     characters = [
         MediaCharacterProfile(**profile.model_dump()) for profile in payload.characters
     ]
+    try:
+        characters.extend(profils_media.resoudre(payload.character_ids))
+    except FileNotFoundError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Personnage introuvable pour la scène {payload.identifier}: {exc}",
+        ) from exc
     return SceneSpec(
         identifier=payload.identifier,
         summary=payload.summary,
@@ -832,20 +2054,30 @@ def _build_scene(payload: ScenePayload) -> SceneSpec:
     )
 
 
+def _scene_to_payload(payload: ScenePayload, scene: SceneSpec) -> dict[str, Any]:
+    return {
+        **payload.model_dump(),
+        "characters": [
+            {**asdict(character), "traits": list(character.traits)}
+            for character in scene.characters
+        ],
+    }
+
+
+def _build_scene_scenario(payload: SceneScenarioPayload) -> Scene:
+    return Scene(
+        identifiant=payload.identifiant or str(uuid4()),
+        titre=payload.titre,
+        resume=payload.resume,
+        personnages_ids=list(payload.personnages_ids),
+        metadonnees=dict(payload.metadonnees),
+    )
+
+
 def _build_actes(payloads: list[ActePayload]) -> list[Acte]:
     actes = []
     for acte_payload in payloads:
-        scenes = []
-        for scene_payload in acte_payload.scenes:
-            scenes.append(
-                Scene(
-                    identifiant=scene_payload.identifiant or str(uuid4()),
-                    titre=scene_payload.titre,
-                    resume=scene_payload.resume,
-                    personnages_ids=list(scene_payload.personnages_ids),
-                    metadonnees=dict(scene_payload.metadonnees),
-                )
-            )
+        scenes = [_build_scene_scenario(scene_payload) for scene_payload in acte_payload.scenes]
         actes.append(
             Acte(
                 identifiant=acte_payload.identifiant or str(uuid4()),
@@ -895,7 +2127,7 @@ def _media_asset_to_render_asset(asset: MediaAsset) -> RenderAsset:
     return RenderAsset(uri=asset.uri, mime_type=asset.mime_type, metadata=asset.metadata)
 
 
-def _render_to_response(rendu: RenderJob) -> RenderResponse:
+def _render_to_response(rendu: RenderJob, *, file: dict[str, Any] | None = None) -> RenderResponse:
     asset_payload = asdict(rendu.asset) if rendu.asset else None
     return RenderResponse(
         identifiant=rendu.identifiant,
@@ -908,20 +2140,26 @@ def _render_to_response(rendu: RenderJob) -> RenderResponse:
         asset=asset_payload,
         cree_le=rendu.cree_le,
         termine_le=rendu.termine_le,
+        priorite=rendu.priorite,
+        proprietaire=rendu.proprietaire,
+        demarre_le=rendu.demarre_le,
+        erreur=rendu.erreur,
+        tentatives=rendu.tentatives,
+        echeance=rendu.echeance,
+        file=file,
     )
 
 
 def _verifier_coherence_scenario(scenario: Scenario) -> None:
     for acte in scenario.actes:
         for scene in acte.scenes:
-            for identifiant in scene.personnages_ids:
-                try:
-                    get_character(character_repo, identifiant)
-                except FileNotFoundError as exc:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=(
-                            "Personnage introuvable pour la scène "
-                            f"{scene.identifiant}: {identifiant}"
-                        ),
-                    ) from exc
+            _verifier_personnages_scene(scene.identifiant, scene.personnages_ids)
+
+
+def _verifier_personnages_scene(scene_id: str, personnages_ids: Iterable[str]) -> None:
+    for identifiant in personnages_ids:
+        if not character_repo.existe(identifiant):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Personnage introuvable pour la scène {scene_id}: {identifiant}",
+            )
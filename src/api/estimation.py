@@ -0,0 +1,117 @@
+"""Estimation de la durée des rendus à partir des rendus terminés.
+
+Le coût d'un rendu croît à peu près linéairement avec son volume de travail :
+mégapixels × ``steps`` pour une image, mégapixels × ``duration_seconds`` ×
+``fps`` pour une vidéo. Pour chaque couple (type, modèle), l'estimateur ajuste
+une droite ``duree = fixe + pente × volume`` par moindres carrés sur les
+observations, avec un oubli exponentiel pour suivre les changements de machine
+ou de version du modèle.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+import threading
+from typing import Any, Iterable, Mapping
+
+from .models import RenderJob
+
+# Poids conservé par une observation à chaque nouvelle observation du même modèle.
+OUBLI = 0.98
+# Durée minimale retournée, pour qu'une estimation reste un coût positif.
+DUREE_MINIMALE_SECONDES = 0.01
+
+
+def volume_travail(type_rendu: str, configuration: Mapping[str, Any]) -> float:
+    """Volume de travail d'un rendu, en mégapixels × pas (image) ou × images (vidéo)."""
+
+    resolution = configuration.get("resolution") or {}
+    megapixels = float(resolution.get("width", 0)) * float(resolution.get("height", 0)) / 1_000_000
+    if type_rendu == "image":
+        return megapixels * float(configuration.get("steps", 30))
+    return megapixels * float(configuration.get("duration_seconds", 0)) * float(configuration.get("fps", 24))
+
+
+@dataclass
+class _Statistiques:
+    poids: float = 0.0
+    somme_x: float = 0.0
+    somme_y: float = 0.0
+    somme_xx: float = 0.0
+    somme_xy: float = 0.0
+    observations: int = 0
+
+    def ajouter(self, x: float, y: float) -> None:
+        self.poids = self.poids * OUBLI + 1
+        self.somme_x = self.somme_x * OUBLI + x
+        self.somme_y = self.somme_y * OUBLI + y
+        self.somme_xx = self.somme_xx * OUBLI + x * x
+        self.somme_xy = self.somme_xy * OUBLI + x * y
+        self.observations += 1
+
+    def droite(self) -> tuple[float, float]:
+        """Retourne (fixe, pente) ; proportionnelle tant que le volume ne varie pas assez."""
+
+        moyenne_x = self.somme_x / self.poids
+        moyenne_y = self.somme_y / self.poids
+        variance = self.somme_xx / self.poids - moyenne_x * moyenne_x
+        if variance > 1e-9 * max(moyenne_x * moyenne_x, 1e-12):
+            pente = (self.somme_xy / self.poids - moyenne_x * moyenne_y) / variance
+            fixe = moyenne_y - pente * moyenne_x
+            if pente >= 0 and fixe >= 0:
+                return fixe, pente
+        if moyenne_x > 0:
+            return 0.0, moyenne_y / moyenne_x
+        return moyenne_y, 0.0
+
+
+class EstimateurDurees:
+    def __init__(self) -> None:
+        self._verrou = threading.Lock()
+        self._modeles: dict[tuple[str, str], _Statistiques] = {}
+
+    def observer(self, type_rendu: str, modele: str, configuration: Mapping[str, Any], duree: float) -> None:
+        x = volume_travail(type_rendu, configuration)
+        with self._verrou:
+            self._modeles.setdefault((type_rendu, modele), _Statistiques()).ajouter(x, max(duree, 0.0))
+
+    def estimer(self, type_rendu: str, modele: str, configuration: Mapping[str, Any]) -> float | None:
+        """Durée attendue en secondes, ou None si le modèle n'a encore rien rendu."""
+
+        with self._verrou:
+            statistiques = self._modeles.get((type_rendu, modele))
+            if statistiques is None:
+                return None
+            fixe, pente = statistiques.droite()
+        return max(fixe + pente * volume_travail(type_rendu, configuration), DUREE_MINIMALE_SECONDES)
+
+    def charger(self, rendus: Iterable[RenderJob]) -> int:
+        """Apprend des rendus terminés déjà enregistrés ; retourne le nombre retenu."""
+
+        retenus = 0
+        for rendu in sorted(rendus, key=lambda element: element.termine_le or ""):
+            if rendu.statut != "termine" or not rendu.demarre_le or not rendu.termine_le:
+                continue
+            duree = (
+                datetime.fromisoformat(rendu.termine_le) - datetime.fromisoformat(rendu.demarre_le)
+            ).total_seconds()
+            self.observer(rendu.type_rendu, rendu.modele, rendu.configuration, duree)
+            retenus += 1
+        return retenus
+
+    def etat(self) -> list[dict[str, Any]]:
+        with self._verrou:
+            modeles = []
+            for (type_rendu, modele), statistiques in sorted(self._modeles.items()):
+                fixe, pente = statistiques.droite()
+                modeles.append(
+                    {
+                        "type": type_rendu,
+                        "model_name": modele,
+                        "observations": statistiques.observations,
+                        "secondes_fixes": fixe,
+                        "secondes_par_unite": pente,
+                    }
+                )
+            return modeles
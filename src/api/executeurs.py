@@ -0,0 +1,72 @@
+"""Pools d'exécution séparant les rendus, le CRUD et les traitements par lot.
+
+- Les rendus tournent sur les threads dédiés de l'ordonnanceur ; un endpoint
+  qui attend un rendu le fait sans occuper de thread.
+- Les endpoints synchrones (``def``), essentiellement des accès aux dépôts,
+  utilisent le pool par défaut d'AnyIO, dimensionné par ``threads_crud``.
+- Les traitements longs (import, export, exécution de prompts par lot) passent
+  par un pool distinct de ``threads_lots`` threads : ils ne peuvent donc pas
+  saturer le pool qui sert les lectures.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Iterable
+
+import anyio
+import anyio.to_thread
+
+from .profiling import profiler_dans_le_thread
+
+_FIN = object()
+
+
+class PoolsExecution:
+    def __init__(self, *, threads_crud: int = 40, threads_lots: int = 4) -> None:
+        if threads_crud <= 0 or threads_lots <= 0:
+            raise ValueError("Les pools d'exécution doivent compter au moins un thread.")
+        self.threads_crud = threads_crud
+        self._lots = anyio.CapacityLimiter(threads_lots)
+
+    def configurer(self) -> None:
+        """Applique la taille du pool CRUD ; à appeler depuis la boucle d'événements."""
+
+        anyio.to_thread.current_default_thread_limiter().total_tokens = self.threads_crud
+
+    async def crud(self, fonction: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await anyio.to_thread.run_sync(profiler_dans_le_thread(partial(fonction, *args, **kwargs)))
+
+    async def lot(self, fonction: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await anyio.to_thread.run_sync(
+            profiler_dans_le_thread(partial(fonction, *args, **kwargs)), limiter=self._lots
+        )
+
+    async def iterer_lot(self, elements: Iterable[Any]) -> AsyncIterator[Any]:
+        """Parcourt un itérable synchrone dans le pool des lots, élément par élément.
+
+        Chaque élément coûte un passage par le pool : les producteurs de flux
+        regroupent leurs lignes en morceaux.
+        """
+
+        iterateur = iter(elements)
+        while True:
+            element = await self.lot(next, iterateur, _FIN)
+            if element is _FIN:
+                return
+            yield element
+
+    def etat(self) -> dict[str, Any]:
+        return {
+            "crud": _etat_limiteur(anyio.to_thread.current_default_thread_limiter()),
+            "lots": _etat_limiteur(self._lots),
+        }
+
+
+def _etat_limiteur(limiteur: anyio.CapacityLimiter) -> dict[str, Any]:
+    statistiques = limiteur.statistics()
+    return {
+        "threads": int(limiteur.total_tokens),
+        "occupes": statistiques.borrowed_tokens,
+        "en_attente": statistiques.tasks_waiting,
+    }
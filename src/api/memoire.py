@@ -0,0 +1,212 @@
+"""Comptabilité mémoire des caches en processus.
+
+Les tailles sont approximatives : elles additionnent ``sys.getsizeof`` sur le
+graphe d'objets atteignable, en ne comptant qu'une fois les objets partagés.
+Les sites d'allocation reposent sur :mod:`tracemalloc`, désactivé par défaut
+car il ralentit chaque allocation.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+import gc
+import sys
+import threading
+import tracemalloc
+from typing import Any, Mapping
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - plateformes sans getrusage
+    resource = None
+
+INSTANTANES_MAX = 10
+_FILTRES_TRACEMALLOC = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def taille_profonde(objet: Any, vus: set[int] | None = None) -> int:
+    """Estime la taille en octets d'un objet et de tout ce qu'il référence."""
+
+    vus = set() if vus is None else vus
+    total = 0
+    a_visiter = [objet]
+    while a_visiter:
+        courant = a_visiter.pop()
+        if id(courant) in vus:
+            continue
+        vus.add(id(courant))
+        total += sys.getsizeof(courant)
+        if isinstance(courant, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(courant, Mapping):
+            a_visiter.extend(courant.keys())
+            a_visiter.extend(courant.values())
+        elif isinstance(courant, (list, tuple, set, frozenset)):
+            a_visiter.extend(courant)
+        elif hasattr(courant, "__dict__") and not isinstance(courant, type):
+            a_visiter.append(vars(courant))
+    return total
+
+
+def rapport_cache(cache: Mapping[str, Any], *, top: int = 5) -> dict[str, Any]:
+    """Décrit un cache ``identifiant -> enregistrement`` et ses plus gros éléments."""
+
+    vus: set[int] = {id(cache)}
+    total = sys.getsizeof(cache)
+    tailles = []
+    for identifiant, enregistrement in list(cache.items()):
+        taille = taille_profonde(identifiant, vus) + taille_profonde(enregistrement, vus)
+        total += taille
+        tailles.append((taille, identifiant, enregistrement))
+    tailles.sort(key=lambda element: element[0], reverse=True)
+    return {
+        "enregistrements": len(tailles),
+        "taille_octets": total,
+        "plus_gros": [
+            {
+                "identifiant": identifiant,
+                "taille_octets": taille,
+                "listes": _longueurs_listes(enregistrement),
+            }
+            for taille, identifiant, enregistrement in tailles[:top]
+        ],
+    }
+
+
+def rapport_depot(structures: Mapping[str, Any], *, top: int = 5) -> dict[str, Any]:
+    """Décrit les structures d'un dépôt : son cache d'enregistrements et ses annexes.
+
+    ``structures`` associe un nom à chaque structure et contient au moins
+    ``enregistrements`` ; les annexes sont seulement mesurées.
+    """
+
+    rapport = rapport_cache(structures["enregistrements"], top=top)
+    rapport["annexes_octets"] = {
+        nom: taille_profonde(structure)
+        for nom, structure in structures.items()
+        if nom != "enregistrements"
+    }
+    return rapport
+
+
+def _longueurs_listes(enregistrement: Any, prefixe: str = "", profondeur: int = 2) -> dict[str, int]:
+    if not isinstance(enregistrement, Mapping) or profondeur == 0:
+        return {}
+    longueurs = {}
+    for cle, valeur in enregistrement.items():
+        chemin = f"{prefixe}{cle}"
+        if isinstance(valeur, list):
+            longueurs[chemin] = len(valeur)
+        elif isinstance(valeur, Mapping):
+            longueurs.update(_longueurs_listes(valeur, f"{chemin}.", profondeur - 1))
+    return longueurs
+
+
+def compter_objets(top: int = 20) -> list[dict[str, Any]]:
+    """Compte les objets suivis par le ramasse-miettes, par type."""
+
+    compteur = Counter(type(objet).__qualname__ for objet in gc.get_objects())
+    return [{"type": nom, "nombre": nombre} for nom, nombre in compteur.most_common(top)]
+
+
+def memoire_processus() -> dict[str, Any]:
+    rss_courant = None
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            pages_residentes = int(statm.read().split()[1])
+        rss_courant = pages_residentes * _taille_page()
+    except (OSError, ValueError, IndexError):
+        pass
+    pic = None
+    if resource is not None:
+        pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pic = pic if sys.platform == "darwin" else pic * 1024
+    return {"rss_octets": rss_courant, "pic_rss_octets": pic}
+
+
+def _taille_page() -> int:
+    if resource is not None:
+        return resource.getpagesize()
+    return 4096
+
+
+class SuiviAllocations:
+    """Pilote tracemalloc et conserve quelques instantanés nommés."""
+
+    def __init__(self) -> None:
+        self._verrou = threading.Lock()
+        self._instantanes: OrderedDict[str, tracemalloc.Snapshot] = OrderedDict()
+
+    @property
+    def actif(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def demarrer(self, profondeur: int = 10) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(profondeur)
+
+    def arreter(self) -> None:
+        tracemalloc.stop()
+        with self._verrou:
+            self._instantanes.clear()
+
+    def prendre_instantane(self, nom: str) -> tracemalloc.Snapshot:
+        instantane = self._capturer()
+        with self._verrou:
+            self._instantanes.pop(nom, None)
+            self._instantanes[nom] = instantane
+            while len(self._instantanes) > INSTANTANES_MAX:
+                self._instantanes.popitem(last=False)
+        return instantane
+
+    def noms(self) -> list[str]:
+        with self._verrou:
+            return list(self._instantanes)
+
+    def sites(self, nom: str | None = None, *, limite: int = 20) -> list[dict[str, Any]]:
+        """Principaux sites d'allocation d'un instantané, ou de l'état courant sans le conserver."""
+
+        instantane = self._instantane(nom) if nom else self._capturer()
+        return [
+            {
+                "site": _site(statistique.traceback),
+                "taille_octets": statistique.size,
+                "blocs": statistique.count,
+            }
+            for statistique in instantane.statistics("lineno")[:limite]
+        ]
+
+    def comparer(self, avant: str, apres: str, *, limite: int = 20) -> list[dict[str, Any]]:
+        differences = self._instantane(apres).compare_to(self._instantane(avant), "lineno")
+        return [
+            {
+                "site": _site(difference.traceback),
+                "taille_octets": difference.size,
+                "variation_octets": difference.size_diff,
+                "blocs": difference.count,
+                "variation_blocs": difference.count_diff,
+            }
+            for difference in differences[:limite]
+        ]
+
+    def _capturer(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise ValueError("tracemalloc n'est pas actif.")
+        return tracemalloc.take_snapshot().filter_traces(_FILTRES_TRACEMALLOC)
+
+    def _instantane(self, nom: str) -> tracemalloc.Snapshot:
+        with self._verrou:
+            instantane = self._instantanes.get(nom)
+        if instantane is None:
+            raise FileNotFoundError(f"Instantané introuvable: {nom}")
+        return instantane
+
+
+def _site(trace: tracemalloc.Traceback) -> str:
+    cadre = trace[0]
+    return f"{cadre.filename}:{cadre.lineno}"
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from typing import Any, Mapping
 
@@ -24,17 +24,57 @@ class RenderJob:
     asset: RenderAsset | None = None
     cree_le: str = field(default_factory=lambda: datetime.utcnow().isoformat())
     termine_le: str | None = None
+    priorite: str = "normal"
+    proprietaire: str = "defaut"
+    demarre_le: str | None = None
+    erreur: str | None = None
+    # Bail du rendu en cours, rafraîchi tant que le processus qui l'exécute est vivant.
+    battement_le: str | None = None
+    tentatives: int = 0
+    # Échéance demandée à la soumission (UTC), conservée pour la reprise.
+    echeance: str | None = None
+
+    def demarrer(self) -> "RenderJob":
+        maintenant = datetime.utcnow().isoformat()
+        return replace(
+            self,
+            statut="en_cours",
+            demarre_le=maintenant,
+            battement_le=maintenant,
+            tentatives=self.tentatives + 1,
+        )
+
+    def reprendre(self) -> "RenderJob":
+        return replace(self, statut="en_attente", demarre_le=None, battement_le=None)
 
     def terminer(self, asset: RenderAsset) -> "RenderJob":
-        return RenderJob(
-            identifiant=self.identifiant,
-            type_rendu=self.type_rendu,
-            scene=self.scene,
-            prompt=self.prompt,
-            configuration=self.configuration,
-            modele=self.modele,
+        return replace(
+            self,
             statut="termine",
             asset=asset,
-            cree_le=self.cree_le,
+            termine_le=datetime.utcnow().isoformat(),
+        )
+
+    def echouer(self, erreur: str) -> "RenderJob":
+        return replace(
+            self,
+            statut="echec",
+            erreur=erreur,
+            termine_le=datetime.utcnow().isoformat(),
+        )
+
+    def annuler(self, motif: str) -> "RenderJob":
+        return replace(
+            self,
+            statut="annule",
+            erreur=motif,
+            termine_le=datetime.utcnow().isoformat(),
+        )
+
+    def expirer(self, motif: str) -> "RenderJob":
+        return replace(
+            self,
+            statut="expire",
+            erreur=motif,
             termine_le=datetime.utcnow().isoformat(),
         )
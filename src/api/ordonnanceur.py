@@ -0,0 +1,409 @@
+"""Ordonnancement des rendus devant l'orchestrateur de génération.
+
+Les rendus sont exécutés par un nombre fixe de threads dédiés. L'ordre de
+service combine :
+
+- une priorité stricte entre classes (``interactif`` avant ``normal`` avant
+  ``lot``) ;
+- un partage équitable pondéré entre propriétaires à l'intérieur d'une classe
+  (file équitable à horloge virtuelle : chaque tâche reçoit une date de fin
+  virtuelle ``debut + cout / poids``, et la plus petite est servie) ;
+- un vieillissement : une tâche qui attend depuis ``vieillissement_secondes``
+  monte d'une classe, ce qui évite la famine des travaux de fond.
+
+En mode ``court_dabord``, le partage équitable est remplacé à l'intérieur
+d'une classe par « la plus courte durée attendue d'abord » (coût divisé par le
+poids du propriétaire), ce qui réduit la latence moyenne. Pour que les tâches
+longues ne soient pas repoussées indéfiniment, une tâche qui a attendu
+``vieillissement_secondes`` est alors servie par ancienneté, y compris dans la
+classe la plus haute.
+
+L'admission est bornée : au-delà de ``limite_file`` tâches en attente au total,
+ou de la limite de leur groupe (le modèle de génération), une soumission est
+refusée par :class:`FileSaturee`, qui indique quand réessayer d'après le débit
+récent du groupe refusé (ou de toute la file pour la limite globale). La file
+ne peut donc pas croître sans limite lors d'un pic.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future
+import math
+from dataclasses import dataclass, field
+import itertools
+import threading
+import time
+from typing import Any, Callable, Mapping
+
+PRIORITES = ("interactif", "normal", "lot")
+MODES = ("equitable", "court_dabord")
+# Poids de la dernière observation dans la moyenne mobile exponentielle du débit.
+LISSAGE_DEBIT = 0.2
+
+
+class FileSaturee(Exception):
+    """La file a atteint sa profondeur maximale ; réessayer après ``reessayer_dans`` secondes."""
+
+    def __init__(self, message: str, reessayer_dans: int) -> None:
+        super().__init__(message)
+        self.reessayer_dans = reessayer_dans
+
+
+@dataclass
+class _Tache:
+    identifiant: str
+    classe: int
+    proprietaire: str
+    groupe: str
+    cout: float
+    executer: Callable[[], Any]
+    soumise_le: float
+    sequence: int
+    fin_virtuelle: float = 0.0
+    duree_estimee: float | None = None
+    demarree_le: float | None = None
+    future: Future = field(default_factory=Future)
+
+
+@dataclass
+class _Debit:
+    """Intervalle lissé entre deux fins de tâche, périodes d'inactivité exclues."""
+
+    intervalle: float | None = None
+    derniere_fin: float = 0.0
+
+    def observer(self, debut: float, fin: float) -> None:
+        # Sans tâche terminée depuis son démarrage, l'intervalle part du démarrage.
+        ecart = fin - max(self.derniere_fin, debut)
+        self.derniere_fin = fin
+        if self.intervalle is None:
+            self.intervalle = ecart
+        else:
+            self.intervalle = LISSAGE_DEBIT * ecart + (1 - LISSAGE_DEBIT) * self.intervalle
+
+    @property
+    def par_seconde(self) -> float | None:
+        if not self.intervalle:
+            return None
+        return 1 / self.intervalle
+
+
+class OrdonnanceurRendus:
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        poids: Mapping[str, float] | None = None,
+        vieillissement_secondes: float = 60.0,
+        mode: str = "equitable",
+        limite_file: int | None = None,
+        limites_groupes: Mapping[str, int] | None = None,
+        nom: str = "seidra-rendu",
+    ) -> None:
+        """``limites_groupes`` associe un groupe à sa profondeur maximale ; ``"*"`` vaut pour les autres."""
+
+        if workers <= 0:
+            raise ValueError("workers doit être un entier positif.")
+        if vieillissement_secondes <= 0:
+            raise ValueError("vieillissement_secondes doit être strictement positif.")
+        if mode not in MODES:
+            raise ValueError(f"Mode d'ordonnancement inconnu: {mode}. Valeurs: {', '.join(MODES)}")
+        self.workers = workers
+        self.poids = dict(poids or {})
+        self.vieillissement_secondes = vieillissement_secondes
+        self.mode = mode
+        self.limite_file = limite_file
+        self.limites_groupes = dict(limites_groupes or {})
+        self.nom = nom
+        self._condition = threading.Condition()
+        # (classe, propriétaire) -> tâches en attente, dans l'ordre de soumission.
+        self._files: dict[tuple[int, str], deque[_Tache]] = {}
+        self._derniere_fin: dict[tuple[int, str], float] = {}
+        self._temps_virtuel = [0.0] * len(PRIORITES)
+        self._en_attente: dict[str, _Tache] = {}
+        self._en_cours: dict[str, _Tache] = {}
+        self._sequence = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._servies = 0
+        self._attente_cumulee = 0.0
+        self._execution_cumulee = 0.0
+        self._par_groupe: dict[str, int] = {}
+        self._rejets: dict[str, int] = {}
+        self._debit = _Debit()
+        self._debits_groupes: dict[str, _Debit] = {}
+
+    def soumettre(
+        self,
+        identifiant: str,
+        executer: Callable[[], Any],
+        *,
+        priorite: str = "normal",
+        proprietaire: str = "defaut",
+        groupe: str = "defaut",
+        cout: float = 1.0,
+        duree_estimee: float | None = None,
+    ) -> Future:
+        """Place une tâche en file ; le résultat de ``executer`` est livré par le Future.
+
+        ``duree_estimee`` (en secondes) sert aux prévisions de démarrage ; à
+        défaut, la durée moyenne des tâches déjà exécutées est utilisée.
+        Lève :class:`FileSaturee` si la file ou le groupe est plein.
+        """
+
+        if priorite not in PRIORITES:
+            raise ValueError(f"Priorité inconnue: {priorite}. Valeurs: {', '.join(PRIORITES)}")
+        classe = PRIORITES.index(priorite)
+        with self._condition:
+            self._admettre(groupe)
+            self._demarrer()
+            cle = (classe, proprietaire)
+            debut = max(self._temps_virtuel[classe], self._derniere_fin.get(cle, 0.0))
+            tache = _Tache(
+                identifiant=identifiant,
+                classe=classe,
+                proprietaire=proprietaire,
+                groupe=groupe,
+                cout=cout,
+                executer=executer,
+                soumise_le=time.monotonic(),
+                sequence=next(self._sequence),
+                fin_virtuelle=debut + max(cout, 0.0) / self.poids.get(proprietaire, 1.0),
+                duree_estimee=duree_estimee,
+            )
+            self._derniere_fin[cle] = tache.fin_virtuelle
+            self._files.setdefault(cle, deque()).append(tache)
+            self._en_attente[identifiant] = tache
+            self._par_groupe[groupe] = self._par_groupe.get(groupe, 0) + 1
+            self._condition.notify()
+        return tache.future
+
+    def verifier_admission(self, groupe: str = "defaut") -> None:
+        """Lève :class:`FileSaturee` si une soumission pour ``groupe`` serait refusée.
+
+        Permet de refuser une demande avant tout travail de préparation ; la
+        vérification est refaite par :meth:`soumettre`.
+        """
+
+        with self._condition:
+            self._admettre(groupe)
+
+    def annuler(self, identifiant: str) -> bool:
+        """Retire une tâche encore en attente ; sans effet sur une tâche démarrée."""
+
+        with self._condition:
+            tache = self._en_attente.pop(identifiant, None)
+            if tache is None:
+                return False
+            cle = (tache.classe, tache.proprietaire)
+            self._files[cle].remove(tache)
+            if not self._files[cle]:
+                del self._files[cle]
+            self._retirer_du_groupe(tache)
+        tache.future.cancel()
+        return True
+
+    def position(self, identifiant: str) -> dict[str, Any] | None:
+        """Position courante d'une tâche (1 = prochaine servie), attente et prévisions.
+
+        Les prévisions supposent que l'ordre actuel est conservé : une tâche
+        plus prioritaire soumise ensuite peut les repousser.
+        """
+
+        with self._condition:
+            maintenant = time.monotonic()
+            tache = self._en_cours.get(identifiant)
+            if tache is not None:
+                duree = self._duree(tache)
+                return {
+                    "etat": "en_cours",
+                    "position": 0,
+                    "attente_secondes": tache.demarree_le - tache.soumise_le,
+                    "priorite_effective": PRIORITES[tache.classe],
+                    "duree_estimee_secondes": duree,
+                    "debut_estime_dans_secondes": 0.0,
+                    "fin_estimee_dans_secondes": self._restant(tache, maintenant),
+                }
+            tache = self._en_attente.get(identifiant)
+            if tache is None:
+                return None
+            cle = self._cle(tache, maintenant)
+            devant = [autre for autre in self._en_attente.values() if self._cle(autre, maintenant) < cle]
+            duree = self._duree(tache)
+            debut = self._debut_estime(devant, maintenant)
+            return {
+                "etat": "en_attente",
+                "position": len(devant) + 1,
+                "attente_secondes": maintenant - tache.soumise_le,
+                "priorite_effective": PRIORITES[cle[0]],
+                "duree_estimee_secondes": duree,
+                "debut_estime_dans_secondes": debut,
+                "fin_estimee_dans_secondes": None if debut is None or duree is None else debut + duree,
+            }
+
+    def etat(self) -> dict[str, Any]:
+        with self._condition:
+            par_priorite = {nom: 0 for nom in PRIORITES}
+            par_proprietaire: dict[str, int] = {}
+            for tache in self._en_attente.values():
+                par_priorite[PRIORITES[tache.classe]] += 1
+                par_proprietaire[tache.proprietaire] = par_proprietaire.get(tache.proprietaire, 0) + 1
+            return {
+                "workers": self.workers,
+                "mode": self.mode,
+                "en_cours": len(self._en_cours),
+                "en_attente": len(self._en_attente),
+                "en_attente_par_priorite": par_priorite,
+                "en_attente_par_proprietaire": par_proprietaire,
+                "servies": self._servies,
+                "attente_moyenne_secondes": (
+                    self._attente_cumulee / self._servies if self._servies else None
+                ),
+                "execution_moyenne_secondes": self._execution_moyenne(),
+                "limite_file": self.limite_file,
+                "limites_groupes": dict(self.limites_groupes),
+                "en_attente_par_groupe": dict(self._par_groupe),
+                "rejets": sum(self._rejets.values()),
+                "rejets_par_groupe": dict(self._rejets),
+                "debit_par_seconde": self._debit.par_seconde,
+                "debit_par_groupe": {
+                    groupe: debit.par_seconde for groupe, debit in self._debits_groupes.items()
+                },
+            }
+
+    def _admettre(self, groupe: str) -> None:
+        limite_groupe = self.limites_groupes.get(groupe, self.limites_groupes.get("*"))
+        profondeur = self._par_groupe.get(groupe, 0)
+        if limite_groupe is not None and profondeur >= limite_groupe:
+            excedent = profondeur - limite_groupe + 1
+            message = f"File du modèle '{groupe}' pleine ({limite_groupe} rendus en attente)"
+            debit = self._debits_groupes.get(groupe)
+        elif self.limite_file is not None and len(self._en_attente) >= self.limite_file:
+            excedent = len(self._en_attente) - self.limite_file + 1
+            message = f"File des rendus pleine ({self.limite_file} rendus en attente)"
+            debit = self._debit
+        else:
+            return
+        self._rejets[groupe] = self._rejets.get(groupe, 0) + 1
+        raise FileSaturee(message, self._delai_liberation(excedent, debit))
+
+    def _delai_liberation(self, excedent: int, debit: _Debit | None) -> int:
+        # Temps pour que ``excedent`` places se libèrent au débit récent, arrondi
+        # à la seconde supérieure ; un groupe jamais servi prend le débit global.
+        par_seconde = (debit.par_seconde if debit else None) or self._debit.par_seconde
+        if par_seconde is None:
+            return 1
+        return max(1, math.ceil(excedent / par_seconde))
+
+    def _retirer_du_groupe(self, tache: _Tache) -> None:
+        restant = self._par_groupe[tache.groupe] - 1
+        if restant:
+            self._par_groupe[tache.groupe] = restant
+        else:
+            del self._par_groupe[tache.groupe]
+
+    def _execution_moyenne(self) -> float | None:
+        return self._execution_cumulee / self._servies if self._servies else None
+
+    def _duree(self, tache: _Tache) -> float | None:
+        return tache.duree_estimee if tache.duree_estimee is not None else self._execution_moyenne()
+
+    def _restant(self, tache: _Tache, maintenant: float) -> float | None:
+        duree = self._duree(tache)
+        if duree is None:
+            return None
+        return max(duree - (maintenant - tache.demarree_le), 0.0)
+
+    def _debut_estime(self, devant: list[_Tache], maintenant: float) -> float | None:
+        # Approximation : le travail restant se répartit uniformément sur les workers.
+        restants = [self._restant(tache, maintenant) for tache in self._en_cours.values()]
+        restants.extend(self._duree(tache) for tache in devant)
+        if None in restants:
+            return None
+        libres = max(self.workers - len(self._en_cours), 0)
+        if libres and len(devant) < libres:
+            return 0.0
+        return sum(restants) / self.workers
+
+    def _cle(self, tache: _Tache, maintenant: float) -> tuple[int, int, float, int]:
+        promotions = int((maintenant - tache.soumise_le) // self.vieillissement_secondes)
+        classe = max(0, tache.classe - promotions)
+        if classe < tache.classe or (promotions and self.mode == "court_dabord"):
+            # Les tâches promues passent avant la classe qui les accueille,
+            # par ancienneté : leurs dates virtuelles relèvent d'une autre horloge.
+            return (classe, 0, tache.soumise_le, tache.sequence)
+        if self.mode == "court_dabord":
+            return (classe, 1, tache.cout / self.poids.get(tache.proprietaire, 1.0), tache.sequence)
+        return (classe, 1, tache.fin_virtuelle, tache.sequence)
+
+    def _choisir(self) -> _Tache | None:
+        maintenant = time.monotonic()
+        if self.mode == "court_dabord":
+            candidates = self._en_attente.values()
+        else:
+            # Les dates virtuelles croissent dans chaque file : seule la tête compte.
+            candidates = (file[0] for file in self._files.values())
+        meilleure: _Tache | None = None
+        meilleure_cle = None
+        for candidate in candidates:
+            cle = self._cle(candidate, maintenant)
+            if meilleure_cle is None or cle < meilleure_cle:
+                meilleure, meilleure_cle = candidate, cle
+        if meilleure is None:
+            return None
+        cle_file = (meilleure.classe, meilleure.proprietaire)
+        if self._files[cle_file][0] is meilleure:
+            self._files[cle_file].popleft()
+        else:
+            self._files[cle_file].remove(meilleure)
+        if not self._files[cle_file]:
+            del self._files[cle_file]
+            if self._derniere_fin.get(cle_file, 0.0) <= meilleure.fin_virtuelle:
+                del self._derniere_fin[cle_file]
+        self._temps_virtuel[meilleure.classe] = max(
+            self._temps_virtuel[meilleure.classe],
+            meilleure.fin_virtuelle,
+        )
+        del self._en_attente[meilleure.identifiant]
+        self._retirer_du_groupe(meilleure)
+        return meilleure
+
+    def _demarrer(self) -> None:
+        if self._threads:
+            return
+        for numero in range(self.workers):
+            thread = threading.Thread(
+                target=self._boucle,
+                name=f"{self.nom}-{numero}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _boucle(self) -> None:
+        while True:
+            with self._condition:
+                tache = self._choisir()
+                while tache is None:
+                    self._condition.wait()
+                    tache = self._choisir()
+                tache.demarree_le = time.monotonic()
+                self._en_cours[tache.identifiant] = tache
+            execution_debut = time.monotonic()
+            try:
+                if tache.future.set_running_or_notify_cancel():
+                    try:
+                        resultat = tache.executer()
+                    except BaseException as exc:
+                        tache.future.set_exception(exc)
+                    else:
+                        tache.future.set_result(resultat)
+            finally:
+                with self._condition:
+                    self._en_cours.pop(tache.identifiant, None)
+                    self._servies += 1
+                    self._attente_cumulee += tache.demarree_le - tache.soumise_le
+                    fin = time.monotonic()
+                    self._execution_cumulee += fin - execution_debut
+                    self._debit.observer(execution_debut, fin)
+                    self._debits_groupes.setdefault(tache.groupe, _Debit()).observer(execution_debut, fin)
@@ -0,0 +1,271 @@
+"""Profilage CPU par échantillonnage des requêtes en production.
+
+Le profileur n'instrumente pas le code : un thread d'échantillonnage relève à
+intervalle régulier la pile des threads qui exécutent une requête sélectionnée
+(fraction aléatoire ou motif de route) et agrège les piles repliées par fenêtre
+de temps. Le résultat est exporté au format « collapsed stack » attendu par les
+outils de flamegraph (``flamegraph.pl``, speedscope, ...).
+
+Toute la requête est couverte, lecture et validation des paramètres et
+sérialisation de la réponse comprises. Sur la boucle d'événements, une pile
+n'est attribuée à la requête que si sa tâche est celle qui s'exécute : les
+autres coroutines qui partagent le thread ne lui sont pas comptées. Le travail
+confié à un pool de threads est suivi tant que le thread l'exécute.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from fnmatch import fnmatchcase
+import asyncio
+import functools
+import inspect
+import random
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+PROFONDEUR_MAX_PILE = 128
+_FONCTIONS_RACINE = frozenset({"_traiter_requete_profilee", "_appeler_profile"})
+# Route de la requête profilée en cours, propagée aux threads des pools.
+_route_profilee: ContextVar[str | None] = ContextVar("route_profilee", default=None)
+
+
+@dataclass(frozen=True)
+class ConfigurationProfilage:
+    """Réglages du profileur ; inactif par défaut."""
+
+    actif: bool = False
+    taux: float = 0.0
+    routes: tuple[str, ...] = ()
+    intervalle_secondes: float = 0.005
+    fenetre_secondes: float = 60.0
+
+    def __post_init__(self) -> None:
+        if not 0.0 <= self.taux <= 1.0:
+            raise ValueError("taux doit être compris entre 0 et 1.")
+        if self.intervalle_secondes <= 0:
+            raise ValueError("intervalle_secondes doit être strictement positif.")
+        if self.fenetre_secondes <= 0:
+            raise ValueError("fenetre_secondes doit être strictement positif.")
+
+
+@dataclass
+class _Fenetre:
+    debut: float
+    fin: float | None = None
+    echantillons: Counter[str] = field(default_factory=Counter)
+
+
+class ProfileurEchantillonnage:
+    """Échantillonne les piles des threads et des tâches enregistrés via :meth:`suivre`."""
+
+    def __init__(self) -> None:
+        self.configuration = ConfigurationProfilage()
+        self._verrou = threading.Lock()
+        self._threads: dict[int, str] = {}
+        self._taches: dict[asyncio.Task[Any], tuple[str, int, asyncio.AbstractEventLoop]] = {}
+        self._fenetre = _Fenetre(debut=time.time())
+        self._fenetre_precedente: _Fenetre | None = None
+        self._requetes_profilees = 0
+        self._arret = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def configurer(self, configuration: ConfigurationProfilage) -> None:
+        """Applique une configuration et démarre ou arrête l'échantillonnage."""
+
+        with self._verrou:
+            self.configuration = configuration
+        if configuration.actif:
+            self._demarrer()
+        else:
+            self._arreter()
+
+    def doit_profiler(self, route: str) -> bool:
+        configuration = self.configuration
+        if not configuration.actif:
+            return False
+        if any(fnmatchcase(route, motif) for motif in configuration.routes):
+            return True
+        return configuration.taux > 0 and random.random() < configuration.taux
+
+    @contextmanager
+    def suivre(self, route: str, *, requete: bool = True) -> Iterator[None]:
+        """Enregistre la tâche asyncio courante, ou à défaut le thread courant.
+
+        ``requete`` compte une nouvelle requête profilée ; il vaut ``False``
+        pour le travail qu'une requête déjà comptée confie à un thread.
+        """
+
+        ident = threading.get_ident()
+        tache = _tache_courante()
+        with self._verrou:
+            if tache is None:
+                self._threads[ident] = route
+            else:
+                self._taches[tache] = (route, ident, tache.get_loop())
+            if requete:
+                self._requetes_profilees += 1
+        try:
+            yield
+        finally:
+            with self._verrou:
+                if tache is None:
+                    self._threads.pop(ident, None)
+                else:
+                    self._taches.pop(tache, None)
+
+    def piles_repliees(self, *, inclure_precedente: bool = True) -> str:
+        """Retourne les piles agrégées, une ligne ``cadre;cadre;... compte`` par pile."""
+
+        with self._verrou:
+            total = Counter(self._fenetre.echantillons)
+            if inclure_precedente and self._fenetre_precedente is not None:
+                total.update(self._fenetre_precedente.echantillons)
+        return "".join(f"{pile} {compte}\n" for pile, compte in total.most_common())
+
+    def reinitialiser(self) -> None:
+        with self._verrou:
+            self._fenetre = _Fenetre(debut=time.time())
+            self._fenetre_precedente = None
+            self._requetes_profilees = 0
+
+    def etat(self) -> dict[str, Any]:
+        with self._verrou:
+            precedente = self._fenetre_precedente
+            return {
+                "configuration": asdict(self.configuration),
+                "echantillonnage_actif": self._thread is not None and self._thread.is_alive(),
+                "requetes_profilees": self._requetes_profilees,
+                "requetes_en_cours": len(self._taches),
+                "fenetre": _resumer_fenetre(self._fenetre),
+                "fenetre_precedente": _resumer_fenetre(precedente) if precedente else None,
+            }
+
+    def _demarrer(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._arret.clear()
+        self._thread = threading.Thread(
+            target=self._boucle,
+            name="seidra-profileur",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _arreter(self) -> None:
+        self._arret.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+
+    def _boucle(self) -> None:
+        ident_echantillonneur = threading.get_ident()
+        while not self._arret.wait(self.configuration.intervalle_secondes):
+            cadres = sys._current_frames()
+            maintenant = time.time()
+            with self._verrou:
+                if maintenant - self._fenetre.debut >= self.configuration.fenetre_secondes:
+                    self._fenetre.fin = maintenant
+                    self._fenetre_precedente = self._fenetre
+                    self._fenetre = _Fenetre(debut=maintenant)
+                suivis = list(self._threads.items())
+                for tache, (route, ident, boucle) in self._taches.items():
+                    # Le thread de la boucle n'exécute la requête que si sa tâche est active.
+                    if asyncio.current_task(boucle) is tache:
+                        suivis.append((ident, route))
+                for ident, route in suivis:
+                    cadre = cadres.get(ident)
+                    if cadre is None or ident == ident_echantillonneur:
+                        continue
+                    self._fenetre.echantillons[_replier_pile(cadre, route)] += 1
+            del cadres
+
+
+def _resumer_fenetre(fenetre: _Fenetre) -> dict[str, Any]:
+    return {
+        "debut": fenetre.debut,
+        "fin": fenetre.fin,
+        "echantillons": sum(fenetre.echantillons.values()),
+        "piles_distinctes": len(fenetre.echantillons),
+    }
+
+
+def _tache_courante() -> asyncio.Task[Any] | None:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+def _replier_pile(cadre: Any, route: str) -> str:
+    noms = []
+    while cadre is not None and len(noms) < PROFONDEUR_MAX_PILE:
+        code = cadre.f_code
+        module = cadre.f_globals.get("__name__", "?")
+        if module == __name__ and code.co_name in _FONCTIONS_RACINE:
+            break
+        noms.append(f"{module}:{getattr(code, 'co_qualname', code.co_name)}")
+        cadre = cadre.f_back
+    noms.append(route)
+    return ";".join(reversed(noms))
+
+
+profileur = ProfileurEchantillonnage()
+
+
+def envelopper_gestionnaire(
+    gestionnaire: Callable[[Request], Any], route: str
+) -> Callable[[Request], Any]:
+    """Enveloppe le traitement complet d'une requête pour qu'il puisse être profilé."""
+
+    @functools.wraps(gestionnaire)
+    async def _traiter_requete_profilee(request: Request) -> Response:
+        if not profileur.doit_profiler(route):
+            return await gestionnaire(request)
+        jeton = _route_profilee.set(route)
+        try:
+            with profileur.suivre(route):
+                return await gestionnaire(request)
+        finally:
+            _route_profilee.reset(jeton)
+
+    return _traiter_requete_profilee
+
+
+def profiler_dans_le_thread(fonction: Callable[..., Any]) -> Callable[..., Any]:
+    """Enveloppe une fonction confiée à un pool de threads.
+
+    Si la requête qui l'y envoie est profilée, le thread est suivi le temps de
+    l'appel ; sinon la fonction est appelée telle quelle.
+    """
+
+    if inspect.iscoroutinefunction(fonction):
+        return fonction
+
+    @functools.wraps(fonction)
+    def _appeler_profile(*args: Any, **kwargs: Any) -> Any:
+        route = _route_profilee.get()
+        if route is None:
+            return fonction(*args, **kwargs)
+        with profileur.suivre(route, requete=False):
+            return fonction(*args, **kwargs)
+
+    return _appeler_profile
+
+
+class RouteProfilee(APIRoute):
+    """Route FastAPI dont le traitement complet est éligible au profilage."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, profiler_dans_le_thread(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        return envelopper_gestionnaire(super().get_route_handler(), self.path)
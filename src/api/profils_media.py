@@ -0,0 +1,65 @@
+"""Résolution des personnages stockés en profils de génération de médias."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from ..characters.models import CharacterProfile, CharacterTraits
+from ..characters.storage import CharacterRepository
+from ..media_generation.models import CharacterProfile as MediaCharacterProfile
+
+
+def profil_media(
+    identifiant: str,
+    profil: CharacterProfile,
+    traits: CharacterTraits,
+) -> MediaCharacterProfile:
+    metadata = dict(profil.metadonnees)
+    if profil.voix_narrative:
+        metadata["voix_narrative"] = profil.voix_narrative
+    if traits.tags:
+        metadata["tags"] = list(traits.tags)
+    return MediaCharacterProfile(
+        identifier=identifiant,
+        name=profil.nom,
+        description=profil.description,
+        traits=tuple(traits.traits),
+        metadata=metadata,
+    )
+
+
+class CacheProfilsMedia:
+    """Mémorise la conversion de chaque personnage tant que son profil et ses traits ne changent pas.
+
+    L'entrée est associée à la révision de profil du dépôt, que seule une
+    réécriture de la fiche fait évoluer : l'historique ou l'état d'un personnage
+    peut changer sans invalider son profil de rendu, alors qu'une modification
+    de sa fiche est prise en compte dès le rendu suivant. Une entrée valide se
+    lit sans toucher au stockage ; l'historique n'est jamais lu.
+    """
+
+    def __init__(self, depot: CharacterRepository) -> None:
+        self.depot = depot
+        self._profils: dict[str, tuple[int, MediaCharacterProfile]] = {}
+
+    def resoudre(self, identifiants: Iterable[str]) -> list[MediaCharacterProfile]:
+        """Retourne les profils dans l'ordre demandé ; lève FileNotFoundError si absent."""
+
+        return [self._resoudre(identifiant) for identifiant in identifiants]
+
+    def structures_memoire(self) -> dict[str, object]:
+        return {"profils": self._profils}
+
+    def _resoudre(self, identifiant: str) -> MediaCharacterProfile:
+        try:
+            revision = self.depot.revision_profil(identifiant)
+        except FileNotFoundError:
+            self._profils.pop(identifiant, None)
+            raise
+        entree = self._profils.get(identifiant)
+        if entree is not None and entree[0] == revision:
+            return entree[1]
+        revision, profil, traits = self.depot.lire_profil(identifiant)
+        converti = profil_media(identifiant, profil, traits)
+        self._profils[identifiant] = (revision, converti)
+        return converti
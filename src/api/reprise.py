@@ -0,0 +1,44 @@
+"""Repérage des rendus abandonnés par un processus arrêté.
+
+Tant qu'un rendu s'exécute, le processus qui l'exécute rafraîchit son bail
+(``battement_le``). Un rendu ``en_cours`` dont le bail a expiré et que le
+processus courant n'exécute pas est orphelin : son exécutant s'est arrêté sans
+consigner d'issue. Au démarrage, les rendus ``en_attente`` sont orphelins eux
+aussi, puisque la file des rendus ne survit pas au processus.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Container, Iterable
+
+from .models import RenderJob
+
+
+def bail_expire(rendu: RenderJob, bail_secondes: float, maintenant: datetime | None = None) -> bool:
+    """Vrai si le rendu n'a donné aucun signe de vie depuis ``bail_secondes``."""
+
+    repere = rendu.battement_le or rendu.demarre_le or rendu.cree_le
+    maintenant = maintenant or datetime.utcnow()
+    return datetime.fromisoformat(repere) + timedelta(seconds=bail_secondes) <= maintenant
+
+
+def rendus_orphelins(
+    rendus: Iterable[RenderJob],
+    *,
+    actifs: Container[str],
+    bail_secondes: float,
+    demarrage: bool = False,
+    maintenant: datetime | None = None,
+) -> list[RenderJob]:
+    """Rendus à reprendre ou à déclarer en échec, hors ceux que ce processus suit (``actifs``)."""
+
+    orphelins = []
+    for rendu in rendus:
+        if rendu.identifiant in actifs:
+            continue
+        if rendu.statut == "en_cours" and bail_expire(rendu, bail_secondes, maintenant):
+            orphelins.append(rendu)
+        elif rendu.statut == "en_attente" and demarrage:
+            orphelins.append(rendu)
+    return orphelins
@@ -4,23 +4,49 @@ import json
 from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator, Sequence
 from uuid import uuid4
 
+from ..persistence import (
+    CREATION,
+    MISE_A_JOUR,
+    CacheJson,
+    CompteurRevisions,
+    JournalChangements,
+    VerrouLectureEcriture,
+    ecrire_atomiquement,
+)
 from .models import RenderAsset, RenderJob
 
+# Statuts d'un rendu qui n'a pas encore d'issue.
+STATUTS_ACTIFS = ("en_attente", "en_cours")
+
+
+class RenduActif(ValueError):
+    """Le rendu n'a pas encore d'issue : il doit être annulé avant d'être supprimé."""
+
 
 class RenderRepository:
-    def __init__(self, base_path: Path | None = None) -> None:
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        *,
+        journal: JournalChangements | None = None,
+    ) -> None:
         if base_path is None:
             base_path = Path(__file__).resolve().parents[2] / "data"
         self.store_path = _resolve_store_path(base_path, "renders.json")
         self.store_path.parent.mkdir(parents=True, exist_ok=True)
         self._cache: dict[str, dict[str, object]] = {}
+        self._json = CacheJson(_rendu_to_response_dict)
+        self._revisions = CompteurRevisions(journal, "renders")
+        self._verrou = VerrouLectureEcriture()
         self._charger()
 
     def creer(self, *, type_rendu: str, scene: dict[str, object], prompt: dict[str, object],
-              configuration: dict[str, object], modele: str) -> RenderJob:
+              configuration: dict[str, object], modele: str, statut: str = "en_cours",
+              priorite: str = "normal", proprietaire: str = "defaut",
+              echeance: str | None = None) -> RenderJob:
         identifiant = str(uuid4())
         rendu = RenderJob(
             identifiant=identifiant,
@@ -29,39 +55,177 @@ class RenderRepository:
             prompt=prompt,
             configuration=configuration,
             modele=modele,
-            statut="en_cours",
+            statut=statut,
+            priorite=priorite,
+            proprietaire=proprietaire,
+            echeance=echeance,
         )
-        self._enregistrer(rendu)
+        with self._verrou.ecriture():
+            self._enregistrer(rendu)
         return rendu
 
     def mettre_a_jour(self, rendu: RenderJob) -> RenderJob:
-        if rendu.identifiant not in self._cache:
-            raise FileNotFoundError(f"Rendu introuvable: {rendu.identifiant}")
-        self._enregistrer(rendu)
+        with self._verrou.ecriture():
+            if rendu.identifiant not in self._cache:
+                raise FileNotFoundError(f"Rendu introuvable: {rendu.identifiant}")
+            self._enregistrer(rendu)
+        return rendu
+
+    def modifier(self, identifiant: str, transformation: Callable[[RenderJob], RenderJob]) -> RenderJob:
+        """Lit, transforme et enregistre un rendu sans mutation concurrente intercalée.
+
+        Rien n'est écrit si la transformation retourne le rendu tel quel.
+        """
+
+        with self._verrou.ecriture():
+            courant = self.lire(identifiant)
+            rendu = transformation(courant)
+            if rendu is not courant:
+                self._enregistrer(rendu)
         return rendu
 
+    def renouveler_baux(self, identifiants: Iterable[str]) -> int:
+        """Rafraîchit le bail des rendus en cours cités, en une seule écriture.
+
+        Le bail n'est pas publié par l'API : son renouvellement ne change ni les
+        révisions ni le journal des changements.
+        """
+
+        maintenant = datetime.utcnow().isoformat()
+        with self._verrou.ecriture():
+            renouveles = 0
+            for identifiant in identifiants:
+                payload = self._cache.get(identifiant)
+                if payload is None or payload.get("statut") != "en_cours":
+                    continue
+                self._cache[identifiant] = {**payload, "battement_le": maintenant}
+                renouveles += 1
+            if renouveles:
+                self._sauvegarder()
+        return renouveles
+
     def lire(self, identifiant: str) -> RenderJob:
-        payload = self._cache.get(identifiant)
+        with self._verrou.lecture():
+            payload = self._cache.get(identifiant)
         if payload is None:
             raise FileNotFoundError(f"Rendu introuvable: {identifiant}")
         return _rendu_from_dict(payload)
 
     def lister(self) -> Iterable[RenderJob]:
-        for payload in self._cache.values():
-            yield _rendu_from_dict(payload)
+        with self._verrou.lecture():
+            payloads = list(self._cache.values())
+        return (_rendu_from_dict(payload) for payload in payloads)
 
-    def supprimer(self, identifiant: str) -> None:
+    @property
+    def revision_collection(self) -> int:
+        return self._revisions.courante
+
+    def revision(self, identifiant: str) -> int:
         if identifiant not in self._cache:
             raise FileNotFoundError(f"Rendu introuvable: {identifiant}")
-        del self._cache[identifiant]
-        self._sauvegarder()
+        return self._revisions.revision(identifiant)
+
+    def structures_memoire(self) -> dict[str, object]:
+        """Structures tenues en mémoire, pour la comptabilité de ``/admin/memoire``.
+
+        ``enregistrements`` est le cache ``identifiant -> enregistrement``.
+        """
+
+        return {
+            "enregistrements": self._cache,
+            "json": self._json.encodes,
+        }
+
+    def lire_json(self, identifiant: str, champs: Sequence[str] | None = None) -> bytes:
+        with self._verrou.lecture():
+            payload = self._cache.get(identifiant)
+            if payload is None:
+                raise FileNotFoundError(f"Rendu introuvable: {identifiant}")
+            if champs:
+                return self._json.encoder_champs(payload, champs)
+            return self._json.encoder(identifiant, payload)
+
+    def lister_json(self, champs: Sequence[str] | None = None) -> Iterable[bytes]:
+        with self._verrou.lecture():
+            if champs:
+                return [self._json.encoder_champs(payload, champs) for payload in self._cache.values()]
+            return [self._json.encoder(identifiant, payload) for identifiant, payload in self._cache.items()]
+
+    def supprimer(self, identifiant: str, *, termine_seulement: bool = False) -> None:
+        """Supprime un rendu ; avec ``termine_seulement``, refuse un rendu encore actif."""
+
+        with self._verrou.ecriture():
+            if identifiant not in self._cache:
+                raise FileNotFoundError(f"Rendu introuvable: {identifiant}")
+            statut = self._cache[identifiant]["statut"]
+            if termine_seulement and statut in STATUTS_ACTIFS:
+                raise RenduActif(
+                    f"Rendu {identifiant} {statut} : annulez-le via /renders/{identifiant}/annulation avant de le supprimer."
+                )
+            del self._cache[identifiant]
+            self._json.invalider(identifiant)
+            self._revisions.retirer(identifiant)
+            self._sauvegarder()
+
+    def exporter(self) -> Iterator[dict[str, object]]:
+        """Parcourt un instantané des enregistrements stockés, sans les hydrater."""
+
+        with self._verrou.lecture():
+            return iter(list(self._cache.values()))
+
+    def normaliser(self, payload: dict[str, object]) -> dict[str, object]:
+        """Valide un enregistrement importé et le remet au format stocké.
+
+        Un rendu importé avant la fin de son exécution n'a plus d'exécutant :
+        il est enregistré en échec, pour que la reprise ne le relance pas.
+        """
+
+        try:
+            rendu = _rendu_from_dict(payload)
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise ValueError(f"Rendu invalide: {exc!r}") from exc
+        if rendu.statut in STATUTS_ACTIFS:
+            rendu = rendu.echouer("Rendu importé avant la fin de son exécution.")
+        return _rendu_to_dict(rendu)
+
+    def importer_lot(
+        self,
+        payloads: list[dict[str, object]],
+        *,
+        remplacer: bool,
+    ) -> dict[str, int]:
+        """Applique un lot d'enregistrements normalisés avec une seule sauvegarde."""
+
+        compteurs = {"crees": 0, "remplaces": 0, "ignores": 0}
+        with self._verrou.ecriture():
+            for payload in payloads:
+                identifiant = payload["identifiant"]
+                if identifiant in self._cache:
+                    if not remplacer:
+                        compteurs["ignores"] += 1
+                        continue
+                    compteurs["remplaces"] += 1
+                    operation = MISE_A_JOUR
+                else:
+                    compteurs["crees"] += 1
+                    operation = CREATION
+                self._cache[identifiant] = payload
+                self._json.invalider(identifiant)
+                self._revisions.incrementer(identifiant, operation)
+            if compteurs["crees"] or compteurs["remplaces"]:
+                self._sauvegarder()
+        return compteurs
 
     def _enregistrer(self, rendu: RenderJob) -> None:
         payload = _rendu_to_dict(rendu)
+        operation = MISE_A_JOUR if rendu.identifiant in self._cache else CREATION
         self._cache[rendu.identifiant] = payload
+        self._json.invalider(rendu.identifiant)
+        self._revisions.incrementer(rendu.identifiant, operation)
         self._sauvegarder()
 
     def _charger(self) -> None:
+        self._json.invalider()
         if not self.store_path.exists():
             self._cache = {}
             return
@@ -75,10 +239,7 @@ class RenderRepository:
 
     def _sauvegarder(self) -> None:
         payload = {"items": self._cache}
-        self.store_path.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        ecrire_atomiquement(self.store_path, json.dumps(payload, ensure_ascii=False, indent=2))
 
 
 def _rendu_to_dict(rendu: RenderJob) -> dict[str, object]:
@@ -99,9 +260,41 @@ def _rendu_from_dict(data: dict[str, object]) -> RenderJob:
         asset=asset,
         cree_le=data.get("cree_le", datetime.utcnow().isoformat()),
         termine_le=data.get("termine_le"),
+        priorite=data.get("priorite", "normal"),
+        proprietaire=data.get("proprietaire", "defaut"),
+        demarre_le=data.get("demarre_le"),
+        erreur=data.get("erreur"),
+        battement_le=data.get("battement_le"),
+        tentatives=data.get("tentatives", 0),
+        echeance=data.get("echeance"),
     )
 
 
+def _rendu_to_response_dict(data: dict[str, object]) -> dict[str, object]:
+    """Forme publiée par l'API (champs de ``RenderResponse``)."""
+
+    return {
+        "identifiant": data["identifiant"],
+        "type": data["type_rendu"],
+        "scene": data["scene"],
+        "prompt": data["prompt"],
+        "configuration": data["configuration"],
+        "model_name": data["modele"],
+        "statut": data.get("statut", "en_cours"),
+        "asset": data.get("asset"),
+        "cree_le": data.get("cree_le"),
+        "termine_le": data.get("termine_le"),
+        "priorite": data.get("priorite", "normal"),
+        "proprietaire": data.get("proprietaire", "defaut"),
+        "demarre_le": data.get("demarre_le"),
+        "erreur": data.get("erreur"),
+        "tentatives": data.get("tentatives", 0),
+        "echeance": data.get("echeance"),
+        # Position en file, trop volatile pour le cache : voir GET /renders/{id}/file.
+        "file": None,
+    }
+
+
 def _resolve_store_path(base_path: Path, filename: str) -> Path:
     if base_path.suffix == ".json":
         return base_path
@@ -116,6 +309,10 @@ def create_render(
     prompt: dict[str, object],
     configuration: dict[str, object],
     modele: str,
+    statut: str = "en_cours",
+    priorite: str = "normal",
+    proprietaire: str = "defaut",
+    echeance: str | None = None,
 ) -> RenderJob:
     return repository.creer(
         type_rendu=type_rendu,
@@ -123,6 +320,10 @@ def create_render(
         prompt=prompt,
         configuration=configuration,
         modele=modele,
+        statut=statut,
+        priorite=priorite,
+        proprietaire=proprietaire,
+        echeance=echeance,
     )
 
 
@@ -138,5 +339,5 @@ def update_render(repository: RenderRepository, rendu: RenderJob) -> RenderJob:
     return repository.mettre_a_jour(rendu)
 
 
-def delete_render(repository: RenderRepository, identifiant: str) -> None:
-    repository.supprimer(identifiant)
+def delete_render(repository: RenderRepository, identifiant: str, *, termine_seulement: bool = False) -> None:
+    repository.supprimer(identifiant, termine_seulement=termine_seulement)
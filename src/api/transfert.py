@@ -0,0 +1,266 @@
+"""Export et import NDJSON des jeux de données.
+
+Chaque ligne du flux est un objet ``{"collection": ..., "donnees": ...}`` où
+``donnees`` est l'enregistrement tel qu'il est stocké. L'export encode les
+enregistrements un par un ; l'import valide et applique les lignes par lots,
+avec une sauvegarde par lot, sans jamais matérialiser le flux complet.
+
+Usage en ligne de commande, depuis la racine du dépôt :
+
+    python -m src.api.transfert export --sortie jeu.ndjson
+    python -m src.api.transfert import --entree jeu.ndjson --politique remplacement
+"""
+
+from __future__ import annotations
+
+import argparse
+from functools import partial
+import json
+from pathlib import Path
+import sys
+from typing import Any, Iterable, Iterator, Literal, Mapping
+
+from ..characters.storage import CharacterRepository
+from ..persistence import encoder_json
+from ..prompts.storage import PromptRepository
+from ..scenarios.storage import ScenarioRepository
+from .storage import RenderRepository
+
+COLLECTIONS = ("characters", "prompts", "scenarios", "renders")
+TAILLE_LOT_DEFAUT = 500
+# Octets de lignes regroupés par morceau : un morceau par passage dans le pool des lots.
+OCTETS_PAR_MORCEAU = 256 * 1024
+# Longueur maximale d'une ligne importée ; au-delà, la ligne est signalée et ignorée.
+LONGUEUR_LIGNE_MAX_DEFAUT = 64 * 1024 * 1024
+ERREURS_MAX = 100
+
+Politique = Literal["fusion", "remplacement"]
+
+
+def exporter_ndjson(
+    depots: Mapping[str, Any],
+    collections: Iterable[str] = COLLECTIONS,
+) -> Iterator[bytes]:
+    """Produit le jeu de données par morceaux d'environ ``OCTETS_PAR_MORCEAU`` octets.
+
+    Un morceau ne contient que des lignes entières ; un enregistrement plus gros
+    que la limite forme un morceau à lui seul.
+    """
+
+    lignes: list[bytes] = []
+    taille = 0
+    for collection in collections:
+        for payload in depots[collection].exporter():
+            ligne = encoder_json({"collection": collection, "donnees": payload}) + b"\n"
+            lignes.append(ligne)
+            taille += len(ligne)
+            if taille >= OCTETS_PAR_MORCEAU:
+                yield b"".join(lignes)
+                lignes, taille = [], 0
+    if lignes:
+        yield b"".join(lignes)
+
+
+class ImportNdjson:
+    """Valide et applique un flux NDJSON par lots.
+
+    Avec la politique ``fusion``, les enregistrements existants sont conservés
+    en cas de collision d'identifiant ; avec ``remplacement``, ils sont écrasés.
+    En mode strict, la première ligne invalide interrompt l'import : les lots
+    déjà appliqués restent en place.
+
+    Le flux peut être fourni ligne par ligne (:meth:`ajouter_lignes`) ou en
+    morceaux d'octets quelconques (:meth:`ajouter_morceaux`) : seule la ligne
+    en cours est gardée en tampon, jusqu'à ``longueur_ligne_max`` octets.
+    """
+
+    def __init__(
+        self,
+        depots: Mapping[str, Any],
+        *,
+        politique: Politique = "fusion",
+        taille_lot: int = TAILLE_LOT_DEFAUT,
+        strict: bool = False,
+        longueur_ligne_max: int = LONGUEUR_LIGNE_MAX_DEFAUT,
+    ) -> None:
+        if politique not in ("fusion", "remplacement"):
+            raise ValueError(f"Politique d'import inconnue: {politique}")
+        if taille_lot <= 0:
+            raise ValueError("taille_lot doit être un entier positif.")
+        if longueur_ligne_max <= 0:
+            raise ValueError("longueur_ligne_max doit être un entier positif.")
+        self.depots = depots
+        self.politique = politique
+        self.taille_lot = taille_lot
+        self.strict = strict
+        self.longueur_ligne_max = longueur_ligne_max
+        self._lots: dict[str, list[dict[str, object]]] = {nom: [] for nom in depots}
+        self._numero_ligne = 0
+        self._tampon = bytearray()
+        self._ligne_trop_longue = False
+        self.rapport: dict[str, Any] = {
+            "politique": politique,
+            "lignes": 0,
+            "lots_appliques": 0,
+            "collections": {
+                nom: {"crees": 0, "remplaces": 0, "ignores": 0} for nom in depots
+            },
+            "erreurs": [],
+            "erreurs_total": 0,
+        }
+
+    def ajouter_lignes(self, lignes: Iterable[bytes | str]) -> None:
+        for ligne in lignes:
+            self.ajouter_ligne(ligne)
+
+    def ajouter_morceaux(self, morceaux: Iterable[bytes]) -> None:
+        for morceau in morceaux:
+            self.ajouter_morceau(morceau)
+
+    def ajouter_morceau(self, morceau: bytes) -> None:
+        """Découpe un morceau du flux ; la ligne incomplète qui le termine reste en tampon."""
+
+        debut = 0
+        while (fin := morceau.find(b"\n", debut)) >= 0:
+            if not self._tampon and not self._ligne_trop_longue and fin - debut <= self.longueur_ligne_max:
+                # Ligne entière dans le morceau : pas de passage par le tampon.
+                self.ajouter_ligne(morceau[debut:fin])
+            else:
+                self._completer(morceau, debut, fin)
+                self._vider_tampon()
+            debut = fin + 1
+        self._completer(morceau, debut, len(morceau))
+
+    def ajouter_ligne(self, ligne: bytes | str) -> None:
+        self._numero_ligne += 1
+        if not ligne.strip():
+            return
+        self.rapport["lignes"] += 1
+        try:
+            entree = json.loads(ligne)
+            collection = entree["collection"]
+            depot = self.depots[collection]
+            payload = depot.normaliser(entree["donnees"])
+        except (ValueError, KeyError, TypeError) as exc:
+            self._signaler(exc)
+            return
+        lot = self._lots[collection]
+        lot.append(payload)
+        if len(lot) >= self.taille_lot:
+            self._appliquer(collection)
+
+    def terminer(self) -> dict[str, Any]:
+        if self._tampon or self._ligne_trop_longue:
+            self._vider_tampon()
+        for collection in self._lots:
+            self._appliquer(collection)
+        return self.rapport
+
+    def _completer(self, morceau: bytes, debut: int, fin: int) -> None:
+        if self._ligne_trop_longue:
+            return
+        if len(self._tampon) + fin - debut > self.longueur_ligne_max:
+            self._ligne_trop_longue = True
+            self._tampon = bytearray()
+            return
+        self._tampon += morceau[debut:fin]
+
+    def _vider_tampon(self) -> None:
+        if self._ligne_trop_longue:
+            self._ligne_trop_longue = False
+            self._numero_ligne += 1
+            self.rapport["lignes"] += 1
+            self._signaler(ValueError(f"Ligne de plus de {self.longueur_ligne_max} octets."))
+            return
+        ligne, self._tampon = bytes(self._tampon), bytearray()
+        self.ajouter_ligne(ligne)
+
+    def _appliquer(self, collection: str) -> None:
+        lot = self._lots[collection]
+        if not lot:
+            return
+        compteurs = self.depots[collection].importer_lot(
+            lot,
+            remplacer=self.politique == "remplacement",
+        )
+        for cle, valeur in compteurs.items():
+            self.rapport["collections"][collection][cle] += valeur
+        self.rapport["lots_appliques"] += 1
+        self._lots[collection] = []
+
+    def _signaler(self, exc: Exception) -> None:
+        message = str(exc) if isinstance(exc, ValueError) else f"Entrée invalide: {exc!r}"
+        self.rapport["erreurs_total"] += 1
+        if len(self.rapport["erreurs"]) < ERREURS_MAX:
+            self.rapport["erreurs"].append({"ligne": self._numero_ligne, "erreur": message})
+        if self.strict:
+            raise ValueError(f"Ligne {self._numero_ligne}: {message}") from exc
+
+
+def ouvrir_depots(repertoire: Path) -> dict[str, Any]:
+    return {
+        "characters": CharacterRepository(repertoire),
+        "prompts": PromptRepository(repertoire),
+        "scenarios": ScenarioRepository(repertoire),
+        "renders": RenderRepository(repertoire),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export/import NDJSON des données SeidraLocal.")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    export = commandes.add_parser("export", help="Écrit le jeu de données au format NDJSON.")
+    export.add_argument("--sortie", type=Path, default=None, help="Fichier cible (stdout par défaut).")
+    export.add_argument("--collections", default=",".join(COLLECTIONS))
+
+    import_ = commandes.add_parser("import", help="Charge un fichier NDJSON.")
+    import_.add_argument("--entree", type=Path, default=None, help="Fichier source (stdin par défaut).")
+    import_.add_argument("--politique", choices=("fusion", "remplacement"), default="fusion")
+    import_.add_argument("--taille-lot", type=int, default=TAILLE_LOT_DEFAUT)
+    import_.add_argument("--strict", action="store_true")
+    import_.add_argument("--ligne-max", type=int, default=LONGUEUR_LIGNE_MAX_DEFAUT,
+                         help="Longueur maximale d'une ligne, en octets.")
+
+    args = parser.parse_args(argv)
+    depots = ouvrir_depots(args.data_dir)
+
+    if args.commande == "export":
+        collections = [nom.strip() for nom in args.collections.split(",") if nom.strip()]
+        inconnues = sorted(set(collections) - set(COLLECTIONS))
+        if inconnues:
+            parser.error(f"Collections inconnues: {', '.join(inconnues)}")
+        sortie = args.sortie.open("wb") if args.sortie else sys.stdout.buffer
+        try:
+            for morceau in exporter_ndjson(depots, collections):
+                sortie.write(morceau)
+        finally:
+            if args.sortie:
+                sortie.close()
+        return 0
+
+    importeur = ImportNdjson(
+        depots,
+        politique=args.politique,
+        taille_lot=args.taille_lot,
+        strict=args.strict,
+        longueur_ligne_max=args.ligne_max,
+    )
+    entree = args.entree.open("rb") if args.entree else sys.stdin.buffer
+    try:
+        importeur.ajouter_morceaux(iter(partial(entree.read, OCTETS_PAR_MORCEAU), b""))
+        rapport = importeur.terminer()
+    except ValueError as exc:
+        print(json.dumps(importeur.rapport, ensure_ascii=False, indent=2))
+        print(str(exc), file=sys.stderr)
+        return 1
+    finally:
+        if args.entree:
+            entree.close()
+    print(json.dumps(rapport, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1 @@
+"""Micro-benchmarks des dépôts de SeidraLocal."""
@@ -0,0 +1,521 @@
+"""Micro-benchmarks des opérations de dépôt selon la taille du stockage.
+
+Chaque mesure peuple un dépôt avec un jeu de données synthétique de forme
+réaliste (historiques profonds, prompts très versionnés, scénarios riches en
+actes et scènes), puis chronomètre le chargement au démarrage, ``lire``,
+``lister``, ``mettre_a_jour`` et ``creer``. La taille du stockage sur disque et
+le pic de mémoire résidente sont relevés dans un processus dédié par mesure.
+
+Usage depuis la racine du dépôt :
+
+    python -m src.benchmarks.storage --tailles 100,1000,10000
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+import json
+import multiprocessing
+from pathlib import Path
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - plateformes sans getrusage
+    resource = None
+
+from ..api.models import RenderAsset, RenderJob
+from ..api.storage import RenderRepository
+from ..characters.models import (
+    Character,
+    CharacterHistory,
+    CharacterHistoryEntry,
+    CharacterProfile,
+    CharacterState,
+    CharacterTraits,
+)
+from ..characters.storage import CharacterRepository
+from ..prompts.models import Prompt, PromptExecution, PromptVersion
+from ..prompts.storage import PromptRepository
+from ..scenarios.models import Acte, Scene, Scenario
+from ..scenarios.storage import ScenarioRepository
+
+
+@dataclass(frozen=True)
+class FormeJeuDonnees:
+    """Forme des enregistrements synthétiques générés."""
+
+    evenements_historique: int = 100
+    versions_prompt: int = 10
+    executions_prompt: int = 200
+    actes_scenario: int = 5
+    scenes_par_acte: int = 10
+    personnages_par_scene: int = 3
+
+
+@dataclass(frozen=True)
+class CibleBenchmark:
+    """Décrit comment générer et muter les enregistrements d'un dépôt."""
+
+    nom: str
+    fichier: str
+    generer: Callable[[int, FormeJeuDonnees, random.Random], Any]
+    creer: Callable[[Any, Any], Any]
+    modifier: Callable[[Any, Any, int], Any]
+
+
+@dataclass(frozen=True)
+class BackendStockage:
+    """Point d'extension pour comparer d'autres implémentations de stockage.
+
+    ``ouvrir`` construit un dépôt pour une cible à partir d'un répertoire de
+    données, ``peupler`` y écrit directement les enregistrements sérialisés.
+    """
+
+    nom: str
+    ouvrir: Callable[[str, Path], Any]
+    peupler: Callable[[CibleBenchmark, Path, dict[str, dict[str, Any]]], None]
+
+
+def _mots(rng: random.Random, nombre: int) -> str:
+    vocabulaire = (
+        "lumière", "orbite", "brume", "station", "colonie", "signal", "mémoire",
+        "tempête", "archive", "horizon", "silence", "navette", "récif", "écho",
+    )
+    return " ".join(rng.choice(vocabulaire) for _ in range(nombre))
+
+
+def _generer_personnage(index: int, forme: FormeJeuDonnees, rng: random.Random) -> Character:
+    return Character(
+        identifiant=f"personnage-{index:08d}",
+        profil=CharacterProfile(
+            nom=f"Personnage {index}",
+            description=_mots(rng, 30),
+            voix_narrative=_mots(rng, 6),
+            metadonnees={"origine": _mots(rng, 2), "age": rng.randint(16, 90)},
+        ),
+        traits=CharacterTraits(
+            traits=[_mots(rng, 1) for _ in range(6)],
+            relations=[f"personnage-{rng.randrange(index + 1):08d}" for _ in range(4)],
+            tags=[_mots(rng, 1) for _ in range(3)],
+        ),
+        historique=CharacterHistory(
+            evenements=[
+                CharacterHistoryEntry(
+                    titre=f"Événement {numero}",
+                    contenu=_mots(rng, 25),
+                    date=f"2024-01-{(numero % 28) + 1:02d}",
+                )
+                for numero in range(forme.evenements_historique)
+            ]
+        ),
+        etat=CharacterState(
+            statut="actif",
+            localisation=_mots(rng, 2),
+            etat_emotionnel=_mots(rng, 1),
+            variables={"energie": rng.randint(0, 100), "credits": rng.randint(0, 10_000)},
+        ),
+    )
+
+
+def _generer_rendu(index: int, forme: FormeJeuDonnees, rng: random.Random) -> RenderJob:
+    personnages = [
+        {
+            "identifier": f"personnage-{rng.randrange(10_000):08d}",
+            "name": _mots(rng, 1),
+            "description": _mots(rng, 20),
+            "traits": [_mots(rng, 1) for _ in range(4)],
+            "metadata": {"role": _mots(rng, 1)},
+        }
+        for _ in range(forme.personnages_par_scene)
+    ]
+    rendu = RenderJob(
+        identifiant=f"rendu-{index:08d}",
+        type_rendu="image",
+        scene={
+            "identifier": f"scene-{index}",
+            "summary": _mots(rng, 20),
+            "characters": personnages,
+            "location": _mots(rng, 2),
+            "mood": _mots(rng, 1),
+        },
+        prompt={
+            "template": "{characters} dans {scene_location}, ambiance {scene_mood}.",
+            "variables": {"eclairage": _mots(rng, 1)},
+            "version": "v1",
+        },
+        configuration={
+            "resolution": {"width": 1024, "height": 768},
+            "style": {"name": "cinématique", "description": None, "tags": ["sci-fi"]},
+            "steps": 30,
+            "guidance_scale": 7.5,
+            "seed": rng.randint(0, 2**31),
+            "output_format": "png",
+            "max_size_bytes": None,
+        },
+        modele="stub",
+        statut="en_cours",
+    )
+    return rendu.terminer(
+        RenderAsset(
+            uri=f"file:///data/artifacts/image_scene-{index}.png",
+            mime_type="image/png",
+            metadata={"mode": "stub", "format": "png", "size_bytes": rng.randint(1, 10**7)},
+        )
+    )
+
+
+def _generer_prompt(index: int, forme: FormeJeuDonnees, rng: random.Random) -> Prompt:
+    versions = [
+        PromptVersion(
+            template="{personnage} explore {lieu} : " + _mots(rng, 30),
+            variables={"personnage": _mots(rng, 1), "lieu": _mots(rng, 2)},
+            version=numero + 1,
+        )
+        for numero in range(forme.versions_prompt)
+    ]
+    executions = [
+        PromptExecution(
+            identifiant=f"execution-{index:08d}-{numero:06d}",
+            version=rng.randint(1, forme.versions_prompt),
+            contexte={"personnage": _mots(rng, 1), "humeur": _mots(rng, 1)},
+        )
+        for numero in range(forme.executions_prompt)
+    ]
+    return Prompt(
+        identifiant=f"prompt-{index:08d}",
+        nom=f"Prompt {index}",
+        versions=versions,
+        executions=executions,
+    )
+
+
+def _generer_scenario(index: int, forme: FormeJeuDonnees, rng: random.Random) -> Scenario:
+    actes = [
+        Acte(
+            identifiant=f"acte-{index:08d}-{numero_acte:03d}",
+            titre=f"Acte {numero_acte + 1}",
+            scenes=[
+                Scene(
+                    identifiant=f"scene-{index:08d}-{numero_acte:03d}-{numero_scene:04d}",
+                    titre=f"Scène {numero_scene + 1}",
+                    resume=_mots(rng, 40),
+                    personnages_ids=[
+                        f"personnage-{rng.randrange(10_000):08d}"
+                        for _ in range(forme.personnages_par_scene)
+                    ],
+                    metadonnees={"lieu": _mots(rng, 2)},
+                )
+                for numero_scene in range(forme.scenes_par_acte)
+            ],
+        )
+        for numero_acte in range(forme.actes_scenario)
+    ]
+    return Scenario(
+        identifiant=f"scenario-{index:08d}",
+        titre=f"Scénario {index}",
+        description=_mots(rng, 30),
+        actes=actes,
+    )
+
+
+def _creer_personnage(depot: CharacterRepository, modele: Character) -> Character:
+    return depot.creer(
+        modele.profil,
+        traits=modele.traits,
+        historique=modele.historique,
+        etat=modele.etat,
+    )
+
+
+def _modifier_personnage(depot: CharacterRepository, character: Character, numero: int) -> Character:
+    etat = replace(character.etat, variables={**character.etat.variables, "tour": numero})
+    return depot.mettre_a_jour(replace(character, etat=etat))
+
+
+def _creer_rendu(depot: RenderRepository, modele: RenderJob) -> RenderJob:
+    return depot.creer(
+        type_rendu=modele.type_rendu,
+        scene=modele.scene,
+        prompt=modele.prompt,
+        configuration=modele.configuration,
+        modele=modele.modele,
+    )
+
+
+def _modifier_rendu(depot: RenderRepository, rendu: RenderJob, numero: int) -> RenderJob:
+    asset = RenderAsset(
+        uri=f"file:///data/artifacts/retouche-{numero}.png",
+        mime_type="image/png",
+    )
+    return depot.mettre_a_jour(rendu.terminer(asset))
+
+
+def _creer_prompt(depot: PromptRepository, modele: Prompt) -> Prompt:
+    version = modele.derniere_version()
+    return depot.creer(modele.nom, template=version.template, variables=version.variables)
+
+
+def _modifier_prompt(depot: PromptRepository, prompt: Prompt, numero: int) -> Prompt:
+    version = prompt.derniere_version()
+    return depot.mettre_a_jour(
+        prompt.identifiant,
+        template=f"{version.template} (révision {numero})",
+        variables=version.variables,
+    )
+
+
+def _creer_scenario(depot: ScenarioRepository, modele: Scenario) -> Scenario:
+    return depot.creer(modele.titre, description=modele.description, actes=modele.actes)
+
+
+def _modifier_scenario(depot: ScenarioRepository, scenario: Scenario, numero: int) -> Scenario:
+    return depot.mettre_a_jour(replace(scenario, titre=f"{scenario.titre} (révision {numero})"))
+
+
+CIBLES: dict[str, CibleBenchmark] = {
+    "characters": CibleBenchmark(
+        "characters", "characters.json", _generer_personnage, _creer_personnage, _modifier_personnage
+    ),
+    "renders": CibleBenchmark(
+        "renders", "renders.json", _generer_rendu, _creer_rendu, _modifier_rendu
+    ),
+    "prompts": CibleBenchmark(
+        "prompts", "prompts.json", _generer_prompt, _creer_prompt, _modifier_prompt
+    ),
+    "scenarios": CibleBenchmark(
+        "scenarios", "scenarios.json", _generer_scenario, _creer_scenario, _modifier_scenario
+    ),
+}
+
+_DEPOTS_JSON: dict[str, Callable[[Path], Any]] = {
+    "characters": CharacterRepository,
+    "renders": RenderRepository,
+    "prompts": PromptRepository,
+    "scenarios": ScenarioRepository,
+}
+
+
+def _ouvrir_json(nom_cible: str, repertoire: Path) -> Any:
+    return _DEPOTS_JSON[nom_cible](repertoire)
+
+
+def _peupler_json(cible: CibleBenchmark, repertoire: Path, items: dict[str, dict[str, Any]]) -> None:
+    (repertoire / cible.fichier).write_text(
+        json.dumps({"items": items}, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+
+
+BACKENDS: dict[str, BackendStockage] = {
+    "json": BackendStockage("json", _ouvrir_json, _peupler_json),
+}
+
+
+def mesurer(
+    nom_cible: str,
+    nom_backend: str,
+    taille: int,
+    forme: FormeJeuDonnees,
+    *,
+    operations: int = 20,
+    graine: int = 0,
+) -> dict[str, Any]:
+    """Mesure les opérations d'un dépôt peuplé de ``taille`` enregistrements."""
+
+    cible = CIBLES[nom_cible]
+    backend = BACKENDS[nom_backend]
+    rng = random.Random(graine)
+    entites = [cible.generer(index, forme, rng) for index in range(taille)]
+    items = {entite.identifiant: asdict(entite) for entite in entites}
+    modele = cible.generer(taille, forme, rng)
+    del entites
+
+    with tempfile.TemporaryDirectory(prefix="seidra-bench-") as dossier:
+        repertoire = Path(dossier)
+        backend.peupler(cible, repertoire, items)
+        del items
+        taille_fichier = _taille_repertoire(repertoire)
+
+        chargements = []
+        for _ in range(3):
+            debut = time.perf_counter()
+            depot = backend.ouvrir(nom_cible, repertoire)
+            chargements.append(time.perf_counter() - debut)
+
+        identifiants = [entite.identifiant for entite in depot.lister()]
+        echantillon = [rng.choice(identifiants) for _ in range(operations)] if identifiants else []
+
+        lectures = []
+        for identifiant in echantillon:
+            debut = time.perf_counter()
+            depot.lire(identifiant)
+            lectures.append(time.perf_counter() - debut)
+
+        debut = time.perf_counter()
+        nombre_listes = sum(1 for _ in depot.lister())
+        duree_lister = time.perf_counter() - debut
+
+        mises_a_jour = []
+        for numero, identifiant in enumerate(echantillon):
+            entite = depot.lire(identifiant)
+            debut = time.perf_counter()
+            cible.modifier(depot, entite, numero)
+            mises_a_jour.append(time.perf_counter() - debut)
+
+        creations = []
+        for _ in range(operations):
+            debut = time.perf_counter()
+            cible.creer(depot, modele)
+            creations.append(time.perf_counter() - debut)
+
+    return {
+        "cible": nom_cible,
+        "backend": nom_backend,
+        "taille": taille,
+        "enregistrements_listes": nombre_listes,
+        "chargement_ms": _ms(statistics.median(chargements)),
+        "creer_ms": _ms(_moyenne(creations)),
+        "mettre_a_jour_ms": _ms(_moyenne(mises_a_jour)),
+        "lire_us": _moyenne(lectures) * 1_000_000,
+        "lister_ms": _ms(duree_lister),
+        "fichier_octets": taille_fichier,
+        "pic_rss_kio": _pic_rss_kio(),
+    }
+
+
+def _moyenne(durees: list[float]) -> float:
+    return statistics.fmean(durees) if durees else 0.0
+
+
+def _ms(secondes: float) -> float:
+    return secondes * 1000
+
+
+def _taille_repertoire(repertoire: Path) -> int:
+    return sum(chemin.stat().st_size for chemin in repertoire.rglob("*") if chemin.is_file())
+
+
+def _pic_rss_kio() -> int | None:
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        pic //= 1024
+    return pic
+
+
+def _mesurer_isole(*args: Any, **kwargs: Any) -> dict[str, Any]:
+    contexte = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexte) as executeur:
+        return executeur.submit(mesurer, *args, **kwargs).result()
+
+
+def formater_resultats(resultats: list[dict[str, Any]]) -> str:
+    """Formate les résultats en tableau texte, une section par cible."""
+
+    colonnes = (
+        ("taille", "taille", "{:d}"),
+        ("chargement_ms", "chargement ms", "{:.1f}"),
+        ("creer_ms", "creer ms", "{:.2f}"),
+        ("mettre_a_jour_ms", "maj ms", "{:.2f}"),
+        ("lire_us", "lire µs", "{:.1f}"),
+        ("lister_ms", "lister ms", "{:.1f}"),
+        ("fichier_octets", "fichier Kio", "{:.0f}"),
+        ("pic_rss_kio", "pic RSS Mio", "{:.1f}"),
+    )
+    lignes = []
+    cles = sorted({(r["cible"], r["backend"]) for r in resultats})
+    for nom_cible, nom_backend in cles:
+        lignes.append(f"== {nom_cible} ({nom_backend}) ==")
+        lignes.append("  ".join(f"{titre:>14}" for _, titre, _ in colonnes))
+        for resultat in resultats:
+            if (resultat["cible"], resultat["backend"]) != (nom_cible, nom_backend):
+                continue
+            cellules = []
+            for cle, _, motif in colonnes:
+                valeur = resultat[cle]
+                if valeur is None:
+                    cellules.append(f"{'-':>14}")
+                    continue
+                if cle == "fichier_octets":
+                    valeur = valeur / 1024
+                elif cle == "pic_rss_kio":
+                    valeur = valeur / 1024
+                cellules.append(f"{motif.format(valeur):>14}")
+            lignes.append("  ".join(cellules))
+        lignes.append("")
+    return "\n".join(lignes)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cibles", default=",".join(CIBLES), help="Dépôts à mesurer.")
+    parser.add_argument("--tailles", default="100,1000,10000", help="Nombres d'enregistrements.")
+    parser.add_argument("--backend", action="append", choices=sorted(BACKENDS), default=None)
+    parser.add_argument("--operations", type=int, default=20, help="Échantillon par opération.")
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--evenements-historique", type=int, default=FormeJeuDonnees.evenements_historique)
+    parser.add_argument("--versions-prompt", type=int, default=FormeJeuDonnees.versions_prompt)
+    parser.add_argument("--executions-prompt", type=int, default=FormeJeuDonnees.executions_prompt)
+    parser.add_argument("--actes-scenario", type=int, default=FormeJeuDonnees.actes_scenario)
+    parser.add_argument("--scenes-par-acte", type=int, default=FormeJeuDonnees.scenes_par_acte)
+    parser.add_argument(
+        "--meme-processus",
+        action="store_true",
+        help="N'isole pas chaque mesure (le pic RSS devient cumulatif).",
+    )
+    parser.add_argument("--sortie-json", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    cibles = [nom.strip() for nom in args.cibles.split(",") if nom.strip()]
+    inconnues = sorted(set(cibles) - set(CIBLES))
+    if inconnues:
+        parser.error(f"Cibles inconnues: {', '.join(inconnues)}")
+    tailles = [int(valeur) for valeur in args.tailles.split(",") if valeur.strip()]
+    forme = FormeJeuDonnees(
+        evenements_historique=args.evenements_historique,
+        versions_prompt=args.versions_prompt,
+        executions_prompt=args.executions_prompt,
+        actes_scenario=args.actes_scenario,
+        scenes_par_acte=args.scenes_par_acte,
+    )
+    executer = mesurer if args.meme_processus else _mesurer_isole
+
+    resultats = []
+    for nom_backend in args.backend or ["json"]:
+        for nom_cible in cibles:
+            for taille in tailles:
+                resultat = executer(
+                    nom_cible,
+                    nom_backend,
+                    taille,
+                    forme,
+                    operations=args.operations,
+                    graine=args.graine,
+                )
+                resultats.append(resultat)
+                print(
+                    f"{nom_cible}/{nom_backend} n={taille}: "
+                    f"creer {resultat['creer_ms']:.2f} ms, lister {resultat['lister_ms']:.1f} ms",
+                    file=sys.stderr,
+                )
+
+    print(formater_resultats(resultats))
+    if args.sortie_json is not None:
+        args.sortie_json.write_text(
+            json.dumps(resultats, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+"""Historique des personnages, stocké en ajout seul.
+
+Les événements ne sont plus rangés dans ``characters.json`` : chacun est une
+ligne NDJSON ajoutée en fin de ``characters.historique.ndjson``. Un ajout
+n'écrit donc que la nouvelle ligne. Le remplacement complet d'un historique
+(PUT, import) ou la suppression d'un personnage ajoutent une ligne de
+réinitialisation ; les lignes devenues inutiles sont éliminées par une
+compaction lorsqu'elles dépassent le volume des lignes utiles.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Iterable
+
+from ..persistence import ecrire_atomiquement, encoder_json
+
+# Nombre de lignes mortes tolérées avant de réécrire le fichier.
+LIGNES_MORTES_AVANT_COMPACTION = 1000
+
+
+class HistoriquePersonnages:
+    def __init__(self, chemin: Path) -> None:
+        self.chemin = chemin
+        self._evenements: dict[str, list[dict[str, Any]]] = {}
+        self._lignes = 0
+        self._utiles = 0
+        self._differees: list[bytes] | None = None
+        self._charger()
+
+    def total(self, character_id: str) -> int:
+        return len(self._evenements.get(character_id, ()))
+
+    def lire(self, character_id: str, *, debut: int = 0, limite: int | None = None) -> list[dict[str, Any]]:
+        evenements = self._evenements.get(character_id, [])
+        fin = None if limite is None else debut + limite
+        return evenements[debut:fin]
+
+    def derniers(self, character_id: str, nombre: int) -> list[dict[str, Any]]:
+        if nombre <= 0:
+            return []
+        return self._evenements.get(character_id, [])[-nombre:]
+
+    def identiques(self, character_id: str, evenements: list[dict[str, Any]]) -> bool:
+        return self._evenements.get(character_id, []) == evenements
+
+    def ajouter(self, character_id: str, evenement: dict[str, Any]) -> int:
+        """Ajoute un événement et retourne son indice dans l'historique."""
+
+        self._evenements.setdefault(character_id, []).append(evenement)
+        self._utiles += 1
+        self._ecrire([{"personnage": character_id, "evenement": evenement}])
+        return len(self._evenements[character_id]) - 1
+
+    def remplacer(self, character_id: str, evenements: Iterable[dict[str, Any]]) -> None:
+        evenements = list(evenements)
+        lignes: list[dict[str, Any]] = []
+        if character_id in self._evenements:
+            lignes.append({"personnage": character_id, "reinitialiser": True})
+        lignes.extend({"personnage": character_id, "evenement": evenement} for evenement in evenements)
+        self._utiles += len(evenements) - self.total(character_id)
+        if evenements:
+            self._evenements[character_id] = evenements
+        else:
+            self._evenements.pop(character_id, None)
+        if lignes:
+            self._ecrire(lignes)
+
+    def supprimer(self, character_id: str) -> None:
+        self.remplacer(character_id, [])
+
+    def differer(self) -> dict[str, list[dict[str, Any]]]:
+        """Retient les écritures jusqu'à :meth:`reprendre` ; retourne un instantané mémoire."""
+
+        self._differees = []
+        return {character_id: list(evenements) for character_id, evenements in self._evenements.items()}
+
+    def reprendre(self, instantane: dict[str, list[dict[str, Any]]] | None = None) -> None:
+        """Écrit les lignes retenues, ou les abandonne en restaurant ``instantane``."""
+
+        differees, self._differees = self._differees, None
+        if instantane is not None:
+            self._evenements = instantane
+            self._utiles = sum(len(evenements) for evenements in instantane.values())
+            return
+        if differees:
+            self._ajouter_lignes(differees)
+
+    def compacter(self) -> None:
+        lignes = [
+            encoder_json({"personnage": character_id, "evenement": evenement}) + b"\n"
+            for character_id, evenements in self._evenements.items()
+            for evenement in evenements
+        ]
+        ecrire_atomiquement(self.chemin, b"".join(lignes))
+        self._lignes = len(lignes)
+
+    def _ecrire(self, entrees: list[dict[str, Any]]) -> None:
+        lignes = [encoder_json(entree) + b"\n" for entree in entrees]
+        if self._differees is not None:
+            self._differees.extend(lignes)
+            return
+        self._ajouter_lignes(lignes)
+
+    def _ajouter_lignes(self, lignes: list[bytes]) -> None:
+        with self.chemin.open("ab") as fichier:
+            fichier.write(b"".join(lignes))
+        self._lignes += len(lignes)
+        if self._lignes - self._utiles > max(LIGNES_MORTES_AVANT_COMPACTION, self._utiles):
+            self.compacter()
+
+    def _charger(self) -> None:
+        self._evenements = {}
+        self._lignes = 0
+        self._utiles = 0
+        if not self.chemin.exists():
+            return
+        position = 0
+        with self.chemin.open("r+b") as fichier:
+            for ligne in fichier:
+                try:
+                    if not ligne.endswith(b"\n"):
+                        raise ValueError("ligne incomplète")
+                    entree = json.loads(ligne)
+                except ValueError:
+                    # Ligne tronquée par un arrêt brutal pendant l'écriture :
+                    # on la retire pour que les ajouts suivants restent lisibles.
+                    fichier.truncate(position)
+                    break
+                position += len(ligne)
+                self._lignes += 1
+                character_id = entree["personnage"]
+                if entree.get("reinitialiser"):
+                    self._evenements.pop(character_id, None)
+                else:
+                    self._evenements.setdefault(character_id, []).append(entree["evenement"])
+        self._utiles = sum(len(evenements) for evenements in self._evenements.values())
@@ -1,12 +1,25 @@
 from __future__ import annotations
 
 import json
+from contextlib import contextmanager
 from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator, Sequence
 from uuid import uuid4
 
+from ..persistence import (
+    CREATION,
+    MISE_A_JOUR,
+    CacheJson,
+    CompteurRevisions,
+    ConflitVersion,
+    JournalChangements,
+    JournalOperations,
+    VerrouLectureEcriture,
+    ecrire_atomiquement,
+)
+from .historique import HistoriquePersonnages
 from .models import (
     Character,
     CharacterHistory,
@@ -16,14 +29,34 @@ from .models import (
     CharacterTraits,
 )
 
+# Nombre d'événements récents joints à la fiche ; l'historique complet se lit par pages.
+APERCU_HISTORIQUE = 10
+# Nombre de mises à jour d'état journalisées au-delà duquel la fiche complète est réécrite.
+ETATS_AVANT_COMPACTION = 1000
+_CHAMPS_ETAT = ("statut", "localisation", "etat_emotionnel")
+
 
 class CharacterRepository:
-    def __init__(self, base_path: Path | None = None) -> None:
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        *,
+        journal: JournalChangements | None = None,
+    ) -> None:
         if base_path is None:
             base_path = Path(__file__).resolve().parents[2] / "data"
         self.store_path = _resolve_store_path(base_path, "characters.json")
         self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        self.historique = HistoriquePersonnages(self.store_path.with_suffix(".historique.ndjson"))
+        self._etats = JournalOperations(self.store_path.with_suffix(".etats.ndjson"))
         self._cache: dict[str, dict[str, object]] = {}
+        self._json = CacheJson(self._apercu)
+        self._revisions = CompteurRevisions(journal, "characters")
+        # Révision du profil et des traits seuls : l'état et l'historique n'y touchent pas.
+        self._revisions_profils: dict[str, int] = {}
+        self._derniere_revision_profil = 0
+        self._en_transaction = False
+        self._verrou = VerrouLectureEcriture()
         self._charger()
 
     def creer(self, profil: CharacterProfile, *, traits: CharacterTraits | None = None,
@@ -37,57 +70,367 @@ class CharacterRepository:
             historique=historique or CharacterHistory(),
             etat=etat,
         )
-        self._enregistrer(character)
+        with self._verrou.ecriture():
+            self._enregistrer(character)
         return character
 
     def lire(self, identifiant: str) -> Character:
-        payload = self._cache.get(identifiant)
-        if payload is None:
+        with self._verrou.lecture():
+            payload = self._cache.get(identifiant)
+            if payload is None:
+                raise FileNotFoundError(f"Personnage introuvable: {identifiant}")
+            complet = self._complet(payload)
+        return _character_from_dict(complet)
+
+    def lire_profil(self, identifiant: str) -> tuple[int, CharacterProfile, CharacterTraits]:
+        """Retourne la révision du profil, le profil et les traits seuls, sans hydrater l'historique."""
+
+        with self._verrou.lecture():
+            payload = self._cache.get(identifiant)
+            if payload is None:
+                raise FileNotFoundError(f"Personnage introuvable: {identifiant}")
+            revision = self._revisions_profils[identifiant]
+        return revision, CharacterProfile(**payload["profil"]), CharacterTraits(**payload.get("traits", {}))
+
+    def revision_profil(self, identifiant: str) -> int:
+        """Révision du profil et des traits, changée par toute réécriture de la fiche.
+
+        Une mise à jour d'état ou un ajout à l'historique la laisse inchangée.
+        """
+
+        revision = self._revisions_profils.get(identifiant)
+        if revision is None:
             raise FileNotFoundError(f"Personnage introuvable: {identifiant}")
-        return _character_from_dict(payload)
+        return revision
 
     def mettre_a_jour(self, character: Character) -> Character:
-        if character.identifiant not in self._cache:
-            raise FileNotFoundError(
-                f"Impossible de mettre à jour un personnage inexistant: {character.identifiant}"
-            )
-        character = character.mettre_a_jour_timestamp()
-        self._enregistrer(character)
+        with self._verrou.ecriture():
+            if character.identifiant not in self._cache:
+                raise FileNotFoundError(
+                    f"Impossible de mettre à jour un personnage inexistant: {character.identifiant}"
+                )
+            character = character.mettre_a_jour_timestamp()
+            self._enregistrer(character)
         return character
 
+    def modifier(self, identifiant: str, transformation: Callable[[Character], Character]) -> Character:
+        """Lit, transforme et enregistre une fiche sans mutation concurrente intercalée."""
+
+        with self._verrou.ecriture():
+            return self.mettre_a_jour(transformation(self.lire(identifiant)))
+
     def supprimer(self, identifiant: str) -> None:
+        with self._verrou.ecriture():
+            if identifiant not in self._cache:
+                raise FileNotFoundError(f"Personnage introuvable: {identifiant}")
+            del self._cache[identifiant]
+            self._revisions_profils.pop(identifiant, None)
+            self.historique.supprimer(identifiant)
+            self._json.invalider(identifiant)
+            self._revisions.retirer(identifiant)
+            self._sauvegarder()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Regroupe plusieurs mutations en une seule sauvegarde.
+
+        Si le bloc lève une exception, le cache est restauré et rien n'est écrit ;
+        les révisions et le journal des changements ne sont mis à jour qu'à la
+        validation.
+        Le dépôt reste verrouillé en écriture pendant tout le bloc.
+        """
+
+        with self._verrou.ecriture():
+            if self._en_transaction:
+                yield
+                return
+            instantane = dict(self._cache)
+            instantane_historique = self.historique.differer()
+            self._revisions.differer()
+            self._en_transaction = True
+            try:
+                yield
+            except BaseException:
+                self._cache = instantane
+                # Les fiches restaurées changent de révision de profil, comme après une réécriture.
+                self._revisions_profils = {}
+                for identifiant in self._cache:
+                    self._marquer_profil(identifiant)
+                self.historique.reprendre(instantane_historique)
+                self._revisions.reprendre(abandonner=True)
+                self._json.invalider()
+                raise
+            finally:
+                self._en_transaction = False
+            self._revisions.reprendre()
+            self.historique.reprendre()
+            self._sauvegarder()
+
+    def lister(self) -> Iterable[Character]:
+        with self._verrou.lecture():
+            complets = [self._complet(payload) for payload in self._cache.values()]
+        return (_character_from_dict(complet) for complet in complets)
+
+    def ajouter_evenement(self, identifiant: str, evenement: CharacterHistoryEntry) -> int:
+        """Ajoute un événement à l'historique sans réécrire la fiche ; retourne son indice."""
+
+        with self._verrou.ecriture():
+            if identifiant not in self._cache:
+                raise FileNotFoundError(f"Personnage introuvable: {identifiant}")
+            indice = self.historique.ajouter(identifiant, asdict(evenement))
+            self._json.invalider(identifiant)
+            self._revisions.incrementer(identifiant, MISE_A_JOUR)
+        return indice
+
+    def modifier_etat(
+        self,
+        identifiant: str,
+        modifications: dict[str, object],
+        *,
+        version: int | None = None,
+    ) -> tuple[dict[str, object], int]:
+        """Met à jour l'état seul ; retourne le nouvel état et la nouvelle révision."""
+
+        resultat = self.modifier_etats([(identifiant, modifications, version)])[0]
+        if isinstance(resultat, Exception):
+            raise resultat
+        return resultat
+
+    def modifier_etats(
+        self,
+        lot: list[tuple[str, dict[str, object], int | None]],
+    ) -> list[tuple[dict[str, object], int] | Exception]:
+        """Applique des mises à jour d'état ``(identifiant, modifications, version)``.
+
+        Chaque modification n'écrit qu'une ligne dans le journal des états ; le
+        lot entier en une seule écriture. Dans une :meth:`transaction`, rien
+        n'est journalisé : les états partent avec la sauvegarde de validation,
+        et une annulation n'en laisse aucune trace. ``variables`` est fusionné clé par clé
+        (``None`` retire la clé). Si ``version`` est fourni et ne correspond pas
+        à la révision courante, l'élément échoue avec :class:`ConflitVersion`.
+        L'erreur d'un élément prend la place de son résultat.
+        """
+
+        resultats: list[tuple[dict[str, object], int] | Exception] = []
+        lignes = []
+        with self._verrou.ecriture():
+            for identifiant, modifications, version in lot:
+                try:
+                    payload = self._cache.get(identifiant)
+                    if payload is None:
+                        raise FileNotFoundError(f"Personnage introuvable: {identifiant}")
+                    courante = self._revisions.revision(identifiant)
+                    if version is not None and version != courante:
+                        raise ConflitVersion(identifiant, version, courante)
+                    etat = _fusionner_etat(payload.get("etat"), modifications)
+                except (FileNotFoundError, ValueError) as exc:
+                    resultats.append(exc)
+                    continue
+                modifie_le = datetime.utcnow().isoformat()
+                self._cache[identifiant] = {**payload, "etat": etat, "modifie_le": modifie_le}
+                self._json.invalider(identifiant)
+                revision = self._revisions.incrementer(identifiant, MISE_A_JOUR)
+                lignes.append({"personnage": identifiant, "etat": etat, "modifie_le": modifie_le})
+                resultats.append((etat, revision))
+            if lignes and not self._en_transaction:
+                self._etats.ajouter_lot(lignes)
+                if self._etats.en_attente >= ETATS_AVANT_COMPACTION:
+                    self._sauvegarder()
+        return resultats
+
+    def lire_historique(
+        self,
+        identifiant: str,
+        *,
+        debut: int = 0,
+        limite: int | None = None,
+    ) -> tuple[int, list[dict[str, object]]]:
+        """Retourne le nombre total d'événements et la page demandée."""
+
+        with self._verrou.lecture():
+            if identifiant not in self._cache:
+                raise FileNotFoundError(f"Personnage introuvable: {identifiant}")
+            return (
+                self.historique.total(identifiant),
+                self.historique.lire(identifiant, debut=debut, limite=limite),
+            )
+
+    @property
+    def revision_collection(self) -> int:
+        return self._revisions.courante
+
+    def existe(self, identifiant: str) -> bool:
+        return identifiant in self._cache
+
+    def revision(self, identifiant: str) -> int:
         if identifiant not in self._cache:
             raise FileNotFoundError(f"Personnage introuvable: {identifiant}")
-        del self._cache[identifiant]
-        self._sauvegarder()
+        return self._revisions.revision(identifiant)
 
-    def lister(self) -> Iterable[Character]:
-        for payload in self._cache.values():
-            yield _character_from_dict(payload)
+    def structures_memoire(self) -> dict[str, object]:
+        """Structures tenues en mémoire, pour la comptabilité de ``/admin/memoire``.
+
+        ``enregistrements`` est le cache ``identifiant -> enregistrement``.
+        """
+
+        return {
+            "enregistrements": self._cache,
+            "json": self._json.encodes,
+            "historique": self.historique,
+            "revisions_profils": self._revisions_profils,
+        }
+
+    def lire_json(self, identifiant: str, champs: Sequence[str] | None = None) -> bytes:
+        with self._verrou.lecture():
+            payload = self._cache.get(identifiant)
+            if payload is None:
+                raise FileNotFoundError(f"Personnage introuvable: {identifiant}")
+            if champs:
+                return self._json.encoder_champs(payload, champs)
+            return self._json.encoder(identifiant, payload)
+
+    def lister_json(self, champs: Sequence[str] | None = None) -> Iterable[bytes]:
+        with self._verrou.lecture():
+            if champs:
+                return [self._json.encoder_champs(payload, champs) for payload in self._cache.values()]
+            return [self._json.encoder(identifiant, payload) for identifiant, payload in self._cache.items()]
+
+    def exporter(self) -> Iterator[dict[str, object]]:
+        """Parcourt un instantané des enregistrements, historique complet inclus, sans les hydrater.
+
+        Seules les références aux enregistrements sont copiées sous le verrou ;
+        l'historique de chaque personnage est lu au moment où il est produit.
+        """
+
+        with self._verrou.lecture():
+            payloads = list(self._cache.values())
+        for payload in payloads:
+            yield self._complet(payload)
+
+    def normaliser(self, payload: dict[str, object]) -> dict[str, object]:
+        """Valide un enregistrement importé et le remet au format stocké."""
+
+        try:
+            character = _character_from_dict(payload)
+            if not character.profil.nom.strip() or not character.profil.description.strip():
+                raise ValueError("Le nom et la description du personnage sont obligatoires.")
+            return _character_to_dict(character)
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise ValueError(f"Personnage invalide: {exc!r}") from exc
+
+    def importer_lot(
+        self,
+        payloads: list[dict[str, object]],
+        *,
+        remplacer: bool,
+    ) -> dict[str, int]:
+        """Applique un lot d'enregistrements normalisés avec une seule sauvegarde."""
+
+        compteurs = {"crees": 0, "remplaces": 0, "ignores": 0}
+        with self._verrou.ecriture():
+            for payload in payloads:
+                identifiant = payload["identifiant"]
+                if identifiant in self._cache:
+                    if not remplacer:
+                        compteurs["ignores"] += 1
+                        continue
+                    compteurs["remplaces"] += 1
+                    operation = MISE_A_JOUR
+                else:
+                    compteurs["crees"] += 1
+                    operation = CREATION
+                self._remplacer_payload(identifiant, payload)
+                self._revisions.incrementer(identifiant, operation)
+            if compteurs["crees"] or compteurs["remplaces"]:
+                self._sauvegarder()
+        return compteurs
 
     def _enregistrer(self, character: Character) -> None:
-        payload = _character_to_dict(character)
-        self._cache[character.identifiant] = payload
+        operation = MISE_A_JOUR if character.identifiant in self._cache else CREATION
+        self._remplacer_payload(character.identifiant, _character_to_dict(character))
+        self._revisions.incrementer(character.identifiant, operation)
         self._sauvegarder()
 
+    def _remplacer_payload(self, identifiant: str, payload: dict[str, object]) -> None:
+        """Range la fiche sans son historique, qui part dans le stockage en ajout seul."""
+
+        historique = payload.pop("historique", None)
+        if historique is not None:
+            evenements = historique.get("evenements", [])
+            if not self.historique.identiques(identifiant, evenements):
+                self.historique.remplacer(identifiant, evenements)
+        self._cache[identifiant] = payload
+        self._json.invalider(identifiant)
+        self._marquer_profil(identifiant)
+
+    def _marquer_profil(self, identifiant: str) -> None:
+        self._derniere_revision_profil += 1
+        self._revisions_profils[identifiant] = self._derniere_revision_profil
+
+    def _complet(self, payload: dict[str, object]) -> dict[str, object]:
+        evenements = self.historique.lire(payload["identifiant"])
+        return {**payload, "historique": {"evenements": evenements}}
+
+    def _apercu(self, payload: dict[str, object]) -> dict[str, object]:
+        identifiant = payload["identifiant"]
+        return {
+            **payload,
+            "historique": {
+                "total": self.historique.total(identifiant),
+                "evenements": self.historique.derniers(identifiant, APERCU_HISTORIQUE),
+            },
+        }
+
     def _charger(self) -> None:
+        self._json.invalider()
+        self._cache = {}
+        self._revisions_profils = {}
         if not self.store_path.exists():
-            self._cache = {}
             return
         contenu = json.loads(self.store_path.read_text(encoding="utf-8"))
         if isinstance(contenu, dict):
             items = contenu.get("items", contenu)
             if isinstance(items, dict):
-                self._cache = dict(items)
-                return
-        self._cache = {}
+                # Les fiches écrites avant le stockage séparé portent encore
+                # leur historique : il est déplacé une fois, puis la fiche allégée.
+                a_migrer = any("historique" in payload for payload in items.values())
+                for identifiant, payload in items.items():
+                    self._remplacer_payload(identifiant, payload)
+                for ligne in self._etats.relire(contenu.get("sequence_etats", 0)):
+                    payload = self._cache.get(ligne["personnage"])
+                    if payload is not None:
+                        payload["etat"] = ligne["etat"]
+                        payload["modifie_le"] = ligne["modifie_le"]
+                if a_migrer:
+                    self._sauvegarder()
 
     def _sauvegarder(self) -> None:
-        payload = {"items": self._cache}
-        self.store_path.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        if self._en_transaction:
+            return
+        payload = {"items": self._cache, "sequence_etats": self._etats.sequence}
+        ecrire_atomiquement(self.store_path, json.dumps(payload, ensure_ascii=False, indent=2))
+        self._etats.vider()
+
+
+def _fusionner_etat(
+    etat: dict[str, object] | None,
+    modifications: dict[str, object],
+) -> dict[str, object]:
+    nouveau = dict(etat) if etat else {"statut": None, "localisation": None, "etat_emotionnel": None}
+    for champ in _CHAMPS_ETAT:
+        if champ in modifications:
+            nouveau[champ] = modifications[champ]
+    variables = dict(nouveau.get("variables") or {})
+    for cle, valeur in (modifications.get("variables") or {}).items():
+        if valeur is None:
+            variables.pop(cle, None)
+        else:
+            variables[cle] = valeur
+    nouveau["variables"] = variables
+    statut = nouveau.get("statut")
+    if not isinstance(statut, str) or not statut.strip():
+        raise ValueError("Le statut du personnage doit être renseigné.")
+    return asdict(CharacterState(**nouveau))
 
 
 def _character_to_dict(character: Character) -> dict[str, object]:
@@ -1,5 +1,6 @@
 """Module de génération d'images et vidéos à partir de personnages."""
 
+from .cancellation import CancellationToken, GenerationInterrupted, cancellation_scope
 from .interfaces import ImageModel, PromptRenderer, VideoModel
 from .models import (
     CharacterProfile,
@@ -12,9 +13,14 @@ from .models import (
     VideoGenerationConfig,
 )
 from .orchestrator import MediaGenerationOrchestrator
+from .resilience import BreakerPolicy, CircuitOpen, RetryPolicy
 
 __all__ = [
+    "BreakerPolicy",
+    "CancellationToken",
     "CharacterProfile",
+    "CircuitOpen",
+    "GenerationInterrupted",
     "ImageGenerationConfig",
     "ImageModel",
     "MediaAsset",
@@ -22,8 +28,10 @@ __all__ = [
     "MediaResolution",
     "PromptRenderer",
     "PromptSpec",
+    "RetryPolicy",
     "SceneSpec",
     "StyleProfile",
     "VideoGenerationConfig",
     "VideoModel",
+    "cancellation_scope",
 ]
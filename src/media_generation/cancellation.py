@@ -0,0 +1,121 @@
+"""Annulation et délais des générations en cours.
+
+Un :class:`CancellationToken` est rattaché à une génération par
+:func:`cancellation_scope`. Les modèles qui lancent un processus (voir
+:mod:`.local`) s'y abonnent : une annulation ou l'échéance du délai arrête le
+groupe de processus du générateur. Les autres modèles ne sont interrompus
+qu'aux points de contrôle (:meth:`CancellationToken.raise_if_interrupted`),
+notamment avant le démarrage de la génération.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+from typing import Callable, Iterator
+
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+
+
+class GenerationInterrupted(RuntimeError):
+    """Génération arrêtée avant son terme ; ``reason`` vaut ``cancelled`` ou ``timeout``."""
+
+    def __init__(self, reason: str) -> None:
+        message = "Génération annulée." if reason == CANCELLED else "Délai de génération dépassé."
+        super().__init__(message)
+        self.reason = reason
+
+
+class CancellationToken:
+    """Porte l'échéance d'une génération et permet de l'interrompre depuis un autre thread."""
+
+    def __init__(self, *, deadline: float | None = None) -> None:
+        self._lock = threading.Lock()
+        self._interrupted = threading.Event()
+        self.deadline = deadline
+        self.reason: str | None = None
+        self._callbacks: list[Callable[[], None]] = []
+
+    def limit(self, seconds: float | None) -> None:
+        """Rapproche l'échéance à ``seconds`` à partir de maintenant, si elle est plus proche."""
+
+        if seconds is None:
+            return
+        deadline = time.monotonic() + seconds
+        with self._lock:
+            if self.deadline is None or deadline < self.deadline:
+                self.deadline = deadline
+
+    def remaining(self) -> float | None:
+        """Secondes avant l'échéance (0 si dépassée), ou None sans échéance."""
+
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def cancel(self, reason: str = CANCELLED) -> bool:
+        """Interrompt la génération ; retourne False si elle l'était déjà."""
+
+        with self._lock:
+            if self.reason is not None:
+                return False
+            self.reason = reason
+            callbacks = list(self._callbacks)
+        self._interrupted.set()
+        for callback in callbacks:
+            callback()
+        return True
+
+    def raise_if_interrupted(self) -> None:
+        if self.reason is None and self.remaining() == 0.0:
+            self.cancel(TIMEOUT)
+        if self.reason is not None:
+            raise GenerationInterrupted(self.reason)
+
+    def sleep(self, seconds: float) -> None:
+        """Attend ``seconds`` ; s'interrompt dès l'annulation ou l'échéance."""
+
+        remaining = self.remaining()
+        self._interrupted.wait(seconds if remaining is None else min(seconds, remaining))
+        self.raise_if_interrupted()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Appelle ``callback`` à l'interruption (tout de suite si déjà interrompue).
+
+        Retourne une fonction qui désinscrit le callback.
+        """
+
+        with self._lock:
+            already = self.reason is not None
+            if not already:
+                self._callbacks.append(callback)
+        if already:
+            callback()
+
+        def unregister() -> None:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+        return unregister
+
+
+_current_token: ContextVar[CancellationToken | None] = ContextVar("cancellation_token", default=None)
+
+
+def current_token() -> CancellationToken | None:
+    return _current_token.get()
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken) -> Iterator[CancellationToken]:
+    """Rattache ``token`` aux générations lancées dans le bloc."""
+
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
@@ -2,11 +2,17 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import hashlib
+import os
 from pathlib import Path
+import signal
 import subprocess
+import threading
+from typing import Callable
 
+from ..prompts.compilation import TemplateCompile, compiler_template
+from .cancellation import TIMEOUT, CancellationToken, current_token
 from .models import (
     ImageGenerationConfig,
     MediaAsset,
@@ -23,17 +29,24 @@ class CommandTemplate:
     """Template de commande shell."""
 
     template: str
+    compile: TemplateCompile = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "compile", compiler_template(self.template))
 
     def render(self, variables: dict[str, object]) -> str:
-        return self.template.format_map(defaultdict(str, variables))
+        return self.compile.rendre(variables)
 
 
 class LocalImageCommandModel:
     """Exécute une commande locale pour générer une image."""
 
-    def __init__(self, base_path: Path, template: CommandTemplate) -> None:
+    def __init__(self, base_path: Path, template: CommandTemplate, *, output_mode: str = "file") -> None:
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"Mode de sortie inconnu: {output_mode}. Autorisés: {list(OUTPUT_MODES)}")
         self.base_path = base_path
         self.template = template
+        self.output_mode = output_mode
 
     def generate(
         self,
@@ -59,18 +72,23 @@ class LocalImageCommandModel:
                 "style_tags": ",".join(config.style.tags) if config.style else "",
             }
         )
-        _run_command(command)
-        _ensure_output_exists(output_path, command)
-        size_bytes = output_path.stat().st_size
-        validate_max_size(size_bytes, config.max_size_bytes, media_label="image")
+        mime_type = get_image_mime_type(config.output_format)
+        digest = _run_command(
+            command,
+            output_path,
+            max_size_bytes=config.max_size_bytes,
+            media_label="image",
+            output_mode=self.output_mode,
+        )
         return MediaAsset(
             uri=output_path.as_uri(),
-            mime_type=get_image_mime_type(config.output_format),
+            mime_type=mime_type,
             metadata={
                 "mode": "local_command",
                 "command": command,
                 "format": config.output_format,
-                "size_bytes": size_bytes,
+                "output_mode": self.output_mode,
+                **digest.metadata(),
             },
         )
 
@@ -78,9 +96,12 @@ class LocalImageCommandModel:
 class LocalVideoCommandModel:
     """Exécute une commande locale pour générer une vidéo."""
 
-    def __init__(self, base_path: Path, template: CommandTemplate) -> None:
+    def __init__(self, base_path: Path, template: CommandTemplate, *, output_mode: str = "file") -> None:
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"Mode de sortie inconnu: {output_mode}. Autorisés: {list(OUTPUT_MODES)}")
         self.base_path = base_path
         self.template = template
+        self.output_mode = output_mode
 
     def generate(
         self,
@@ -106,24 +127,220 @@ class LocalVideoCommandModel:
                 "style_tags": ",".join(config.style.tags) if config.style else "",
             }
         )
-        _run_command(command)
-        _ensure_output_exists(output_path, command)
-        size_bytes = output_path.stat().st_size
-        validate_max_size(size_bytes, config.max_size_bytes, media_label="video")
+        mime_type = get_video_mime_type(config.output_format)
+        digest = _run_command(
+            command,
+            output_path,
+            max_size_bytes=config.max_size_bytes,
+            media_label="video",
+            output_mode=self.output_mode,
+        )
         return MediaAsset(
             uri=output_path.as_uri(),
-            mime_type=get_video_mime_type(config.output_format),
+            mime_type=mime_type,
             metadata={
                 "mode": "local_command",
                 "command": command,
                 "format": config.output_format,
-                "size_bytes": size_bytes,
+                "output_mode": self.output_mode,
+                **digest.metadata(),
             },
         )
 
 
-def _run_command(command: str) -> None:
-    subprocess.run(command, shell=True, check=True)
+# Délai laissé au générateur pour s'arrêter proprement avant SIGKILL.
+ARRET_GRACE_SECONDES = 5.0
+# "file" : la commande écrit dans {output_path}, dont la taille est surveillée ;
+# "stdout" : la commande écrit le média sur sa sortie standard, recopiée au fil de l'eau.
+OUTPUT_MODES = ("file", "stdout")
+TAILLE_MORCEAU = 1024 * 1024
+INTERVALLE_SURVEILLANCE_SECONDES = 0.2
+
+_SIGNATURES = (
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (4, b"ftyp", "video/mp4"),
+    (0, b"\x1a\x45\xdf\xa3", "video/webm"),
+)
+
+
+class _OutputDigest:
+    """Taille, empreinte SHA-256 et type détecté d'une sortie lue par morceaux."""
+
+    def __init__(self) -> None:
+        self.size_bytes = 0
+        self._sha256 = hashlib.sha256()
+        self._head = b""
+
+    def update(self, chunk: bytes) -> None:
+        self.size_bytes += len(chunk)
+        self._sha256.update(chunk)
+        if len(self._head) < 16:
+            self._head += chunk[: 16 - len(self._head)]
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def detected_mime_type(self) -> str | None:
+        for offset, signature, mime_type in _SIGNATURES:
+            if self._head[offset : offset + len(signature)] == signature:
+                return mime_type
+        return None
+
+    def metadata(self) -> dict[str, object]:
+        return {
+            "size_bytes": self.size_bytes,
+            "sha256": self.sha256,
+            "detected_mime_type": self.detected_mime_type,
+        }
+
+
+def _run_command(
+    command: str,
+    output_path: Path,
+    *,
+    max_size_bytes: int,
+    media_label: str,
+    output_mode: str = "file",
+) -> _OutputDigest:
+    """Exécute la commande et capture sa sortie dans ``output_path``.
+
+    La commande tourne dans son propre groupe de processus, arrêté en entier
+    (shell et sous-processus) si la génération courante est annulée, expire, ou
+    si la sortie dépasse ``max_size_bytes`` ; la sortie partielle est supprimée.
+    """
+
+    token = current_token()
+    if token is not None:
+        token.raise_if_interrupted()
+    streamed = output_mode == "stdout"
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        start_new_session=os.name == "posix",
+        stdout=subprocess.PIPE if streamed else None,
+    )
+    unregister: Callable[[], None] | None = None
+    timer = None
+    if token is not None:
+        unregister = token.on_cancel(
+            lambda: threading.Thread(target=_stop_group, args=(process,), daemon=True).start()
+        )
+        remaining = token.remaining()
+        if remaining is not None:
+            timer = threading.Timer(remaining, token.cancel, args=(TIMEOUT,))
+            timer.daemon = True
+            timer.start()
+    target = output_path.with_name(f"{output_path.name}.partiel") if streamed else output_path
+    try:
+        if streamed:
+            digest = _copy_stream(process, target, max_size_bytes)
+            size_bytes = digest.size_bytes
+        else:
+            size_bytes = _watch_file(process, target, max_size_bytes, token)
+        oversized = size_bytes > max_size_bytes
+        if oversized:
+            _stop_group(process)
+        process.wait()
+    except BaseException:
+        _stop_group(process)
+        target.unlink(missing_ok=True)
+        raise
+    finally:
+        if unregister is not None:
+            unregister()
+        if timer is not None:
+            timer.cancel()
+    interrupted = token is not None and token.reason is not None
+    if oversized or interrupted or process.returncode:
+        target.unlink(missing_ok=True)
+    if interrupted:
+        token.raise_if_interrupted()
+    if oversized:
+        validate_max_size(size_bytes, max_size_bytes, media_label=media_label)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+    if streamed:
+        os.replace(target, output_path)
+        return digest
+    _ensure_output_exists(output_path, command)
+    # La surveillance est périodique : un dépassement dans le dernier intervalle se voit ici.
+    digest = _digest_file(output_path)
+    if digest.size_bytes > max_size_bytes:
+        output_path.unlink(missing_ok=True)
+        validate_max_size(digest.size_bytes, max_size_bytes, media_label=media_label)
+    return digest
+
+
+def _copy_stream(process: subprocess.Popen, target: Path, max_size_bytes: int) -> _OutputDigest:
+    """Recopie la sortie standard dans ``target`` ; s'arrête dès que la taille maximale est dépassée."""
+
+    digest = _OutputDigest()
+    with process.stdout, target.open("wb") as fichier:
+        for chunk in iter(lambda: process.stdout.read(TAILLE_MORCEAU), b""):
+            digest.update(chunk)
+            if digest.size_bytes > max_size_bytes:
+                break
+            fichier.write(chunk)
+    return digest
+
+
+def _watch_file(
+    process: subprocess.Popen,
+    target: Path,
+    max_size_bytes: int,
+    token: CancellationToken | None,
+) -> int:
+    """Attend la fin de la commande en surveillant la taille de ``target``.
+
+    Retourne la dernière taille observée, dès qu'elle dépasse ``max_size_bytes``
+    ou à la fin de la commande.
+    """
+
+    size_bytes = 0
+    while token is None or token.reason is None:
+        try:
+            process.wait(timeout=INTERVALLE_SURVEILLANCE_SECONDES)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        try:
+            size_bytes = target.stat().st_size
+        except FileNotFoundError:
+            continue
+        if size_bytes > max_size_bytes:
+            break
+    return size_bytes
+
+
+def _digest_file(path: Path) -> _OutputDigest:
+    digest = _OutputDigest()
+    with path.open("rb") as fichier:
+        for chunk in iter(lambda: fichier.read(TAILLE_MORCEAU), b""):
+            digest.update(chunk)
+    return digest
+
+
+def _stop_group(process: subprocess.Popen) -> None:
+    _signal_group(process, signal.SIGTERM)
+    try:
+        process.wait(timeout=ARRET_GRACE_SECONDES)
+    except subprocess.TimeoutExpired:
+        pass
+    _signal_group(process, signal.SIGKILL if os.name == "posix" else signal.SIGTERM)
+    process.wait()
+
+
+def _signal_group(process: subprocess.Popen, signum: int) -> None:
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signum)
+        else:
+            process.send_signal(signum)
+    except (ProcessLookupError, PermissionError):
+        pass
 
 
 def _ensure_output_exists(path: Path, command: str) -> None:
@@ -4,8 +4,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Mapping
+import threading
+import time
+from typing import Any, Callable, Mapping
 
+from .cancellation import current_token
 from .interfaces import ImageModel, PromptRenderer, VideoModel
 from .models import (
     ImageGenerationConfig,
@@ -14,15 +17,24 @@ from .models import (
     SceneSpec,
     VideoGenerationConfig,
 )
+from .resilience import BreakerPolicy, CircuitBreaker, RetryPolicy
 
 
 @dataclass
 class MediaGenerationOrchestrator:
-    """Coordonne la génération de médias avec les modèles branchés."""
+    """Coordonne la génération de médias avec les modèles branchés.
+
+    Chaque modèle a son disjoncteur ; les erreurs passagères sont retentées
+    selon ``retry_policy`` (voir :mod:`.resilience`).
+    """
 
     prompt_renderer: PromptRenderer
     image_models: Mapping[str, ImageModel] = field(default_factory=dict)
     video_models: Mapping[str, VideoModel] = field(default_factory=dict)
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy)
+    breaker_policy: BreakerPolicy = field(default_factory=BreakerPolicy)
+    _breakers: dict[tuple[str, str], CircuitBreaker] = field(default_factory=dict, init=False, repr=False)
+    _breakers_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
 
     def register_image_model(self, name: str, model: ImageModel) -> None:
         """Enregistre un modèle d'image sous un nom."""
@@ -45,8 +57,12 @@ class MediaGenerationOrchestrator:
         """Génère une image à partir d'une scène et d'un prompt."""
 
         model = self._get_image_model(model_name)
+        _raise_if_interrupted()
         rendered_prompt = self.prompt_renderer.render(scene, prompt)
-        asset = model.generate(scene=scene, prompt=rendered_prompt, config=config)
+        asset = self._call_model(
+            self.breaker("image", model_name),
+            lambda: model.generate(scene=scene, prompt=rendered_prompt, config=config),
+        )
         return self._enrich_asset_metadata(asset, source=model_name, version=prompt.version)
 
     def generate_video(
@@ -60,10 +76,49 @@ class MediaGenerationOrchestrator:
         """Génère une vidéo à partir d'une scène et d'un prompt."""
 
         model = self._get_video_model(model_name)
+        _raise_if_interrupted()
         rendered_prompt = self.prompt_renderer.render(scene, prompt)
-        asset = model.generate(scene=scene, prompt=rendered_prompt, config=config)
+        asset = self._call_model(
+            self.breaker("video", model_name),
+            lambda: model.generate(scene=scene, prompt=rendered_prompt, config=config),
+        )
         return self._enrich_asset_metadata(asset, source=model_name, version=prompt.version)
 
+    def breaker(self, kind: str, model_name: str) -> CircuitBreaker:
+        """Disjoncteur du modèle ``model_name`` de type ``image`` ou ``video``."""
+
+        with self._breakers_lock:
+            breaker = self._breakers.get((kind, model_name))
+            if breaker is None:
+                breaker = CircuitBreaker(model_name, self.breaker_policy)
+                self._breakers[(kind, model_name)] = breaker
+            return breaker
+
+    def breaker_states(self) -> list[dict[str, Any]]:
+        with self._breakers_lock:
+            breakers = sorted(self._breakers.items())
+        return [
+            {"type": kind, "model_name": model_name, **breaker.state()}
+            for (kind, model_name), breaker in breakers
+        ]
+
+    def _call_model(self, breaker: CircuitBreaker, generate: Callable[[], MediaAsset]) -> MediaAsset:
+        attempt = 1
+        while True:
+            breaker.acquire()
+            try:
+                asset = generate()
+            except BaseException as error:
+                breaker.record(error)
+                # Un disjoncteur qui vient de s'ouvrir arrête aussi les nouvelles tentatives.
+                if not breaker.closed or not self.retry_policy.should_retry(error, attempt):
+                    raise
+            else:
+                breaker.record(None)
+                return asset
+            _sleep(self.retry_policy.delay(attempt))
+            attempt += 1
+
     def _get_image_model(self, model_name: str) -> ImageModel:
         if model_name not in self.image_models:
             raise ValueError(
@@ -94,3 +149,17 @@ class MediaGenerationOrchestrator:
             "version": version,
         }
         return MediaAsset(uri=asset.uri, mime_type=asset.mime_type, metadata=metadata)
+
+
+def _sleep(seconds: float) -> None:
+    token = current_token()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.sleep(seconds)
+
+
+def _raise_if_interrupted() -> None:
+    token = current_token()
+    if token is not None:
+        token.raise_if_interrupted()
@@ -0,0 +1,191 @@
+"""Nouvelles tentatives et disjoncteur par modèle de génération.
+
+Une erreur passagère (processus du générateur tué par un signal, code de
+sortie déclaré passager, erreur d'entrée/sortie) est retentée après une attente
+exponentielle tirée au hasard, pour que des rendus qui échouent ensemble ne
+retentent pas ensemble. Un autre code de sortie non nul est une erreur
+déterministe du générateur : la relancer donnerait le même résultat.
+
+Le disjoncteur suit les dernières générations de chaque modèle. Quand la part
+d'échecs atteint le seuil, il s'ouvre : les générations sont refusées
+immédiatement (:class:`CircuitOpen`) au lieu de lancer un générateur voué à
+l'échec. Après ``open_seconds``, une seule génération d'essai est admise ; son
+succès referme le disjoncteur, son échec le rouvre.
+
+Les erreurs de la demande (``ValueError``) et les annulations ne disent rien
+de la santé du modèle et ne sont pas comptées ; un délai dépassé l'est.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+import math
+import random
+import subprocess
+import threading
+import time
+from typing import Any
+
+from .cancellation import CANCELLED, GenerationInterrupted
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Nombre total de tentatives et attente entre deux tentatives."""
+
+    attempts: int = 1
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    transient: tuple[type[BaseException], ...] = (OSError, TimeoutError)
+    # Codes de sortie passagers d'un générateur ; un processus tué par un signal
+    # (code négatif) l'est toujours.
+    transient_exit_codes: frozenset[int] = frozenset()
+
+    def __post_init__(self) -> None:
+        if self.attempts < 1:
+            raise ValueError("attempts doit valoir au moins 1.")
+        if self.base_delay < 0 or self.max_delay < 0:
+            raise ValueError("Les délais de nouvelle tentative doivent être positifs.")
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        return attempt < self.attempts and self.is_transient(error)
+
+    def is_transient(self, error: BaseException) -> bool:
+        if isinstance(error, subprocess.CalledProcessError):
+            return error.returncode < 0 or error.returncode in self.transient_exit_codes
+        return isinstance(error, self.transient)
+
+    def delay(self, attempt: int) -> float:
+        """Attente avant la tentative ``attempt + 1`` : tirage uniforme sous le plafond exponentiel."""
+
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    """Seuil d'ouverture calculé sur les ``window`` dernières générations (au moins ``min_calls``)."""
+
+    failure_threshold: float = 0.5
+    window: int = 20
+    min_calls: int = 5
+    open_seconds: float = 30.0
+
+    def __post_init__(self) -> None:
+        if not 0 < self.failure_threshold <= 1:
+            raise ValueError("failure_threshold doit être compris entre 0 (exclu) et 1.")
+        if self.window < 1 or not 1 <= self.min_calls <= self.window:
+            raise ValueError("min_calls doit être compris entre 1 et window.")
+
+
+class CircuitOpen(RuntimeError):
+    """Génération refusée : le disjoncteur du modèle est ouvert."""
+
+    def __init__(self, model_name: str, retry_after: float) -> None:
+        super().__init__(
+            f"Modèle '{model_name}' temporairement indisponible après des échecs répétés."
+        )
+        self.model_name = model_name
+        self.retry_after = max(math.ceil(retry_after), 1)
+
+
+def counts_as_failure(error: BaseException) -> bool:
+    if isinstance(error, GenerationInterrupted):
+        return error.reason != CANCELLED
+    return isinstance(error, Exception) and not isinstance(error, (ValueError, CircuitOpen))
+
+
+class CircuitBreaker:
+    def __init__(self, model_name: str, policy: BreakerPolicy) -> None:
+        self.model_name = model_name
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._outcomes: deque[bool] = deque(maxlen=policy.window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._trips = 0
+        self._rejected = 0
+
+    @property
+    def closed(self) -> bool:
+        with self._lock:
+            return self._state == CLOSED
+
+    def check(self) -> None:
+        """Lève :class:`CircuitOpen` si le disjoncteur est ouvert, sans réserver d'essai."""
+
+        with self._lock:
+            if self._state == OPEN and self._cooldown() > 0:
+                self._rejected += 1
+                raise CircuitOpen(self.model_name, self._cooldown())
+
+    def acquire(self) -> None:
+        """Autorise une génération ; en demi-ouverture, une seule à la fois."""
+
+        with self._lock:
+            if self._state == OPEN:
+                if self._cooldown() > 0:
+                    self._rejected += 1
+                    raise CircuitOpen(self.model_name, self._cooldown())
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    self._rejected += 1
+                    raise CircuitOpen(self.model_name, self.policy.open_seconds)
+                self._probing = True
+
+    def record(self, error: BaseException | None) -> None:
+        """Consigne l'issue d'une génération autorisée par :meth:`acquire`."""
+
+        with self._lock:
+            probe, self._probing = self._probing, False
+            if error is not None and not counts_as_failure(error):
+                return
+            if probe:
+                if error is None:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(error is None)
+            failures = self._outcomes.count(False)
+            if (
+                self._state == CLOSED
+                and len(self._outcomes) >= self.policy.min_calls
+                and failures >= self.policy.failure_threshold * len(self._outcomes)
+            ):
+                self._open()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._outcomes.clear()
+            self._probing = False
+
+    def state(self) -> dict[str, Any]:
+        with self._lock:
+            state = self._state
+            if state == OPEN and self._cooldown() <= 0:
+                state = HALF_OPEN
+            return {
+                "state": state,
+                "calls": len(self._outcomes),
+                "failures": self._outcomes.count(False),
+                "retry_after_seconds": self._cooldown() if self._state == OPEN else 0.0,
+                "trips": self._trips,
+                "rejected": self._rejected,
+            }
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._trips += 1
+
+    def _cooldown(self) -> float:
+        return max(self._opened_at + self.policy.open_seconds - time.monotonic(), 0.0)
@@ -0,0 +1,30 @@
+"""Outils partagés par les dépôts de stockage."""
+
+from .changements import (
+    CREATION,
+    MISE_A_JOUR,
+    SUPPRESSION,
+    Changement,
+    JournalChangements,
+)
+from .encodage import CacheJson, encoder_json, projeter_champs
+from .fichiers import ecrire_atomiquement
+from .operations import JournalOperations
+from .revisions import CompteurRevisions, ConflitVersion
+from .verrous import VerrouLectureEcriture
+
+__all__ = [
+    "CREATION",
+    "MISE_A_JOUR",
+    "SUPPRESSION",
+    "CacheJson",
+    "Changement",
+    "CompteurRevisions",
+    "ConflitVersion",
+    "JournalChangements",
+    "JournalOperations",
+    "VerrouLectureEcriture",
+    "ecrire_atomiquement",
+    "encoder_json",
+    "projeter_champs",
+]
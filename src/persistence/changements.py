@@ -0,0 +1,79 @@
+"""Journal borné des mutations, pour la synchronisation incrémentale des clients."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+import threading
+import time
+
+CREATION = "creation"
+MISE_A_JOUR = "mise_a_jour"
+SUPPRESSION = "suppression"
+
+
+@dataclass(frozen=True)
+class Changement:
+    sequence: int
+    collection: str
+    operation: str
+    identifiant: str
+    date: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+
+class JournalChangements:
+    """Attribue un numéro de séquence global à chaque mutation et garde les derniers.
+
+    La séquence part de l'horodatage courant en microsecondes, si bien qu'un
+    curseur obtenu avant un redémarrage est reconnu comme trop ancien.
+    """
+
+    def __init__(self, capacite: int = 10_000) -> None:
+        if capacite <= 0:
+            raise ValueError("capacite doit être un entier positif.")
+        self._verrou = threading.Lock()
+        self._entrees: deque[Changement] = deque(maxlen=capacite)
+        self.origine = time.time_ns() // 1000
+        self._sequence = self.origine
+        self._borne_basse = self.origine
+
+    @property
+    def sequence_courante(self) -> int:
+        return self._sequence
+
+    def enregistrer(self, collection: str, operation: str, identifiant: str) -> int:
+        with self._verrou:
+            self._sequence += 1
+            if len(self._entrees) == self._entrees.maxlen:
+                self._borne_basse = self._entrees[0].sequence
+            self._entrees.append(
+                Changement(
+                    sequence=self._sequence,
+                    collection=collection,
+                    operation=operation,
+                    identifiant=identifiant,
+                )
+            )
+            return self._sequence
+
+    def depuis(self, sequence: int, *, limite: int | None = None) -> tuple[list[Changement], bool]:
+        """Retourne les changements postérieurs à ``sequence``.
+
+        Le booléen vaut ``True`` quand le curseur n'est plus couvert par le
+        journal (trop ancien ou émis par un autre processus) : le client doit
+        alors tout recharger.
+        """
+
+        with self._verrou:
+            if sequence < self._borne_basse or sequence > self._sequence:
+                return [], True
+            changements = []
+            for changement in reversed(self._entrees):
+                if changement.sequence <= sequence:
+                    break
+                changements.append(changement)
+        changements.reverse()
+        if limite is not None:
+            changements = changements[:limite]
+        return changements, False
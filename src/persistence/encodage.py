@@ -0,0 +1,85 @@
+"""Encodage JSON des enregistrements exposés par l'API."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Iterable, Mapping
+
+
+def encoder_json(valeur: Any) -> bytes:
+    """Encode une valeur au format compact utilisé par les réponses HTTP."""
+
+    return json.dumps(valeur, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def projeter_champs(valeur: Mapping[str, Any], champs: Iterable[str]) -> dict[str, Any]:
+    """Restreint un enregistrement aux champs demandés.
+
+    Les chemins pointés (``asset.uri``) sélectionnent un sous-champ ; un champ
+    absent est ignoré et un parent ``None`` est conservé tel quel.
+    """
+
+    chemins = list(dict.fromkeys(tuple(champ.split(".")) for champ in champs if champ))
+    demandes = set(chemins)
+    retenus = [
+        chemin
+        for chemin in chemins
+        if not any(chemin[:longueur] in demandes for longueur in range(1, len(chemin)))
+    ]
+
+    resultat: dict[str, Any] = {}
+    for chemin in retenus:
+        source: Any = valeur
+        longueur = 0
+        for cle in chemin:
+            if not isinstance(source, Mapping) or cle not in source:
+                break
+            source = source[cle]
+            longueur += 1
+            if source is None:
+                break
+        if longueur == 0 or (longueur < len(chemin) and source is not None):
+            continue
+        cible = resultat
+        for cle in chemin[: longueur - 1]:
+            cible = cible.setdefault(cle, {})
+        cible[chemin[longueur - 1]] = source
+    return resultat
+
+
+class CacheJson:
+    """Mémorise l'encodage JSON de chaque enregistrement jusqu'à sa prochaine mutation.
+
+    ``projection`` transforme l'enregistrement stocké en la forme publiée ;
+    par défaut l'enregistrement est encodé tel quel.
+    """
+
+    def __init__(self, projection: Callable[[dict[str, Any]], Any] | None = None) -> None:
+        self._projection = projection
+        self._encodes: dict[str, bytes] = {}
+
+    @property
+    def encodes(self) -> Mapping[str, bytes]:
+        """Encodages mémorisés, par identifiant."""
+
+        return self._encodes
+
+    def encoder(self, identifiant: str, payload: dict[str, Any]) -> bytes:
+        encode = self._encodes.get(identifiant)
+        if encode is None:
+            valeur = self._projection(payload) if self._projection else payload
+            encode = encoder_json(valeur)
+            self._encodes[identifiant] = encode
+        return encode
+
+    def encoder_champs(self, payload: dict[str, Any], champs: Iterable[str]) -> bytes:
+        """Encode une projection de l'enregistrement, sans la mémoriser."""
+
+        valeur = self._projection(payload) if self._projection else payload
+        return encoder_json(projeter_champs(valeur, champs))
+
+    def invalider(self, identifiant: str | None = None) -> None:
+        if identifiant is None:
+            self._encodes.clear()
+        else:
+            self._encodes.pop(identifiant, None)
@@ -0,0 +1,26 @@
+"""Écriture des fichiers de stockage."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import threading
+
+
+def ecrire_atomiquement(chemin: Path, contenu: str | bytes) -> None:
+    """Remplace le contenu d'un fichier sans jamais exposer d'état partiel.
+
+    Le contenu est écrit dans un fichier temporaire du même répertoire, puis
+    renommé sur la cible (``os.replace`` est atomique sur un même système de
+    fichiers) : après un arrêt brutal, le fichier contient l'ancienne ou la
+    nouvelle version, jamais un mélange des deux.
+    """
+
+    donnees = contenu.encode("utf-8") if isinstance(contenu, str) else contenu
+    temporaire = chemin.with_name(f".{chemin.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        temporaire.write_bytes(donnees)
+        os.replace(temporaire, chemin)
+    except BaseException:
+        temporaire.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,69 @@
+"""Journal d'opérations ajouté à la suite d'un instantané de dépôt.
+
+Une modification locale (une scène, un acte, ...) est écrite comme une ligne
+NDJSON en fin de fichier au lieu de réécrire tout le dépôt. Chaque ligne porte
+un numéro de séquence ; l'instantané mémorise le dernier numéro qu'il intègre,
+si bien qu'au rechargement seules les opérations postérieures sont rejouées,
+même si le journal n'a pas pu être vidé après une compaction.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+from .encodage import encoder_json
+
+
+class JournalOperations:
+    def __init__(self, chemin: Path) -> None:
+        self.chemin = chemin
+        self.sequence = 0
+        self.en_attente = 0
+
+    def ajouter(self, operation: dict[str, Any]) -> int:
+        return self.ajouter_lot([operation])
+
+    def ajouter_lot(self, operations: list[dict[str, Any]]) -> int:
+        """Ajoute plusieurs opérations en une seule écriture ; retourne la dernière séquence."""
+
+        lignes = []
+        for operation in operations:
+            self.sequence += 1
+            lignes.append(encoder_json({"sequence": self.sequence, **operation}) + b"\n")
+        with self.chemin.open("ab") as fichier:
+            fichier.write(b"".join(lignes))
+        self.en_attente += len(lignes)
+        return self.sequence
+
+    def relire(self, depuis: int) -> Iterator[dict[str, Any]]:
+        """Produit les opérations de séquence strictement supérieure à ``depuis``."""
+
+        self.sequence = depuis
+        self.en_attente = 0
+        if not self.chemin.exists():
+            return
+        position = 0
+        with self.chemin.open("r+b") as fichier:
+            for ligne in fichier:
+                try:
+                    if not ligne.endswith(b"\n"):
+                        raise ValueError("ligne incomplète")
+                    operation = json.loads(ligne)
+                except ValueError:
+                    # Dernière ligne tronquée par un arrêt brutal : elle n'a
+                    # jamais été confirmée à l'appelant. On la retire pour que
+                    # les ajouts suivants restent lisibles.
+                    fichier.truncate(position)
+                    break
+                position += len(ligne)
+                if operation["sequence"] <= depuis:
+                    continue
+                self.sequence = operation["sequence"]
+                self.en_attente += 1
+                yield operation
+
+    def vider(self) -> None:
+        self.chemin.write_bytes(b"")
+        self.en_attente = 0
@@ -0,0 +1,86 @@
+"""Numérotation des mutations des dépôts, support des ETags."""
+
+from __future__ import annotations
+
+import time
+
+from .changements import MISE_A_JOUR, SUPPRESSION, JournalChangements
+
+
+class ConflitVersion(ValueError):
+    """La révision attendue par le client n'est plus la révision courante."""
+
+    def __init__(self, identifiant: str, attendue: int, courante: int) -> None:
+        super().__init__(
+            f"Version obsolète pour {identifiant}: attendue {attendue}, courante {courante}"
+        )
+        self.identifiant = identifiant
+        self.attendue = attendue
+        self.courante = courante
+
+
+class CompteurRevisions:
+    """Attribue un numéro de révision croissant à chaque mutation d'un dépôt.
+
+    Le compteur part de l'horodatage courant en microsecondes : les révisions
+    émises après un redémarrage ne recoupent donc pas celles d'avant, et les
+    enregistrements chargés au démarrage partagent la révision initiale.
+
+    Avec un ``journal``, les révisions sont les numéros de séquence globaux du
+    journal de changements, qui consigne aussi chaque mutation.
+
+    Entre :meth:`differer` et :meth:`reprendre`, les mutations sont retenues :
+    elles ne reçoivent leur révision et n'apparaissent dans le journal qu'à la
+    publication, et disparaissent si la transaction est abandonnée.
+    """
+
+    def __init__(self, journal: JournalChangements | None = None, collection: str = "") -> None:
+        self._journal = journal
+        self._collection = collection
+        self._initiale = journal.origine if journal else time.time_ns() // 1000
+        self.courante = self._initiale
+        self._par_entite: dict[str, int] = {}
+        self._differees: list[tuple[str, str]] | None = None
+
+    def incrementer(self, identifiant: str, operation: str = MISE_A_JOUR) -> int:
+        """Retourne la nouvelle révision, ou la révision courante si la mutation est retenue."""
+
+        if self._differees is not None:
+            self._differees.append((identifiant, operation))
+            return self.courante
+        self.courante = self._suivante(identifiant, operation)
+        self._par_entite[identifiant] = self.courante
+        return self.courante
+
+    def retirer(self, identifiant: str) -> int:
+        if self._differees is not None:
+            self._differees.append((identifiant, SUPPRESSION))
+            return self.courante
+        self.courante = self._suivante(identifiant, SUPPRESSION)
+        self._par_entite.pop(identifiant, None)
+        return self.courante
+
+    def differer(self) -> None:
+        """Retient les mutations suivantes jusqu'à :meth:`reprendre`."""
+
+        self._differees = []
+
+    def reprendre(self, *, abandonner: bool = False) -> None:
+        """Publie les mutations retenues dans l'ordre, ou les oublie avec ``abandonner``."""
+
+        differees, self._differees = self._differees, None
+        if abandonner or not differees:
+            return
+        for identifiant, operation in differees:
+            if operation == SUPPRESSION:
+                self.retirer(identifiant)
+            else:
+                self.incrementer(identifiant, operation)
+
+    def revision(self, identifiant: str) -> int:
+        return self._par_entite.get(identifiant, self._initiale)
+
+    def _suivante(self, identifiant: str, operation: str) -> int:
+        if self._journal is None:
+            return self.courante + 1
+        return self._journal.enregistrer(self._collection, operation, identifiant)
@@ -0,0 +1,71 @@
+"""Verrou lecteurs/écrivain partagé par les dépôts."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import threading
+from typing import Iterator
+
+
+class VerrouLectureEcriture:
+    """Verrou partagé en lecture, exclusif en écriture.
+
+    Les écrivains sont prioritaires : un lecteur qui arrive pendant qu'un
+    écrivain attend patiente, si bien qu'un flux continu de lectures ne bloque
+    pas les écritures. Le verrou est réentrant pour un même thread (un écrivain
+    peut relire ou réécrire, un lecteur peut relire) ; passer de la lecture à
+    l'écriture est refusé, car deux lecteurs qui le tenteraient s'attendraient
+    mutuellement.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition(threading.Lock())
+        self._lecteurs = 0
+        self._ecrivain: int | None = None
+        self._ecrivains_en_attente = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def lecture(self) -> Iterator[None]:
+        if self._ecrivain == threading.get_ident():
+            yield
+            return
+        profondeur = getattr(self._local, "lectures", 0)
+        if not profondeur:
+            with self._condition:
+                while self._ecrivain is not None or self._ecrivains_en_attente:
+                    self._condition.wait()
+                self._lecteurs += 1
+        self._local.lectures = profondeur + 1
+        try:
+            yield
+        finally:
+            self._local.lectures = profondeur
+            if not profondeur:
+                with self._condition:
+                    self._lecteurs -= 1
+                    if not self._lecteurs:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def ecriture(self) -> Iterator[None]:
+        ident = threading.get_ident()
+        if self._ecrivain == ident:
+            yield
+            return
+        if getattr(self._local, "lectures", 0):
+            raise RuntimeError("Impossible de passer d'un verrou de lecture à un verrou d'écriture.")
+        with self._condition:
+            self._ecrivains_en_attente += 1
+            try:
+                while self._ecrivain is not None or self._lecteurs:
+                    self._condition.wait()
+            finally:
+                self._ecrivains_en_attente -= 1
+            self._ecrivain = ident
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._ecrivain = None
+                self._condition.notify_all()
@@ -0,0 +1,127 @@
+"""Compilation des templates au format ``str.format``.
+
+Un template est analysé une seule fois, puis mémorisé selon son texte : la
+liste de segments littéraux et de champs (avec leurs accès ``.attribut`` /
+``[clé]``, conversion et format) ainsi que l'ensemble des variables racines
+requises. Le rendu se réduit alors à une jointure et la validation à une
+différence d'ensembles.
+
+Le rendu reproduit ``template.format_map(defaultdict(str, variables))`` : une
+variable absente est remplacée par une chaîne vide.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Mapping
+
+TEMPLATES_EN_CACHE = 1024
+
+_CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+
+
+@dataclass(frozen=True)
+class _Champ:
+    racine: str | None
+    acces: tuple[tuple[bool, Any], ...]
+    conversion: str | None
+    format: str | TemplateCompile
+
+
+@dataclass(frozen=True)
+class TemplateCompile:
+    texte: str
+    segments: tuple[str | _Champ, ...]
+    racines: frozenset[str]
+
+    def rendre(self, variables: Mapping[str, Any]) -> str:
+        morceaux = []
+        for segment in self.segments:
+            if type(segment) is str:
+                morceaux.append(segment)
+                continue
+            if segment.racine is None:
+                raise ValueError("Format string contains positional fields")
+            valeur = variables.get(segment.racine, "")
+            for est_attribut, cle in segment.acces:
+                valeur = getattr(valeur, cle) if est_attribut else valeur[cle]
+            if segment.conversion is not None:
+                valeur = _CONVERSIONS[segment.conversion](valeur)
+            specification = segment.format
+            if type(specification) is not str:
+                specification = specification.rendre(variables)
+            if not specification and type(valeur) is str:
+                morceaux.append(valeur)
+            else:
+                morceaux.append(format(valeur, specification))
+        return "".join(morceaux)
+
+
+@lru_cache(maxsize=TEMPLATES_EN_CACHE)
+def compiler_template(texte: str) -> TemplateCompile:
+    """Analyse un template ; lève ValueError s'il est mal formé."""
+
+    segments: list[str | _Champ] = []
+    racines = set()
+    for litteral, nom_champ, specification, conversion in Formatter().parse(texte):
+        if litteral:
+            segments.append(litteral)
+        if nom_champ is None:
+            continue
+        if conversion is not None and conversion not in _CONVERSIONS:
+            raise ValueError(f"Conversion inconnue dans le template: !{conversion}")
+        racine, acces = _decouper_nom_champ(nom_champ)
+        segments.append(
+            _Champ(
+                racine=racine if isinstance(racine, str) and racine else None,
+                acces=acces,
+                conversion=conversion,
+                format=compiler_template(specification) if "{" in specification else specification,
+            )
+        )
+        nom_racine = nom_champ.split(".")[0].split("[")[0]
+        if nom_racine:
+            racines.add(nom_racine)
+    return TemplateCompile(texte=texte, segments=tuple(segments), racines=frozenset(racines))
+
+
+def _decouper_nom_champ(nom: str) -> tuple[int | str, tuple[tuple[bool, int | str], ...]]:
+    """Sépare ``a.b[0]`` en racine et accès ``(est_attribut, clé)``, comme ``str.format``.
+
+    Une racine ou une clé entre crochets faite de chiffres devient un entier ;
+    les erreurs sont celles que lèverait ``str.format``.
+    """
+
+    position = len(nom)
+    for indice, caractere in enumerate(nom):
+        if caractere in ".[":
+            position = indice
+            break
+    racine = _entier_ou_texte(nom[:position])
+    acces = []
+    while position < len(nom):
+        caractere = nom[position]
+        debut = position + 1
+        if caractere == ".":
+            position = debut
+            while position < len(nom) and nom[position] not in ".[":
+                position += 1
+            cle: int | str = nom[debut:position]
+        elif caractere == "[":
+            position = nom.find("]", debut)
+            if position < 0:
+                raise ValueError("Missing ']' in format string")
+            cle = _entier_ou_texte(nom[debut:position])
+            position += 1
+        else:
+            raise ValueError("Only '.' or '[' may follow ']' in format field specifier")
+        if cle == "":
+            raise ValueError("Empty attribute in format string")
+        acces.append((caractere == ".", cle))
+    return racine, tuple(acces)
+
+
+def _entier_ou_texte(texte: str) -> int | str:
+    return int(texte) if texte.isdecimal() else texte
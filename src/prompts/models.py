@@ -2,19 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from string import Formatter
 from typing import Any
 
-
-def _extraire_variables(template: str) -> set[str]:
-    variables = set()
-    for _, field_name, _, _ in Formatter().parse(template):
-        if not field_name:
-            continue
-        racine = field_name.split(".")[0].split("[")[0]
-        if racine:
-            variables.add(racine)
-    return variables
+from .compilation import TemplateCompile, compiler_template
 
 
 def valider_template(template: str) -> None:
@@ -26,7 +16,7 @@ def valider_variables(template: str, variables: dict[str, Any]) -> None:
     for cle in variables.keys():
         if not isinstance(cle, str) or not cle.strip():
             raise ValueError("Chaque variable doit avoir une clé de type chaîne non vide.")
-    manquantes = _extraire_variables(template) - set(variables.keys())
+    manquantes = compiler_template(template).racines - variables.keys()
     if manquantes:
         raise ValueError(
             "Variables manquantes pour le template: "
@@ -41,6 +31,10 @@ class PromptVersion:
     version: int = 1
     cree_le: str = field(default_factory=lambda: datetime.utcnow().isoformat())
 
+    @property
+    def compile(self) -> TemplateCompile:
+        return compiler_template(self.template)
+
 
 @dataclass(frozen=True)
 class PromptExecution:
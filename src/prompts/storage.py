@@ -4,19 +4,37 @@ import json
 from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator, Sequence
 from uuid import uuid4
 
+from ..persistence import (
+    CREATION,
+    MISE_A_JOUR,
+    CacheJson,
+    CompteurRevisions,
+    JournalChangements,
+    VerrouLectureEcriture,
+    ecrire_atomiquement,
+)
+from .compilation import compiler_template
 from .models import Prompt, PromptExecution, PromptVersion, valider_template, valider_variables
 
 
 class PromptRepository:
-    def __init__(self, base_path: Path | None = None) -> None:
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        *,
+        journal: JournalChangements | None = None,
+    ) -> None:
         if base_path is None:
             base_path = Path(__file__).resolve().parents[2] / "data"
         self.store_path = _resolve_store_path(base_path, "prompts.json")
         self.store_path.parent.mkdir(parents=True, exist_ok=True)
         self._cache: dict[str, dict[str, object]] = {}
+        self._json = CacheJson()
+        self._revisions = CompteurRevisions(journal, "prompts")
+        self._verrou = VerrouLectureEcriture()
         self._charger()
 
     def creer(self, nom: str, *, template: str, variables: dict[str, object] | None = None) -> Prompt:
@@ -32,18 +50,56 @@ class PromptRepository:
             nom=nom,
             versions=[version],
         )
-        self._enregistrer(prompt)
+        with self._verrou.ecriture():
+            self._enregistrer(prompt)
         return prompt
 
     def lire(self, identifiant: str) -> Prompt:
-        payload = self._cache.get(identifiant)
+        with self._verrou.lecture():
+            payload = self._cache.get(identifiant)
         if payload is None:
             raise FileNotFoundError(f"Prompt introuvable: {identifiant}")
         return _prompt_from_dict(payload)
 
     def lister(self) -> Iterable[Prompt]:
-        for payload in self._cache.values():
-            yield _prompt_from_dict(payload)
+        with self._verrou.lecture():
+            payloads = list(self._cache.values())
+        return (_prompt_from_dict(payload) for payload in payloads)
+
+    @property
+    def revision_collection(self) -> int:
+        return self._revisions.courante
+
+    def revision(self, identifiant: str) -> int:
+        if identifiant not in self._cache:
+            raise FileNotFoundError(f"Prompt introuvable: {identifiant}")
+        return self._revisions.revision(identifiant)
+
+    def structures_memoire(self) -> dict[str, object]:
+        """Structures tenues en mémoire, pour la comptabilité de ``/admin/memoire``.
+
+        ``enregistrements`` est le cache ``identifiant -> enregistrement``.
+        """
+
+        return {
+            "enregistrements": self._cache,
+            "json": self._json.encodes,
+        }
+
+    def lire_json(self, identifiant: str, champs: Sequence[str] | None = None) -> bytes:
+        with self._verrou.lecture():
+            payload = self._cache.get(identifiant)
+            if payload is None:
+                raise FileNotFoundError(f"Prompt introuvable: {identifiant}")
+            if champs:
+                return self._json.encoder_champs(payload, champs)
+            return self._json.encoder(identifiant, payload)
+
+    def lister_json(self, champs: Sequence[str] | None = None) -> Iterable[bytes]:
+        with self._verrou.lecture():
+            if champs:
+                return [self._json.encoder_champs(payload, champs) for payload in self._cache.values()]
+            return [self._json.encoder(identifiant, payload) for identifiant, payload in self._cache.items()]
 
     def mettre_a_jour(
         self,
@@ -52,25 +108,26 @@ class PromptRepository:
         template: str,
         variables: dict[str, object] | None = None,
     ) -> Prompt:
-        prompt = self.lire(identifiant)
         variables = dict(variables or {})
         valider_template(template)
         valider_variables(template, variables)
-        nouvelle_version = PromptVersion(
-            template=template,
-            variables=variables,
-            version=prompt.derniere_version().version + 1,
-        )
-        prompt = Prompt(
-            identifiant=prompt.identifiant,
-            nom=prompt.nom,
-            versions=[*prompt.versions, nouvelle_version],
-            executions=list(prompt.executions),
-            cree_le=prompt.cree_le,
-            modifie_le=datetime.utcnow().isoformat(),
-            version_schema=prompt.version_schema,
-        )
-        self._enregistrer(prompt)
+        with self._verrou.ecriture():
+            prompt = self.lire(identifiant)
+            nouvelle_version = PromptVersion(
+                template=template,
+                variables=variables,
+                version=prompt.derniere_version().version + 1,
+            )
+            prompt = Prompt(
+                identifiant=prompt.identifiant,
+                nom=prompt.nom,
+                versions=[*prompt.versions, nouvelle_version],
+                executions=list(prompt.executions),
+                cree_le=prompt.cree_le,
+                modifie_le=datetime.utcnow().isoformat(),
+                version_schema=prompt.version_schema,
+            )
+            self._enregistrer(prompt)
         return prompt
 
     def enregistrer_execution(
@@ -80,35 +137,112 @@ class PromptRepository:
         version: int | None = None,
         contexte: dict[str, object] | None = None,
     ) -> PromptExecution:
-        prompt = self.lire(identifiant)
-        cible_version = version or prompt.derniere_version().version
-        if all(entree.version != cible_version for entree in prompt.versions):
-            raise ValueError(
-                f"Version de prompt inconnue: {cible_version} pour {identifiant}."
+        _, executions = self.enregistrer_executions(identifiant, [contexte or {}], version=version)
+        return executions[0]
+
+    def enregistrer_executions(
+        self,
+        identifiant: str,
+        contextes: Iterable[dict[str, object]],
+        *,
+        version: int | None = None,
+    ) -> tuple[PromptVersion, list[PromptExecution]]:
+        """Consigne une exécution par contexte avec une seule sauvegarde.
+
+        Retourne la version ciblée (la dernière par défaut) et les exécutions
+        créées, dans l'ordre des contextes.
+        """
+
+        with self._verrou.ecriture():
+            payload = self._cache.get(identifiant)
+            if payload is None:
+                raise FileNotFoundError(f"Prompt introuvable: {identifiant}")
+            versions = payload.get("versions", [])
+            if not versions:
+                raise ValueError("Le prompt ne contient aucune version.")
+            cible_version = version or versions[-1]["version"]
+            version_payload = next(
+                (entree for entree in versions if entree["version"] == cible_version),
+                None,
             )
-        execution = PromptExecution(
-            identifiant=str(uuid4()),
-            version=cible_version,
-            contexte=dict(contexte or {}),
-        )
-        prompt = Prompt(
-            identifiant=prompt.identifiant,
-            nom=prompt.nom,
-            versions=list(prompt.versions),
-            executions=[*prompt.executions, execution],
-            cree_le=prompt.cree_le,
-            modifie_le=datetime.utcnow().isoformat(),
-            version_schema=prompt.version_schema,
-        )
-        self._enregistrer(prompt)
-        return execution
+            if version_payload is None:
+                raise ValueError(
+                    f"Version de prompt inconnue: {cible_version} pour {identifiant}."
+                )
+            executions = [
+                PromptExecution(
+                    identifiant=str(uuid4()),
+                    version=cible_version,
+                    contexte=dict(contexte),
+                )
+                for contexte in contextes
+            ]
+            self._cache[identifiant] = {
+                **payload,
+                "executions": [*payload.get("executions", []), *map(asdict, executions)],
+                "modifie_le": datetime.utcnow().isoformat(),
+            }
+            self._json.invalider(identifiant)
+            self._revisions.incrementer(identifiant, MISE_A_JOUR)
+            self._sauvegarder()
+        return PromptVersion(**version_payload), executions
+
+    def exporter(self) -> Iterator[dict[str, object]]:
+        """Parcourt un instantané des enregistrements stockés, sans les hydrater."""
+
+        with self._verrou.lecture():
+            return iter(list(self._cache.values()))
+
+    def normaliser(self, payload: dict[str, object]) -> dict[str, object]:
+        """Valide un enregistrement importé et le remet au format stocké."""
+
+        try:
+            prompt = _prompt_from_dict(payload)
+            for version in prompt.versions:
+                valider_template(version.template)
+                compiler_template(version.template)
+            return _prompt_to_dict(prompt)
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise ValueError(f"Prompt invalide: {exc!r}") from exc
+
+    def importer_lot(
+        self,
+        payloads: list[dict[str, object]],
+        *,
+        remplacer: bool,
+    ) -> dict[str, int]:
+        """Applique un lot d'enregistrements normalisés avec une seule sauvegarde."""
+
+        compteurs = {"crees": 0, "remplaces": 0, "ignores": 0}
+        with self._verrou.ecriture():
+            for payload in payloads:
+                identifiant = payload["identifiant"]
+                if identifiant in self._cache:
+                    if not remplacer:
+                        compteurs["ignores"] += 1
+                        continue
+                    compteurs["remplaces"] += 1
+                    operation = MISE_A_JOUR
+                else:
+                    compteurs["crees"] += 1
+                    operation = CREATION
+                self._cache[identifiant] = payload
+                self._json.invalider(identifiant)
+                self._revisions.incrementer(identifiant, operation)
+            if compteurs["crees"] or compteurs["remplaces"]:
+                self._sauvegarder()
+        return compteurs
 
     def _enregistrer(self, prompt: Prompt) -> None:
         payload = _prompt_to_dict(prompt)
+        operation = MISE_A_JOUR if prompt.identifiant in self._cache else CREATION
         self._cache[prompt.identifiant] = payload
+        self._json.invalider(prompt.identifiant)
+        self._revisions.incrementer(prompt.identifiant, operation)
         self._sauvegarder()
 
     def _charger(self) -> None:
+        self._json.invalider()
         if not self.store_path.exists():
             self._cache = {}
             return
@@ -122,10 +256,7 @@ class PromptRepository:
 
     def _sauvegarder(self) -> None:
         payload = {"items": self._cache}
-        self.store_path.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        ecrire_atomiquement(self.store_path, json.dumps(payload, ensure_ascii=False, indent=2))
 
 
 def _prompt_to_dict(prompt: Prompt) -> dict[str, object]:
@@ -16,6 +16,14 @@ def valider_personnages_ids(personnages_ids: list[str]) -> None:
             raise ValueError("Chaque identifiant de personnage doit être une chaîne non vide.")
 
 
+def valider_identifiants_uniques(identifiants: list[str], libelle: str) -> None:
+    vus: set[str] = set()
+    for identifiant in identifiants:
+        if identifiant in vus:
+            raise ValueError(f"{libelle} en double: {identifiant}")
+        vus.add(identifiant)
+
+
 def valider_scene(scene: Scene) -> None:
     _valider_texte("titre", scene.titre)
     _valider_texte("resume", scene.resume)
@@ -26,6 +34,7 @@ def valider_acte(acte: Acte) -> None:
     _valider_texte("titre", acte.titre)
     if not acte.scenes:
         raise ValueError("Chaque acte doit contenir au moins une scène.")
+    valider_identifiants_uniques([scene.identifiant for scene in acte.scenes], "Scène")
     for scene in acte.scenes:
         valider_scene(scene)
 
@@ -34,6 +43,7 @@ def valider_scenario(scenario: Scenario) -> None:
     _valider_texte("titre", scenario.titre)
     if not scenario.actes:
         raise ValueError("Le scénario doit contenir au moins un acte.")
+    valider_identifiants_uniques([acte.identifiant for acte in scenario.actes], "Acte")
     for acte in scenario.actes:
         valider_acte(acte)
 
@@ -1,22 +1,60 @@
 from __future__ import annotations
 
 import json
+from collections import defaultdict
+from contextlib import contextmanager
 from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator, Sequence
 from uuid import uuid4
 
-from .models import Acte, Scene, Scenario, valider_scenario
+from ..persistence import (
+    CREATION,
+    MISE_A_JOUR,
+    CacheJson,
+    CompteurRevisions,
+    JournalChangements,
+    JournalOperations,
+    VerrouLectureEcriture,
+    ecrire_atomiquement,
+)
+from .models import (
+    Acte,
+    Scene,
+    Scenario,
+    _valider_texte,
+    valider_acte,
+    valider_scenario,
+    valider_scene,
+)
+
+# Nombre d'opérations journalisées au-delà duquel l'instantané est réécrit.
+OPERATIONS_AVANT_COMPACTION = 500
+
+
+class IdentifiantDuplique(ValueError):
+    """Un acte ou une scène porte déjà cet identifiant dans le même parent."""
 
 
 class ScenarioRepository:
-    def __init__(self, base_path: Path | None = None) -> None:
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        *,
+        journal: JournalChangements | None = None,
+    ) -> None:
         if base_path is None:
             base_path = Path(__file__).resolve().parents[2] / "data"
         self.store_path = _resolve_store_path(base_path, "scenarios.json")
         self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        self._operations = JournalOperations(self.store_path.with_suffix(".operations.ndjson"))
         self._cache: dict[str, dict[str, object]] = {}
+        # personnage -> {(scénario, acte, scène)}, tenu à jour à chaque écriture.
+        self._index_personnages: defaultdict[str, set[tuple[str, str, str]]] = defaultdict(set)
+        self._json = CacheJson()
+        self._revisions = CompteurRevisions(journal, "scenarios")
+        self._verrou = VerrouLectureEcriture()
         self._charger()
 
     def creer(self, titre: str, *, description: str | None = None, actes: list[Acte]) -> Scenario:
@@ -28,52 +66,543 @@ class ScenarioRepository:
             actes=actes,
         )
         valider_scenario(scenario)
-        self._enregistrer(scenario)
+        with self._verrou.ecriture():
+            self._enregistrer(scenario)
         return scenario
 
     def lire(self, identifiant: str) -> Scenario:
-        payload = self._cache.get(identifiant)
+        with self._verrou.lecture():
+            payload = self._cache.get(identifiant)
         if payload is None:
             raise FileNotFoundError(f"Scénario introuvable: {identifiant}")
         return _scenario_from_dict(payload)
 
     def lister(self) -> Iterable[Scenario]:
-        for payload in self._cache.values():
-            yield _scenario_from_dict(payload)
+        with self._verrou.lecture():
+            payloads = list(self._cache.values())
+        return (_scenario_from_dict(payload) for payload in payloads)
+
+    @property
+    def revision_collection(self) -> int:
+        return self._revisions.courante
+
+    def revision(self, identifiant: str) -> int:
+        if identifiant not in self._cache:
+            raise FileNotFoundError(f"Scénario introuvable: {identifiant}")
+        return self._revisions.revision(identifiant)
+
+    def structures_memoire(self) -> dict[str, object]:
+        """Structures tenues en mémoire, pour la comptabilité de ``/admin/memoire``.
+
+        ``enregistrements`` est le cache ``identifiant -> enregistrement``.
+        """
+
+        return {
+            "enregistrements": self._cache,
+            "json": self._json.encodes,
+            "index_personnages": self._index_personnages,
+        }
+
+    def lire_json(self, identifiant: str, champs: Sequence[str] | None = None) -> bytes:
+        with self._verrou.lecture():
+            payload = self._cache.get(identifiant)
+            if payload is None:
+                raise FileNotFoundError(f"Scénario introuvable: {identifiant}")
+            if champs:
+                return self._json.encoder_champs(payload, champs)
+            return self._json.encoder(identifiant, payload)
+
+    def lister_json(self, champs: Sequence[str] | None = None) -> Iterable[bytes]:
+        with self._verrou.lecture():
+            if champs:
+                return [self._json.encoder_champs(payload, champs) for payload in self._cache.values()]
+            return [self._json.encoder(identifiant, payload) for identifiant, payload in self._cache.items()]
+
+    def references_personnage(self, character_id: str) -> list[dict[str, object]]:
+        """Scènes qui référencent un personnage, sans parcourir les scénarios."""
+
+        scenes_par_scenario: dict[str, set[tuple[str, str]]] = defaultdict(set)
+        with self._verrou.lecture():
+            for scenario_id, acte_id, scene_id in self._index_personnages.get(character_id, ()):
+                scenes_par_scenario[scenario_id].add((acte_id, scene_id))
+            payloads = {scenario_id: self._cache[scenario_id] for scenario_id in scenes_par_scenario}
+        references = []
+        for scenario_id, scenes in sorted(scenes_par_scenario.items()):
+            payload = payloads[scenario_id]
+            for acte in payload.get("actes", []):
+                for scene in acte.get("scenes", []):
+                    if (acte["identifiant"], scene["identifiant"]) in scenes:
+                        references.append(
+                            {
+                                "scenario_id": scenario_id,
+                                "scenario_titre": payload["titre"],
+                                "acte_id": acte["identifiant"],
+                                "acte_titre": acte["titre"],
+                                "scene_id": scene["identifiant"],
+                                "scene_titre": scene["titre"],
+                            }
+                        )
+        return references
+
+    def scenarios_personnage(self, character_id: str) -> list[dict[str, object]]:
+        """Scénarios qui référencent un personnage, avec le nombre de scènes concernées."""
+
+        scenes_par_scenario: dict[str, int] = defaultdict(int)
+        with self._verrou.lecture():
+            for scenario_id, _, _ in self._index_personnages.get(character_id, ()):
+                scenes_par_scenario[scenario_id] += 1
+            return [
+                {
+                    "identifiant": scenario_id,
+                    "titre": self._cache[scenario_id]["titre"],
+                    "scenes": nombre,
+                }
+                for scenario_id, nombre in sorted(scenes_par_scenario.items())
+            ]
+
+    @contextmanager
+    def verrouiller(self) -> Iterator[None]:
+        """Tient le dépôt verrouillé en écriture pendant tout le bloc.
+
+        Une vérification faite dans le bloc (existence d'un personnage, scènes
+        qui le citent) reste vraie jusqu'à la mutation qui en dépend.
+        """
+
+        with self._verrou.ecriture():
+            yield
+
+    def est_reference(self, character_id: str) -> bool:
+        with self._verrou.lecture():
+            return bool(self._index_personnages.get(character_id))
+
+    def retirer_personnage(self, character_id: str) -> int:
+        """Retire un personnage de toutes les scènes qui le citent ; retourne le nombre de scènes modifiées."""
+
+        with self._verrou.ecriture():
+            return self._retirer_personnage(character_id)
+
+    def _retirer_personnage(self, character_id: str) -> int:
+        references = self._index_personnages.pop(character_id, set())
+        scenario_ids = {scenario_id for scenario_id, _, _ in references}
+        for scenario_id in scenario_ids:
+            scenario = _scenario_from_dict(self._cache[scenario_id])
+            actes = [
+                Acte(
+                    identifiant=acte.identifiant,
+                    titre=acte.titre,
+                    scenes=[
+                        Scene(
+                            identifiant=scene.identifiant,
+                            titre=scene.titre,
+                            resume=scene.resume,
+                            personnages_ids=[
+                                identifiant
+                                for identifiant in scene.personnages_ids
+                                if identifiant != character_id
+                            ],
+                            metadonnees=scene.metadonnees,
+                        )
+                        for scene in acte.scenes
+                    ],
+                    metadonnees=acte.metadonnees,
+                )
+                for acte in scenario.actes
+            ]
+            scenario = Scenario(
+                identifiant=scenario.identifiant,
+                titre=scenario.titre,
+                description=scenario.description,
+                actes=actes,
+                cree_le=scenario.cree_le,
+                modifie_le=scenario.modifie_le,
+                version_schema=scenario.version_schema,
+            ).mettre_a_jour_timestamp()
+            self._enregistrer(scenario, sauvegarder=False)
+        if scenario_ids:
+            self._sauvegarder()
+        return len(references)
 
     def mettre_a_jour(self, scenario: Scenario) -> Scenario:
-        if scenario.identifiant not in self._cache:
-            raise FileNotFoundError(
-                f"Impossible de mettre à jour un scénario inexistant: {scenario.identifiant}"
-            )
         valider_scenario(scenario)
-        scenario = scenario.mettre_a_jour_timestamp()
-        self._enregistrer(scenario)
+        with self._verrou.ecriture():
+            if scenario.identifiant not in self._cache:
+                raise FileNotFoundError(
+                    f"Impossible de mettre à jour un scénario inexistant: {scenario.identifiant}"
+                )
+            scenario = scenario.mettre_a_jour_timestamp()
+            self._enregistrer(scenario)
         return scenario
 
-    def _enregistrer(self, scenario: Scenario) -> None:
+    def modifier(self, identifiant: str, transformation: Callable[[Scenario], Scenario]) -> Scenario:
+        """Lit, transforme et enregistre un scénario sans mutation concurrente intercalée."""
+
+        with self._verrou.ecriture():
+            return self.mettre_a_jour(transformation(self.lire(identifiant)))
+
+    def ajouter_acte(self, scenario_id: str, acte: Acte, *, position: int | None = None) -> dict[str, object]:
+        valider_acte(acte)
+        acte_payload = asdict(acte)
+        with self._verrou.ecriture():
+            payload = self._payload(scenario_id)
+            _verifier_absent(payload["actes"], acte.identifiant, "Acte")
+            _verifier_position(position, len(payload["actes"]))
+            self._appliquer(
+                {"type": "ajout_acte", "scenario": scenario_id, "acte": acte_payload, "position": position}
+            )
+        return acte_payload
+
+    def modifier_acte(
+        self,
+        scenario_id: str,
+        acte_id: str,
+        champs: dict[str, object],
+        *,
+        position: int | None = None,
+    ) -> dict[str, object]:
+        """Modifie le titre ou les métadonnées d'un acte et/ou le déplace."""
+
+        if "titre" in champs:
+            _valider_texte("titre", champs["titre"])
+        with self._verrou.ecriture():
+            payload = self._payload(scenario_id)
+            _indice(payload["actes"], acte_id, "Acte")
+            nouvel_identifiant = champs.get("identifiant", acte_id)
+            if nouvel_identifiant != acte_id:
+                _verifier_absent(payload["actes"], nouvel_identifiant, "Acte")
+            _verifier_position(position, len(payload["actes"]) - 1)
+            payload = self._appliquer(
+                {
+                    "type": "modification_acte",
+                    "scenario": scenario_id,
+                    "acte_id": acte_id,
+                    "champs": champs,
+                    "position": position,
+                }
+            )
+        return payload["actes"][_indice(payload["actes"], champs.get("identifiant", acte_id), "Acte")]
+
+    def supprimer_acte(self, scenario_id: str, acte_id: str) -> None:
+        with self._verrou.ecriture():
+            payload = self._payload(scenario_id)
+            _indice(payload["actes"], acte_id, "Acte")
+            if len(payload["actes"]) == 1:
+                raise ValueError("Le scénario doit contenir au moins un acte.")
+            self._appliquer({"type": "suppression_acte", "scenario": scenario_id, "acte_id": acte_id})
+
+    def ajouter_scene(
+        self,
+        scenario_id: str,
+        acte_id: str,
+        scene: Scene,
+        *,
+        position: int | None = None,
+    ) -> dict[str, object]:
+        valider_scene(scene)
+        scene_payload = asdict(scene)
+        with self._verrou.ecriture():
+            payload = self._payload(scenario_id)
+            acte_payload = payload["actes"][_indice(payload["actes"], acte_id, "Acte")]
+            _verifier_absent(acte_payload["scenes"], scene.identifiant, "Scène")
+            _verifier_position(position, len(acte_payload["scenes"]))
+            self._appliquer(
+                {
+                    "type": "ajout_scene",
+                    "scenario": scenario_id,
+                    "acte_id": acte_id,
+                    "scene": scene_payload,
+                    "position": position,
+                }
+            )
+        return scene_payload
+
+    def modifier_scene(
+        self,
+        scenario_id: str,
+        acte_id: str,
+        scene_id: str,
+        champs: dict[str, object],
+        *,
+        acte_cible: str | None = None,
+        position: int | None = None,
+    ) -> dict[str, object]:
+        """Modifie une scène et/ou la déplace, éventuellement dans un autre acte."""
+
+        with self._verrou.ecriture():
+            payload = self._payload(scenario_id)
+            acte_payload = payload["actes"][_indice(payload["actes"], acte_id, "Acte")]
+            scene_payload = acte_payload["scenes"][_indice(acte_payload["scenes"], scene_id, "Scène")]
+            valider_scene(Scene(**{**scene_payload, **champs}))
+            nouvel_identifiant = champs.get("identifiant", scene_id)
+            if acte_cible is not None and acte_cible != acte_id:
+                cible = payload["actes"][_indice(payload["actes"], acte_cible, "Acte")]
+                if len(acte_payload["scenes"]) == 1:
+                    raise ValueError("Chaque acte doit contenir au moins une scène.")
+                _verifier_absent(cible["scenes"], nouvel_identifiant, "Scène")
+                _verifier_position(position, len(cible["scenes"]))
+            else:
+                acte_cible = None
+                if nouvel_identifiant != scene_id:
+                    _verifier_absent(acte_payload["scenes"], nouvel_identifiant, "Scène")
+                _verifier_position(position, len(acte_payload["scenes"]) - 1)
+            payload = self._appliquer(
+                {
+                    "type": "modification_scene",
+                    "scenario": scenario_id,
+                    "acte_id": acte_id,
+                    "scene_id": scene_id,
+                    "champs": champs,
+                    "acte_cible": acte_cible,
+                    "position": position,
+                }
+            )
+        acte_payload = payload["actes"][_indice(payload["actes"], acte_cible or acte_id, "Acte")]
+        return acte_payload["scenes"][_indice(acte_payload["scenes"], nouvel_identifiant, "Scène")]
+
+    def supprimer_scene(self, scenario_id: str, acte_id: str, scene_id: str) -> None:
+        with self._verrou.ecriture():
+            payload = self._payload(scenario_id)
+            acte_payload = payload["actes"][_indice(payload["actes"], acte_id, "Acte")]
+            _indice(acte_payload["scenes"], scene_id, "Scène")
+            if len(acte_payload["scenes"]) == 1:
+                raise ValueError("Chaque acte doit contenir au moins une scène.")
+            self._appliquer(
+                {"type": "suppression_scene", "scenario": scenario_id, "acte_id": acte_id, "scene_id": scene_id}
+            )
+
+    def exporter(self) -> Iterator[dict[str, object]]:
+        """Parcourt un instantané des enregistrements stockés, sans les hydrater."""
+
+        with self._verrou.lecture():
+            return iter(list(self._cache.values()))
+
+    def normaliser(self, payload: dict[str, object]) -> dict[str, object]:
+        """Valide un enregistrement importé et le remet au format stocké."""
+
+        try:
+            scenario = _scenario_from_dict(payload)
+            valider_scenario(scenario)
+            return _scenario_to_dict(scenario)
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise ValueError(f"Scénario invalide: {exc!r}") from exc
+
+    def importer_lot(
+        self,
+        payloads: list[dict[str, object]],
+        *,
+        remplacer: bool,
+    ) -> dict[str, int]:
+        """Applique un lot d'enregistrements normalisés avec une seule sauvegarde."""
+
+        compteurs = {"crees": 0, "remplaces": 0, "ignores": 0}
+        with self._verrou.ecriture():
+            for payload in payloads:
+                identifiant = payload["identifiant"]
+                if identifiant in self._cache:
+                    if not remplacer:
+                        compteurs["ignores"] += 1
+                        continue
+                    compteurs["remplaces"] += 1
+                    operation = MISE_A_JOUR
+                else:
+                    compteurs["crees"] += 1
+                    operation = CREATION
+                self._remplacer_payload(identifiant, payload)
+                self._revisions.incrementer(identifiant, operation)
+            if compteurs["crees"] or compteurs["remplaces"]:
+                self._sauvegarder()
+        return compteurs
+
+    def _enregistrer(self, scenario: Scenario, *, sauvegarder: bool = True) -> None:
         payload = _scenario_to_dict(scenario)
-        self._cache[scenario.identifiant] = payload
-        self._sauvegarder()
+        operation = MISE_A_JOUR if scenario.identifiant in self._cache else CREATION
+        self._remplacer_payload(scenario.identifiant, payload)
+        self._revisions.incrementer(scenario.identifiant, operation)
+        if sauvegarder:
+            self._sauvegarder()
+
+    def _payload(self, identifiant: str) -> dict[str, object]:
+        payload = self._cache.get(identifiant)
+        if payload is None:
+            raise FileNotFoundError(f"Scénario introuvable: {identifiant}")
+        return payload
+
+    def _appliquer(self, operation: dict[str, object]) -> dict[str, object]:
+        """Applique une opération locale validée et l'ajoute au journal d'opérations.
+
+        L'opération porte sur une copie de la structure du scénario, qui
+        remplace ensuite l'original : un instantané pris par un lecteur n'est
+        jamais modifié. Retourne le nouveau payload.
+        """
+
+        identifiant = operation["scenario"]
+        operation["modifie_le"] = datetime.utcnow().isoformat()
+        payload = _copier_structure(self._cache[identifiant])
+        retirees, ajoutees = _appliquer_operation(payload, operation)
+        self._cache[identifiant] = payload
+        self._indexer(identifiant, retirees, ajouter=False)
+        self._indexer(identifiant, ajoutees, ajouter=True)
+        self._json.invalider(identifiant)
+        self._revisions.incrementer(identifiant, MISE_A_JOUR)
+        self._operations.ajouter(operation)
+        if self._operations.en_attente >= OPERATIONS_AVANT_COMPACTION:
+            self._sauvegarder()
+        return payload
+
+    def _indexer(
+        self,
+        scenario_id: str,
+        scenes: Iterable[tuple[str, dict[str, object]]],
+        *,
+        ajouter: bool,
+    ) -> None:
+        for acte_id, scene in scenes:
+            cle = (scenario_id, acte_id, scene["identifiant"])
+            for character_id in scene.get("personnages_ids", []):
+                if ajouter:
+                    self._index_personnages[character_id].add(cle)
+                    continue
+                references = self._index_personnages.get(character_id)
+                if references is not None:
+                    references.discard(cle)
+                    if not references:
+                        del self._index_personnages[character_id]
+
+    def _remplacer_payload(self, identifiant: str, payload: dict[str, object]) -> None:
+        ancien = self._cache.get(identifiant)
+        if ancien is not None:
+            self._indexer(identifiant, _scenes_payload(ancien), ajouter=False)
+        self._cache[identifiant] = payload
+        self._json.invalider(identifiant)
+        self._indexer(identifiant, _scenes_payload(payload), ajouter=True)
 
     def _charger(self) -> None:
-        if not self.store_path.exists():
-            self._cache = {}
-            return
-        contenu = json.loads(self.store_path.read_text(encoding="utf-8"))
-        if isinstance(contenu, dict):
-            items = contenu.get("items", contenu)
-            if isinstance(items, dict):
-                self._cache = dict(items)
-                return
+        self._json.invalider()
         self._cache = {}
+        self._index_personnages.clear()
+        items: dict[str, dict[str, object]] = {}
+        sequence = 0
+        if self.store_path.exists():
+            contenu = json.loads(self.store_path.read_text(encoding="utf-8"))
+            if isinstance(contenu, dict):
+                sequence = contenu.get("sequence_operations", 0)
+                items = contenu.get("items", contenu)
+                if not isinstance(items, dict):
+                    items = {}
+        for operation in self._operations.relire(sequence):
+            payload = items.get(operation["scenario"])
+            if payload is not None:
+                _appliquer_operation(payload, operation)
+        for identifiant, payload in items.items():
+            self._remplacer_payload(identifiant, payload)
 
     def _sauvegarder(self) -> None:
-        payload = {"items": self._cache}
-        self.store_path.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        payload = {"items": self._cache, "sequence_operations": self._operations.sequence}
+        ecrire_atomiquement(self.store_path, json.dumps(payload, ensure_ascii=False, indent=2))
+        self._operations.vider()
+
+
+def _scenes_payload(payload: dict[str, object]) -> Iterator[tuple[str, dict[str, object]]]:
+    for acte in payload.get("actes", []):
+        for scene in acte.get("scenes", []):
+            yield acte["identifiant"], scene
+
+
+def _copier_structure(payload: dict[str, object]) -> dict[str, object]:
+    """Copie le scénario jusqu'aux scènes ; les valeurs des champs restent partagées."""
+
+    return {
+        **payload,
+        "actes": [
+            {**acte, "scenes": [dict(scene) for scene in acte.get("scenes", [])]}
+            for acte in payload.get("actes", [])
+        ],
+    }
+
+
+def _appliquer_operation(
+    payload: dict[str, object],
+    operation: dict[str, object],
+) -> tuple[list[tuple[str, dict[str, object]]], list[tuple[str, dict[str, object]]]]:
+    """Applique une opération journalisée sur un scénario stocké, en place.
+
+    Utilisée à l'identique en direct et au rejeu du journal. Retourne les
+    scènes retirées et ajoutées, sous forme ``(acte, scène)``, pour la mise à
+    jour de l'index des personnages.
+    """
+
+    actes = payload["actes"]
+    type_operation = operation["type"]
+    retirees: list[tuple[str, dict[str, object]]] = []
+    ajoutees: list[tuple[str, dict[str, object]]] = []
+    if type_operation == "ajout_acte":
+        acte = operation["acte"]
+        _inserer(actes, acte, operation["position"])
+        ajoutees = [(acte["identifiant"], scene) for scene in acte["scenes"]]
+    elif type_operation == "modification_acte":
+        indice = _indice(actes, operation["acte_id"], "Acte")
+        acte = actes.pop(indice)
+        acte.update(operation["champs"])
+        _inserer(actes, acte, operation["position"], defaut=indice)
+        if acte["identifiant"] != operation["acte_id"]:
+            # Les clés de l'index portent l'identifiant de l'acte.
+            retirees = [(operation["acte_id"], scene) for scene in acte["scenes"]]
+            ajoutees = [(acte["identifiant"], scene) for scene in acte["scenes"]]
+    elif type_operation == "suppression_acte":
+        acte = actes.pop(_indice(actes, operation["acte_id"], "Acte"))
+        retirees = [(acte["identifiant"], scene) for scene in acte["scenes"]]
+    else:
+        acte = actes[_indice(actes, operation["acte_id"], "Acte")]
+        scenes = acte["scenes"]
+        if type_operation == "ajout_scene":
+            scene = operation["scene"]
+            _inserer(scenes, scene, operation["position"])
+            ajoutees = [(acte["identifiant"], scene)]
+        elif type_operation == "modification_scene":
+            indice = _indice(scenes, operation["scene_id"], "Scène")
+            scene = scenes.pop(indice)
+            retirees = [(acte["identifiant"], dict(scene))]
+            scene.update(operation["champs"])
+            cible = acte
+            if operation["acte_cible"] is not None:
+                cible = actes[_indice(actes, operation["acte_cible"], "Acte")]
+            _inserer(cible["scenes"], scene, operation["position"], defaut=indice)
+            ajoutees = [(cible["identifiant"], scene)]
+        elif type_operation == "suppression_scene":
+            scene = scenes.pop(_indice(scenes, operation["scene_id"], "Scène"))
+            retirees = [(acte["identifiant"], scene)]
+        else:
+            raise ValueError(f"Opération de scénario inconnue: {type_operation}")
+    payload["modifie_le"] = operation["modifie_le"]
+    return retirees, ajoutees
+
+
+def _indice(elements: list[dict[str, object]], identifiant: str, libelle: str) -> int:
+    for indice, element in enumerate(elements):
+        if element["identifiant"] == identifiant:
+            return indice
+    raise FileNotFoundError(f"{libelle} introuvable: {identifiant}")
+
+
+def _verifier_absent(elements: list[dict[str, object]], identifiant: str, libelle: str) -> None:
+    if any(element["identifiant"] == identifiant for element in elements):
+        raise IdentifiantDuplique(f"{libelle} en double: {identifiant}")
+
+
+def _inserer(
+    elements: list[dict[str, object]],
+    element: dict[str, object],
+    position: int | None,
+    *,
+    defaut: int | None = None,
+) -> None:
+    if position is None:
+        position = len(elements) if defaut is None else defaut
+    elements.insert(position, element)
+
+
+def _verifier_position(position: int | None, maximum: int) -> None:
+    if position is not None and not 0 <= position <= maximum:
+        raise ValueError(f"position doit être comprise entre 0 et {maximum}.")
 
 
 def _scenario_to_dict(scenario: Scenario) -> dict[str, object]:
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import importlib
+import sys
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+RACINE = Path(__file__).resolve().parents[1]
+if str(RACINE) not in sys.path:
+    sys.path.insert(0, str(RACINE))
+
+JETON_ADMIN = "jeton-de-test"
+
+
+@pytest.fixture
+def api(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[object]:
+    """Module ``src.api.app`` rechargé sur un dossier de données vide."""
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SEIDRA_ADMIN_TOKEN", JETON_ADMIN)
+    monkeypatch.setenv("SEIDRA_ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+    from src.api import app as module
+
+    yield importlib.reload(module)
+
+
+@pytest.fixture
+def client(api: object) -> Iterator[object]:
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        yield client
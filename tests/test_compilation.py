@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from types import SimpleNamespace
+
+import pytest
+
+from src.prompts.compilation import compiler_template
+
+VARIABLES = {
+    "lieu": "quai",
+    "heure": 7,
+    "pnj": SimpleNamespace(nom="Ada", armes=["sabre", "pistolet"]),
+    "inventaire": {"or": 12, "0": "clé", 0: "entier"},
+    "largeur": 8,
+}
+
+
+def _resultat(appel):
+    try:
+        return "ok", appel()
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError) as exc:
+        return type(exc).__name__, str(exc)
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "Scène au {lieu}",
+        "{lieu!r} à {heure:02d}h",
+        "{pnj.nom} brandit {pnj.armes[1]}",
+        "{inventaire[or]} pièces, {inventaire[0]}",
+        "{heure:>{largeur}}|{absente}|{{échappé}}",
+        "{pnj.inconnu}",
+        "{inventaire[absente]}",
+        "{pnj.armes[2]}",
+        "{0}",
+        "{}",
+        "{lieu.}",
+        "{lieu[]}",
+        "{lieu[0}",
+        "{inventaire[or]x}",
+        "{lieu",
+    ],
+)
+def test_rendu_equivalent_a_format_map(template: str) -> None:
+    attendu = _resultat(lambda: template.format_map(defaultdict(str, VARIABLES)))
+
+    obtenu = _resultat(lambda: compiler_template(template).rendre(VARIABLES))
+
+    assert obtenu == attendu
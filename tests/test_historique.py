@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from src.characters import historique as module
+from src.characters.historique import HistoriquePersonnages
+
+
+def _evenement(numero: int) -> dict[str, object]:
+    return {"titre": f"e{numero}", "contenu": "c", "date": None}
+
+
+def test_compaction_des_lignes_mortes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(module, "LIGNES_MORTES_AVANT_COMPACTION", 3)
+    chemin = tmp_path / "historique.ndjson"
+    historique = HistoriquePersonnages(chemin)
+    historique.ajouter("c1", _evenement(1))
+    historique.ajouter("c2", _evenement(2))
+    historique.remplacer("c1", [_evenement(10)])
+    assert len(chemin.read_bytes().splitlines()) == 4
+
+    # Quatre lignes mortes pour deux utiles : le seuil de 3 est dépassé.
+    historique.remplacer("c1", [_evenement(11)])
+    assert len(chemin.read_bytes().splitlines()) == 2
+    relu = HistoriquePersonnages(chemin)
+    assert relu.lire("c1") == [_evenement(11)]
+    assert relu.lire("c2") == [_evenement(2)]
+
+
+def test_ligne_tronquee_retiree_au_chargement(tmp_path: Path) -> None:
+    chemin = tmp_path / "historique.ndjson"
+    HistoriquePersonnages(chemin).ajouter("c1", _evenement(1))
+    with chemin.open("ab") as fichier:
+        fichier.write(b'{"personnage": "c1", "evenement": {"titre"')
+
+    historique = HistoriquePersonnages(chemin)
+    assert historique.lire("c1") == [_evenement(1)]
+    historique.ajouter("c1", _evenement(2))
+
+    assert HistoriquePersonnages(chemin).lire("c1") == [_evenement(1), _evenement(2)]
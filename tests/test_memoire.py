@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from src.api.memoire import INSTANTANES_MAX, SuiviAllocations
+
+from .conftest import JETON_ADMIN
+
+ENTETES = {"X-Admin-Token": JETON_ADMIN}
+
+
+def test_sites_courants_sans_evincer_les_instantanes() -> None:
+    suivi = SuiviAllocations()
+    suivi.demarrer()
+    try:
+        noms = [f"i{numero}" for numero in range(INSTANTANES_MAX)]
+        for nom in noms:
+            suivi.prendre_instantane(nom)
+        assert suivi.sites(limite=3)
+        assert suivi.noms() == noms
+    finally:
+        suivi.arreter()
+
+
+def test_rapport_memoire_couvre_les_annexes(client) -> None:
+    client.post("/characters", json={"profil": {"nom": "Lyra", "description": "d", "voix_narrative": "v"}})
+    client.get("/characters")
+
+    rapport = client.get("/admin/memoire", headers=ENTETES).json()
+
+    personnages = rapport["depots"]["characters"]
+    assert personnages["enregistrements"] == 1
+    assert set(personnages["annexes_octets"]) == {"json", "historique", "revisions_profils"}
+    assert "index_personnages" in rapport["depots"]["scenarios"]["annexes_octets"]
+    assert rapport["journal_changements_octets"] > 0
+    assert "profils_media_octets" in rapport
+
+
+def test_rapport_memoire_refuse_les_bornes_negatives(client) -> None:
+    assert client.get("/admin/memoire", params={"top": -1}, headers=ENTETES).status_code == 422
+    assert client.get("/admin/memoire", params={"allocations": -1}, headers=ENTETES).status_code == 422
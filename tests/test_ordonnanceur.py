@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from src.api import ordonnanceur as module
+from src.api.ordonnanceur import FileSaturee, OrdonnanceurRendus
+
+
+class Horloge:
+    def __init__(self) -> None:
+        self.maintenant = 1000.0
+
+    def __call__(self) -> float:
+        return self.maintenant
+
+
+@pytest.fixture
+def horloge(monkeypatch: pytest.MonkeyPatch) -> Horloge:
+    horloge = Horloge()
+    monkeypatch.setattr(module.time, "monotonic", horloge)
+    return horloge
+
+
+def test_retry_after_selon_le_debit_du_modele(horloge: Horloge) -> None:
+    ordonnanceur = OrdonnanceurRendus(workers=1, limites_groupes={"*": 1})
+
+    def duree(secondes: float):
+        def executer() -> None:
+            horloge.maintenant += secondes
+
+        return executer
+
+    for identifiant, groupe, secondes in (("l1", "lent", 10), ("l2", "lent", 10), ("r1", "rapide", 2), ("r2", "rapide", 2)):
+        ordonnanceur.soumettre(identifiant, duree(secondes), groupe=groupe).result(timeout=5)
+
+    liberation = threading.Event()
+    occupe = ordonnanceur.soumettre("occupe", lambda: liberation.wait(5), groupe="autre")
+    ordonnanceur.soumettre("l3", duree(0), groupe="lent")
+    ordonnanceur.soumettre("r3", duree(0), groupe="rapide")
+    try:
+        with pytest.raises(FileSaturee) as lent:
+            ordonnanceur.verifier_admission("lent")
+        with pytest.raises(FileSaturee) as rapide:
+            ordonnanceur.verifier_admission("rapide")
+        assert (lent.value.reessayer_dans, rapide.value.reessayer_dans) == (10, 2)
+        assert ordonnanceur.etat()["debit_par_groupe"] == {"lent": 0.1, "rapide": 0.5}
+    finally:
+        liberation.set()
+        occupe.result(timeout=5)
+
+
+def _ordre_de_service(ordonnanceur: OrdonnanceurRendus, soumettre) -> list[str]:
+    """Bloque l'unique worker, laisse ``soumettre`` remplir la file, puis relève l'ordre d'exécution."""
+
+    demarre, liberation = threading.Event(), threading.Event()
+
+    def bloquer() -> None:
+        demarre.set()
+        liberation.wait(5)
+
+    occupe = ordonnanceur.soumettre("occupe", bloquer)
+    assert demarre.wait(5)
+    ordre: list[str] = []
+    futures = soumettre(lambda identifiant: lambda: ordre.append(identifiant))
+    liberation.set()
+    occupe.result(timeout=5)
+    for future in futures:
+        future.result(timeout=5)
+    return ordre
+
+
+def test_priorite_stricte_entre_classes() -> None:
+    ordonnanceur = OrdonnanceurRendus(workers=1)
+
+    def soumettre(tache):
+        return [
+            ordonnanceur.soumettre(identifiant, tache(identifiant), priorite=priorite)
+            for identifiant, priorite in (("lot", "lot"), ("normal", "normal"), ("interactif", "interactif"))
+        ]
+
+    assert _ordre_de_service(ordonnanceur, soumettre) == ["interactif", "normal", "lot"]
+
+
+def test_partage_equitable_pondere_entre_proprietaires() -> None:
+    ordonnanceur = OrdonnanceurRendus(workers=1, poids={"bob": 2.0})
+
+    def soumettre(tache):
+        futures = [ordonnanceur.soumettre(f"ada{numero}", tache(f"ada{numero}"), proprietaire="ada") for numero in range(3)]
+        futures += [ordonnanceur.soumettre(f"bob{numero}", tache(f"bob{numero}"), proprietaire="bob") for numero in range(3)]
+        return futures
+
+    # Fins virtuelles : ada 1, 2, 3 ; bob (poids 2) 0,5, 1, 1,5.
+    assert _ordre_de_service(ordonnanceur, soumettre) == ["bob0", "ada0", "bob1", "bob2", "ada1", "ada2"]
+
+
+def test_vieillissement_promeut_les_taches_anciennes(horloge: Horloge) -> None:
+    ordonnanceur = OrdonnanceurRendus(workers=1, vieillissement_secondes=60)
+
+    def soumettre(tache):
+        futures = [ordonnanceur.soumettre("lot_ancien", tache("lot_ancien"), priorite="lot")]
+        horloge.maintenant += 61
+        futures += [
+            ordonnanceur.soumettre(identifiant, tache(identifiant), priorite=priorite)
+            for identifiant, priorite in (("lot_recent", "lot"), ("normal", "normal"), ("interactif", "interactif"))
+        ]
+        return futures
+
+    # Promue d'une classe, la tâche ancienne passe devant la classe normale, pas devant l'interactive.
+    assert _ordre_de_service(ordonnanceur, soumettre) == ["interactif", "lot_ancien", "normal", "lot_recent"]
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import asdict, replace
+from pathlib import Path
+
+import pytest
+
+from src.api.profils_media import CacheProfilsMedia
+from src.characters.models import CharacterHistoryEntry, CharacterProfile, CharacterTraits
+from src.characters import storage
+from src.characters.storage import CharacterRepository
+from src.persistence import JournalChangements
+
+
+def _profil(nom: str) -> CharacterProfile:
+    return CharacterProfile(nom=nom, description="d", voix_narrative="v")
+
+
+def test_transaction_annulee_ne_publie_aucun_changement(tmp_path: Path) -> None:
+    journal = JournalChangements()
+    repo = CharacterRepository(tmp_path, journal=journal)
+    avant = journal.sequence_courante
+
+    with pytest.raises(RuntimeError):
+        with repo.transaction():
+            repo.creer(_profil("Lyra"))
+            raise RuntimeError("échec")
+
+    assert journal.depuis(avant) == ([], False)
+    assert repo.revision_collection == avant
+    assert list(repo.lister()) == []
+
+
+def test_transaction_validee_publie_dans_l_ordre(tmp_path: Path) -> None:
+    journal = JournalChangements()
+    repo = CharacterRepository(tmp_path, journal=journal)
+    avant = journal.sequence_courante
+
+    with repo.transaction():
+        premier = repo.creer(_profil("Lyra"))
+        second = repo.creer(_profil("Nova"))
+        repo.supprimer(premier.identifiant)
+
+    changements, _ = journal.depuis(avant)
+    assert [(c.operation, c.identifiant) for c in changements] == [
+        ("creation", premier.identifiant),
+        ("creation", second.identifiant),
+        ("suppression", premier.identifiant),
+    ]
+    assert repo.revision(second.identifiant) == changements[1].sequence
+
+
+def test_lot_atomique_refuse_sans_changement_fantome(client) -> None:
+    avant = client.get("/changes").json()["sequence_courante"]
+    reponse = client.post(
+        "/characters/lot",
+        json={
+            "creations": [{"profil": {"nom": "Lyra", "description": "d", "voix_narrative": "v"}}],
+            "mises_a_jour": [{"identifiant": "absent", "modifications": {}}],
+            "atomique": True,
+        },
+    )
+    assert reponse.status_code == 409
+
+    changements = client.get("/changes", params={"since": avant}).json()
+    assert changements["changements"] == []
+    assert client.get("/characters").json() == []
+
+
+def test_profil_media_conserve_malgre_historique_et_etat(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    repo = CharacterRepository(tmp_path)
+    character = repo.creer(_profil("Lyra"), traits=CharacterTraits(traits=["audacieuse"]))
+    cache = CacheProfilsMedia(repo)
+    premier = cache.resoudre([character.identifiant])[0]
+    monkeypatch.setattr(repo.historique, "lire", lambda *args, **kwargs: pytest.fail("historique lu"))
+    monkeypatch.setattr(repo, "lire_profil", lambda *args, **kwargs: pytest.fail("profil relu"))
+
+    repo.ajouter_evenement(character.identifiant, CharacterHistoryEntry(titre="t", contenu="c"))
+    repo.modifier_etat(character.identifiant, {"statut": "au repos"})
+    assert cache.resoudre([character.identifiant])[0] is premier
+
+    monkeypatch.undo()
+    repo.modifier(character.identifiant, lambda fiche: replace(fiche, profil=_profil("Nova")))
+    assert cache.resoudre([character.identifiant])[0].name == "Nova"
+
+    # Une transaction annulée restaure l'ancienne fiche : le profil converti dans le bloc est écarté.
+    with pytest.raises(RuntimeError):
+        with repo.transaction():
+            repo.modifier(character.identifiant, lambda fiche: replace(fiche, profil=_profil("Orin")))
+            assert cache.resoudre([character.identifiant])[0].name == "Orin"
+            raise RuntimeError("échec")
+    assert cache.resoudre([character.identifiant])[0].name == "Nova"
+
+    payload = {**next(repo.exporter()), "profil": asdict(_profil("Sève"))}
+    repo.importer_lot([repo.normaliser(payload)], remplacer=True)
+    assert cache.resoudre([character.identifiant])[0].name == "Sève"
+
+
+def test_etats_rejoues_et_compactes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(storage, "ETATS_AVANT_COMPACTION", 3)
+    repo = CharacterRepository(tmp_path)
+    character = repo.creer(_profil("Lyra"))
+    journal = tmp_path / "characters.etats.ndjson"
+
+    repo.modifier_etat(character.identifiant, {"statut": "en mission", "variables": {"energie": 80}})
+    repo.modifier_etat(character.identifiant, {"variables": {"energie": 60, "moral": 5}})
+    assert len(journal.read_bytes().splitlines()) == 2
+    etat = CharacterRepository(tmp_path).lire(character.identifiant).etat
+    assert (etat.statut, etat.variables) == ("en mission", {"energie": 60, "moral": 5})
+
+    repo.modifier_etat(character.identifiant, {"variables": {"moral": None}})
+    assert journal.read_bytes() == b""
+    with journal.open("ab") as fichier:
+        fichier.write(b'{"sequence": 4, "personnage"')
+
+    relu = CharacterRepository(tmp_path)
+    assert relu.lire(character.identifiant).etat.variables == {"energie": 60}
+    relu.modifier_etat(character.identifiant, {"statut": "au repos"})
+    assert CharacterRepository(tmp_path).lire(character.identifiant).etat.statut == "au repos"
+
+
+def test_if_match_obsolete_refuse(client) -> None:
+    identifiant = client.post(
+        "/characters", json={"profil": {"nom": "Lyra", "description": "d", "voix_narrative": "v"}}
+    ).json()["identifiant"]
+    etag = client.get(f"/characters/{identifiant}").headers["ETag"]
+
+    premiere = client.patch(f"/characters/{identifiant}/etat", json={"statut": "en mission"}, headers={"If-Match": etag})
+    assert premiere.status_code == 200
+    obsolete = client.patch(f"/characters/{identifiant}/etat", json={"statut": "au repos"}, headers={"If-Match": etag})
+    assert obsolete.status_code == 412
+
+    lot = client.post(
+        "/characters/etats",
+        json={"mises_a_jour": [{"identifiant": identifiant, "statut": "au repos", "version": premiere.json()["version"] - 1}]},
+    ).json()
+    assert lot["resultats"][0]["statut"] == 412
+    assert client.patch(
+        f"/characters/{identifiant}/etat", json={"statut": "au repos"}, headers={"If-Match": premiere.headers["ETag"]}
+    ).status_code == 200
+
+
+def test_export_lit_l_historique_a_la_demande(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    repo = CharacterRepository(tmp_path)
+    for nom in ("Lyra", "Nova", "Orin"):
+        character = repo.creer(_profil(nom))
+        repo.ajouter_evenement(character.identifiant, CharacterHistoryEntry(titre=nom, contenu="c"))
+    lus = []
+    lire = repo.historique.lire
+    monkeypatch.setattr(repo.historique, "lire", lambda identifiant: lus.append(identifiant) or lire(identifiant))
+
+    export = repo.exporter()
+    premier = next(export)
+
+    assert lus == [premier["identifiant"]]
+    assert premier["historique"]["evenements"][0]["titre"] == premier["profil"]["nom"]
+    assert len([premier, *export]) == 3
+    assert len(lus) == 3
+
+
+def test_etats_d_une_transaction_annulee_non_rejoues(tmp_path: Path) -> None:
+    repo = CharacterRepository(tmp_path)
+    character = repo.creer(_profil("Lyra"))
+
+    with pytest.raises(RuntimeError):
+        with repo.transaction():
+            repo.modifier_etat(character.identifiant, {"statut": "en mission"})
+            raise RuntimeError("échec")
+
+    assert repo.lire(character.identifiant).etat is None
+    assert CharacterRepository(tmp_path).lire(character.identifiant).etat is None
+
+    with repo.transaction():
+        repo.modifier_etat(character.identifiant, {"statut": "au repos"})
+    assert CharacterRepository(tmp_path).lire(character.identifiant).etat.statut == "au repos"
+
+
+def test_lot_d_etats_borne(client, api) -> None:
+    identifiant = client.post("/characters", json={"profil": {"nom": "Lyra", "description": "d"}}).json()["identifiant"]
+
+    trop = [{"identifiant": identifiant, "statut": "au repos"}] * (api.STATE_BATCH_MAX + 1)
+    assert client.post("/characters/etats", json={"mises_a_jour": trop}).status_code == 422
+    assert client.post("/characters/etats", json={"mises_a_jour": trop[:2]}).json()["appliquees"] == 2
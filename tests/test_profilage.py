@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Iterator
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_validator
+import pytest
+
+from src.api.profiling import ConfigurationProfilage, RouteProfilee, profileur
+
+
+def _occuper(secondes: float) -> None:
+    fin = time.monotonic() + secondes
+    while time.monotonic() < fin:
+        pass
+
+
+def _occuper_validation() -> None:
+    _occuper(0.1)
+
+
+def _occuper_autre_tache() -> None:
+    _occuper(0.1)
+
+
+@pytest.fixture
+def profilage() -> Iterator[None]:
+    profileur.reinitialiser()
+    profileur.configurer(ConfigurationProfilage(actif=True, routes=("/*",), intervalle_secondes=0.001))
+    yield
+    profileur.configurer(ConfigurationProfilage())
+    profileur.reinitialiser()
+
+
+class Corps(BaseModel):
+    nom: str
+
+    @field_validator("nom")
+    @classmethod
+    def valider_nom(cls, valeur: str) -> str:
+        _occuper_validation()
+        return valeur
+
+
+def test_validation_du_corps_attribuee_a_la_route(profilage: None) -> None:
+    app = FastAPI()
+    app.router.route_class = RouteProfilee
+
+    @app.post("/lent")
+    def lent(corps: Corps) -> dict[str, str]:
+        _occuper(0.05)
+        return {"nom": corps.nom}
+
+    with TestClient(app) as client:
+        assert client.post("/lent", json={"nom": "Lyra"}).status_code == 200
+
+    piles = profileur.piles_repliees()
+    assert "_occuper_validation" in piles
+    assert "test_profilage:test_validation_du_corps_attribuee_a_la_route.<locals>.lent" in piles
+    assert all(ligne.startswith("/lent;") for ligne in piles.splitlines())
+    assert profileur.etat()["requetes_profilees"] == 1
+
+
+def test_autres_coroutines_non_attribuees(profilage: None) -> None:
+    async def requete() -> None:
+        with profileur.suivre("/a"):
+            await asyncio.sleep(0.15)
+            _occuper(0.1)
+
+    async def autre() -> None:
+        await asyncio.sleep(0.02)
+        _occuper_autre_tache()
+
+    async def scenario() -> None:
+        await asyncio.gather(requete(), autre())
+
+    asyncio.run(scenario())
+
+    piles = profileur.piles_repliees()
+    assert "_occuper" in piles
+    assert "_occuper_autre_tache" not in piles
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import json
+import os
+from pathlib import Path
+import threading
+import time
+
+import pytest
+
+from src.api.storage import RenderRepository
+from src.persistence import JournalChangements
+
+MAINTENANT = datetime.utcnow()
+
+
+def _rendu(identifiant: str, statut: str, *, tentatives: int = 0, battement: datetime | None = None,
+           echeance: datetime | None = None) -> dict[str, object]:
+    return {
+        "identifiant": identifiant,
+        "type_rendu": "image",
+        "scene": {"identifier": "s", "summary": "Quai", "characters": [], "character_ids": []},
+        "prompt": {"template": "{scene_summary}", "variables": {}},
+        "configuration": {"resolution": {"width": 8, "height": 8}, "output_format": "png"},
+        "modele": "stub",
+        "statut": statut,
+        "cree_le": (MAINTENANT - timedelta(hours=1)).isoformat(),
+        "demarre_le": battement.isoformat() if battement else None,
+        "battement_le": battement.isoformat() if battement else None,
+        "tentatives": tentatives,
+        "echeance": echeance.isoformat() if echeance else None,
+    }
+
+
+def _attendre(client, identifiant: str, statuts: set[str]) -> dict[str, object]:
+    for _ in range(100):
+        rendu = client.get(f"/renders/{identifiant}").json()
+        if rendu["statut"] in statuts:
+            return rendu
+        time.sleep(0.05)
+    raise AssertionError(f"{identifiant} toujours {rendu['statut']}")
+
+
+def _commande_locale(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Générateur local qui écrit une sortie partielle puis s'endort ; renvoie le fichier de son PID."""
+
+    pid = tmp_path / "generateur.pid"
+    monkeypatch.setenv("SEIDRA_RENDER_WORKERS", "1")
+    monkeypatch.setenv(
+        "SEIDRA_LOCAL_IMAGE_COMMAND", f"echo $$ > {pid}; echo partiel > {{output_path}}; sleep 30; touch {{output_path}}"
+    )
+    return pid
+
+
+def _processus_arrete(pid: Path) -> bool:
+    try:
+        os.kill(int(pid.read_text()), 0)
+    except ProcessLookupError:
+        return True
+    return False
+
+
+def _corps_local(**extra: object) -> dict[str, object]:
+    return {
+        "type": "image",
+        "scene": {"identifier": "s", "summary": "Quai"},
+        "prompt": {"template": "{scene_summary}"},
+        "image_config": {"resolution": {"width": 8, "height": 8}},
+        "model_name": "local",
+        **extra,
+    }
+
+
+def _lancer_en_attente(client, reponses: list) -> threading.Thread:
+    attente = threading.Thread(target=lambda: reponses.append(client.post("/renders", json=_corps_local())))
+    attente.start()
+    return attente
+
+
+def _attendre_generation(client, tmp_path: Path) -> str:
+    """Identifiant du rendu local en cours, une fois sa sortie partielle écrite."""
+
+    for _ in range(100):
+        en_cours = [rendu for rendu in client.get("/renders").json() if rendu["statut"] == "en_cours"]
+        if en_cours and any(tmp_path.rglob("image_s.png")):
+            return en_cours[0]["identifiant"]
+        time.sleep(0.05)
+    raise AssertionError("Aucune génération locale démarrée")
+
+
+def test_delai_depasse_arrete_la_commande_locale(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest
+) -> None:
+    pid = _commande_locale(tmp_path, monkeypatch)
+    monkeypatch.setenv("SEIDRA_RENDER_TIMEOUTS", "local=1")
+    client = request.getfixturevalue("client")
+
+    debut = time.monotonic()
+    reponse = client.post("/renders", json=_corps_local())
+
+    assert reponse.status_code == 504
+    assert time.monotonic() - debut < 10
+    (rendu,) = client.get("/renders").json()
+    assert rendu["statut"] == "expire"
+    assert _processus_arrete(pid)
+    # La sortie partielle du générateur n'est pas conservée.
+    assert not any(tmp_path.rglob("image_s.png"))
+
+
+def test_annulation_d_un_rendu_local(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest
+) -> None:
+    pid = _commande_locale(tmp_path, monkeypatch)
+    client = request.getfixturevalue("client")
+    reponses = []
+    attente = _lancer_en_attente(client, reponses)
+    identifiant = _attendre_generation(client, tmp_path)
+    en_file = client.post("/renders?attendre=false", json=_corps_local()).json()
+
+    assert client.post(f"/renders/{en_file['identifiant']}/annulation").json()["statut"] == "annule"
+    assert client.post(f"/renders/{identifiant}/annulation").status_code == 202
+    attente.join(10)
+
+    assert reponses[0].status_code == 409
+    assert _attendre(client, identifiant, {"annule"})["statut"] == "annule"
+    assert _processus_arrete(pid)
+    assert not any(tmp_path.rglob("image_s.png"))
+    assert client.post(f"/renders/{identifiant}/annulation").status_code == 409
+    assert client.post("/renders/inconnu/annulation").status_code == 404
+
+
+def test_suppression_d_un_rendu_en_cours(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest
+) -> None:
+    pid = _commande_locale(tmp_path, monkeypatch)
+    api, client = request.getfixturevalue("api"), request.getfixturevalue("client")
+    reponses = []
+    attente = _lancer_en_attente(client, reponses)
+    identifiant = _attendre_generation(client, tmp_path)
+
+    refus = client.delete(f"/renders/{identifiant}")
+    assert refus.status_code == 409
+    assert f"/renders/{identifiant}/annulation" in refus.json()["detail"]
+    assert client.get(f"/renders/{identifiant}").json()["statut"] == "en_cours"
+
+    # Rendu disparu du dépôt pendant la génération : l'attente reçoit un 409, pas un 500.
+    api.render_repo.supprimer(identifiant)
+    api.jetons_rendus[identifiant].cancel()
+    attente.join(10)
+
+    assert reponses[0].status_code == 409
+    assert _processus_arrete(pid)
+    assert client.get(f"/renders/{identifiant}").status_code == 404
+
+
+def test_suppression_apres_annulation(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest
+) -> None:
+    _commande_locale(tmp_path, monkeypatch)
+    client = request.getfixturevalue("client")
+    reponses = []
+    attente = _lancer_en_attente(client, reponses)
+    identifiant = _attendre_generation(client, tmp_path)
+    en_file = client.post("/renders?attendre=false", json=_corps_local()).json()["identifiant"]
+
+    assert client.delete(f"/renders/{en_file}").status_code == 409
+    assert client.post(f"/renders/{en_file}/annulation").status_code == 200
+    assert client.post(f"/renders/{identifiant}/annulation").status_code == 202
+    attente.join(10)
+    assert _attendre(client, identifiant, {"annule"})["statut"] == "annule"
+
+    assert client.delete(f"/renders/{identifiant}").status_code == 204
+    assert client.delete(f"/renders/{en_file}").status_code == 204
+    assert client.get("/renders").json() == []
+
+
+def test_reprise_des_rendus_orphelins(tmp_path: Path, request: pytest.FixtureRequest) -> None:
+    ancien = MAINTENANT - timedelta(minutes=10)
+    rendus = [
+        _rendu("abandonne", "en_cours", tentatives=1, battement=ancien),
+        _rendu("epuise", "en_cours", tentatives=3, battement=ancien),
+        _rendu("en_file", "en_attente"),
+        _rendu("vivant", "en_cours", tentatives=1, battement=datetime.utcnow()),
+        _rendu("perime", "en_attente", echeance=MAINTENANT - timedelta(seconds=1)),
+        _rendu("sursis", "en_attente", echeance=MAINTENANT + timedelta(minutes=10)),
+    ]
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "renders.json").write_text(
+        json.dumps({"items": {rendu["identifiant"]: rendu for rendu in rendus}}), encoding="utf-8"
+    )
+    client = request.getfixturevalue("client")
+
+    for identifiant in ("abandonne", "en_file", "sursis"):
+        assert _attendre(client, identifiant, {"termine", "echec"})["statut"] == "termine"
+    assert client.get("/renders/abandonne").json()["tentatives"] == 2
+    assert client.get("/renders/sursis").json()["echeance"] == rendus[-1]["echeance"]
+    epuise = client.get("/renders/epuise").json()
+    assert epuise["statut"] == "echec"
+    assert "3 tentative(s)" in epuise["erreur"]
+    assert client.get("/renders/perime").json()["statut"] == "expire"
+    # Bail encore valide : un autre processus peut l'exécuter.
+    assert client.get("/renders/vivant").json()["statut"] == "en_cours"
+
+
+def test_renouvellement_des_baux_hors_revisions(tmp_path: Path) -> None:
+    store = tmp_path / "renders.json"
+    store.write_text(
+        json.dumps({"items": {"r": _rendu("r", "en_cours", battement=MAINTENANT - timedelta(minutes=1))}}),
+        encoding="utf-8",
+    )
+    journal = JournalChangements()
+    repo = RenderRepository(store, journal=journal)
+    avant = repo.revision("r"), journal.sequence_courante
+    corps = repo.lire_json("r")
+
+    assert repo.renouveler_baux(["r", "absent"]) == 1
+
+    assert (repo.revision("r"), journal.sequence_courante) == avant
+    assert repo.lire_json("r") == corps
+    battement = json.loads(store.read_text(encoding="utf-8"))["items"]["r"]["battement_le"]
+    assert datetime.fromisoformat(battement) > MAINTENANT
+
+
+def test_encodage_en_cache_conforme_a_la_reponse(api, client) -> None:
+    reponse = client.post(
+        "/renders",
+        json={
+            "type": "image",
+            "scene": {"identifier": "s", "summary": "Quai"},
+            "prompt": {"template": "{scene_summary}"},
+            "image_config": {"resolution": {"width": 8, "height": 8}},
+            "model_name": "stub",
+        },
+    )
+    assert reponse.status_code == 201
+
+    lu = client.get(f"/renders/{reponse.json()['identifiant']}").json()
+    assert list(lu) == list(api.RenderResponse.model_fields)
+    assert lu == reponse.json()
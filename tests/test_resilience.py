@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import subprocess
+
+import pytest
+
+from src.media_generation import resilience
+from src.media_generation.cancellation import CANCELLED, TIMEOUT, GenerationInterrupted
+from src.media_generation.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    BreakerPolicy,
+    CircuitBreaker,
+    CircuitOpen,
+    RetryPolicy,
+)
+
+
+class Horloge:
+    def __init__(self) -> None:
+        self.maintenant = 1000.0
+
+    def __call__(self) -> float:
+        return self.maintenant
+
+
+@pytest.fixture
+def horloge(monkeypatch: pytest.MonkeyPatch) -> Horloge:
+    horloge = Horloge()
+    monkeypatch.setattr(resilience.time, "monotonic", horloge)
+    return horloge
+
+
+def _executer(breaker: CircuitBreaker, erreur: BaseException | None) -> None:
+    breaker.acquire()
+    breaker.record(erreur)
+
+
+@pytest.mark.parametrize(
+    ("erreur", "attendu"),
+    [
+        (subprocess.CalledProcessError(1, "gen"), False),
+        (subprocess.CalledProcessError(-9, "gen"), True),
+        (subprocess.CalledProcessError(75, "gen"), True),
+        (OSError("disque"), True),
+        (TimeoutError(), True),
+        (ValueError("demande"), False),
+        (GenerationInterrupted(CANCELLED), False),
+    ],
+)
+def test_classification_des_erreurs(erreur: BaseException, attendu: bool) -> None:
+    politique = RetryPolicy(attempts=3, transient_exit_codes=frozenset({75}))
+
+    assert politique.should_retry(erreur, 1) is attendu
+    assert politique.should_retry(erreur, 3) is False
+
+
+def test_disjoncteur_ouverture_essai_et_fermeture(horloge: Horloge) -> None:
+    breaker = CircuitBreaker("local", BreakerPolicy(failure_threshold=0.5, window=4, min_calls=4, open_seconds=10))
+    for erreur in (None, OSError(), None, ValueError("ignorée"), OSError()):
+        _executer(breaker, erreur)
+    assert breaker.state()["state"] == OPEN
+
+    with pytest.raises(CircuitOpen) as refus:
+        breaker.check()
+    assert refus.value.retry_after == 10
+
+    horloge.maintenant += 10
+    assert breaker.state()["state"] == HALF_OPEN
+    breaker.acquire()
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+    breaker.record(None)
+    etat = breaker.state()
+    assert (etat["state"], etat["calls"], etat["trips"]) == (CLOSED, 0, 1)
+
+
+def test_disjoncteur_essai_en_echec_rouvre(horloge: Horloge) -> None:
+    breaker = CircuitBreaker("local", BreakerPolicy(failure_threshold=1.0, window=2, min_calls=2, open_seconds=5))
+    _executer(breaker, GenerationInterrupted(TIMEOUT))
+    _executer(breaker, OSError())
+    assert breaker.state()["state"] == OPEN
+
+    horloge.maintenant += 5
+    breaker.acquire()
+    breaker.record(OSError())
+    etat = breaker.state()
+    assert (etat["state"], etat["trips"], etat["retry_after_seconds"]) == (OPEN, 2, 5)
+
+
+def test_annulation_de_l_essai_libere_le_disjoncteur(horloge: Horloge) -> None:
+    breaker = CircuitBreaker("local", BreakerPolicy(failure_threshold=1.0, window=1, min_calls=1, open_seconds=5))
+    _executer(breaker, OSError())
+    horloge.maintenant += 5
+
+    _executer(breaker, GenerationInterrupted(CANCELLED))
+
+    assert breaker.state()["state"] == HALF_OPEN
+    breaker.acquire()
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from pathlib import Path
+import threading
+
+import pytest
+
+from src.scenarios import storage
+from src.scenarios.models import Acte, Scenario, Scene
+from src.scenarios.storage import IdentifiantDuplique, ScenarioRepository
+
+
+def _scenario(repo: ScenarioRepository, *personnages: str) -> Scenario:
+    return repo.creer(
+        "Le port",
+        actes=[
+            Acte(
+                identifiant="a1",
+                titre="Arrivée",
+                scenes=[Scene(identifiant="s1", titre="Quai", resume="x", personnages_ids=list(personnages))],
+            )
+        ],
+    )
+
+
+def test_ajout_scene_en_double_refuse(tmp_path: Path) -> None:
+    repo = ScenarioRepository(tmp_path)
+    scenario = _scenario(repo, "p1")
+
+    with pytest.raises(IdentifiantDuplique):
+        repo.ajouter_scene(scenario.identifiant, "a1", Scene(identifiant="s1", titre="Bis", resume="y"))
+    with pytest.raises(IdentifiantDuplique):
+        repo.ajouter_acte(
+            scenario.identifiant,
+            Acte(identifiant="a1", titre="Bis", scenes=[Scene(identifiant="s9", titre="t", resume="r")]),
+        )
+    assert len(repo.lire(scenario.identifiant).actes[0].scenes) == 1
+
+
+def test_deplacement_vers_un_acte_contenant_la_scene_refuse(tmp_path: Path) -> None:
+    repo = ScenarioRepository(tmp_path)
+    scenario = _scenario(repo, "p1")
+    repo.ajouter_scene(scenario.identifiant, "a1", Scene(identifiant="s2", titre="Bis", resume="y"))
+    repo.ajouter_acte(
+        scenario.identifiant,
+        Acte(identifiant="a2", titre="Départ", scenes=[Scene(identifiant="s1", titre="t", resume="r")]),
+    )
+
+    with pytest.raises(IdentifiantDuplique):
+        repo.modifier_scene(scenario.identifiant, "a1", "s1", {}, acte_cible="a2")
+    with pytest.raises(IdentifiantDuplique):
+        repo.modifier_scene(scenario.identifiant, "a1", "s2", {"identifiant": "s1"})
+
+
+def test_index_coherent_apres_suppression(tmp_path: Path) -> None:
+    repo = ScenarioRepository(tmp_path)
+    scenario = _scenario(repo, "p1")
+    repo.ajouter_scene(scenario.identifiant, "a1", Scene(identifiant="s2", titre="Bis", resume="y", personnages_ids=["p1"]))
+
+    repo.supprimer_scene(scenario.identifiant, "a1", "s2")
+
+    assert [reference["scene_id"] for reference in repo.references_personnage("p1")] == ["s1"]
+    assert repo.est_reference("p1")
+
+
+def _modifier(repo: ScenarioRepository, identifiant: str) -> None:
+    repo.ajouter_scene(identifiant, "a1", Scene(identifiant="s2", titre="Phare", resume="y", personnages_ids=["p2"]))
+    repo.ajouter_acte(
+        identifiant,
+        Acte(identifiant="a2", titre="Départ", scenes=[Scene(identifiant="s9", titre="t", resume="r")]),
+    )
+    repo.modifier_scene(identifiant, "a1", "s2", {"titre": "Phare éteint"}, acte_cible="a2", position=0)
+    repo.modifier_acte(identifiant, "a2", {"identifiant": "a3"})
+    repo.supprimer_scene(identifiant, "a3", "s9")
+
+
+def _etat(repo: ScenarioRepository, identifiant: str) -> tuple[Scenario, list[dict[str, object]]]:
+    return repo.lire(identifiant), repo.references_personnage("p2")
+
+
+def test_journal_rejoue_au_redemarrage(tmp_path: Path) -> None:
+    repo = ScenarioRepository(tmp_path)
+    identifiant = _scenario(repo, "p1").identifiant
+    _modifier(repo, identifiant)
+    journal = tmp_path / "scenarios.operations.ndjson"
+    assert len(journal.read_bytes().splitlines()) == 5
+
+    relu = ScenarioRepository(tmp_path)
+
+    assert _etat(relu, identifiant) == _etat(repo, identifiant)
+    assert [scene.identifiant for scene in relu.lire(identifiant).actes[1].scenes] == ["s2"]
+    assert relu.references_personnage("p2")[0]["acte_id"] == "a3"
+
+
+def test_compaction_sans_double_application(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(storage, "OPERATIONS_AVANT_COMPACTION", 3)
+    repo = ScenarioRepository(tmp_path)
+    identifiant = _scenario(repo, "p1").identifiant
+    journal = tmp_path / "scenarios.operations.ndjson"
+    repo.ajouter_scene(identifiant, "a1", Scene(identifiant="s2", titre="Phare", resume="y"))
+    deja_integrees = journal.read_bytes()
+    repo.ajouter_scene(identifiant, "a1", Scene(identifiant="s3", titre="Digue", resume="z"))
+    repo.ajouter_scene(identifiant, "a1", Scene(identifiant="s4", titre="Grue", resume="w"))
+    assert journal.read_bytes() == b""
+
+    # Arrêt entre l'écriture de l'instantané et la remise à zéro du journal.
+    journal.write_bytes(deja_integrees)
+    relu = ScenarioRepository(tmp_path)
+
+    assert [scene.identifiant for scene in relu.lire(identifiant).actes[0].scenes] == ["s1", "s2", "s3", "s4"]
+
+
+def test_ligne_tronquee_ignoree_et_retiree(tmp_path: Path) -> None:
+    repo = ScenarioRepository(tmp_path)
+    identifiant = _scenario(repo, "p1").identifiant
+    repo.ajouter_scene(identifiant, "a1", Scene(identifiant="s2", titre="Phare", resume="y"))
+    journal = tmp_path / "scenarios.operations.ndjson"
+    with journal.open("ab") as fichier:
+        fichier.write(b'{"sequence": 2, "type": "ajout_sce')
+
+    relu = ScenarioRepository(tmp_path)
+    assert [scene.identifiant for scene in relu.lire(identifiant).actes[0].scenes] == ["s1", "s2"]
+    relu.ajouter_scene(identifiant, "a1", Scene(identifiant="s3", titre="Digue", resume="z"))
+
+    encore = ScenarioRepository(tmp_path)
+    assert [scene.identifiant for scene in encore.lire(identifiant).actes[0].scenes] == ["s1", "s2", "s3"]
+
+
+def test_api_scene_en_double_conflit(client) -> None:
+    personnage = client.post(
+        "/characters", json={"profil": {"nom": "Ada", "description": "Capitaine"}}
+    ).json()["identifiant"]
+    scenario = client.post(
+        "/scenarios",
+        json={
+            "titre": "Le port",
+            "actes": [
+                {
+                    "identifiant": "a1",
+                    "titre": "Arrivée",
+                    "scenes": [{"identifiant": "s1", "titre": "Quai", "resume": "x", "personnages_ids": [personnage]}],
+                }
+            ],
+        },
+    ).json()["identifiant"]
+
+    doublon = {"identifiant": "s1", "titre": "Bis", "resume": "y", "personnages_ids": [personnage]}
+    assert client.post(f"/scenarios/{scenario}/actes/a1/scenes", json=doublon).status_code == 409
+    acte = {"identifiant": "a1", "titre": "Bis", "scenes": [{"titre": "t", "resume": "r"}]}
+    assert client.post(f"/scenarios/{scenario}/actes", json=acte).status_code == 409
+
+    autre = {"identifiant": "s2", "titre": "Bis", "resume": "y", "personnages_ids": [personnage]}
+    assert client.post(f"/scenarios/{scenario}/actes/a1/scenes", json=autre).status_code == 201
+    assert client.delete(f"/scenarios/{scenario}/actes/a1/scenes/s2").status_code == 204
+
+    assert [scene["scene_id"] for scene in client.get(f"/characters/{personnage}/scenes").json()] == ["s1"]
+    assert client.delete(f"/characters/{personnage}").status_code == 409
+
+
+def _personnage(client, nom: str) -> str:
+    return client.post("/characters", json={"profil": {"nom": nom, "description": "d"}}).json()["identifiant"]
+
+
+def test_suppression_forcee_reecrit_les_scenes(client) -> None:
+    ada, orin = _personnage(client, "Ada"), _personnage(client, "Orin")
+    scenes = [
+        {"identifiant": "s1", "titre": "Quai", "resume": "x", "personnages_ids": [ada, orin]},
+        {"identifiant": "s2", "titre": "Cale", "resume": "y", "personnages_ids": [ada]},
+    ]
+    scenario = client.post(
+        "/scenarios", json={"titre": "Le port", "actes": [{"identifiant": "a1", "titre": "Arrivée", "scenes": scenes}]}
+    ).json()["identifiant"]
+
+    assert client.delete(f"/characters/{ada}?force=true").status_code == 204
+
+    actes = client.get(f"/scenarios/{scenario}").json()["actes"]
+    assert [scene["personnages_ids"] for scene in actes[0]["scenes"]] == [[orin], []]
+    assert client.get(f"/characters/{ada}").status_code == 404
+    assert [scene["scene_id"] for scene in client.get(f"/characters/{orin}/scenes").json()] == ["s1"]
+
+
+def test_suppression_attend_la_scene_en_cours_d_ecriture(
+    client, api, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    ada = _personnage(client, "Ada")
+    acte = {"identifiant": "a1", "titre": "Arrivée", "scenes": [{"identifiant": "s0", "titre": "Large", "resume": "x"}]}
+    scenario = client.post("/scenarios", json={"titre": "Le port", "actes": [acte]}).json()["identifiant"]
+    verifie, reprise = threading.Event(), threading.Event()
+    existe = api.character_repo.existe
+
+    def existe_puis_pause(identifiant: str) -> bool:
+        resultat = existe(identifiant)
+        if threading.current_thread().name == "ecriture":
+            verifie.set()
+            reprise.wait(5)
+        return resultat
+
+    monkeypatch.setattr(api.character_repo, "existe", existe_puis_pause)
+    scene = api.SceneScenarioPayload(identifiant="s1", titre="Quai", resume="x", personnages_ids=[ada])
+    ecriture = threading.Thread(
+        target=api.ajouter_scene_scenario, args=(scenario, "a1", scene, None), name="ecriture"
+    )
+    ecriture.start()
+    assert verifie.wait(5)
+    suppressions = []
+    suppression = threading.Thread(target=lambda: suppressions.append(client.delete(f"/characters/{ada}")))
+    suppression.start()
+    suppression.join(0.2)
+    reprise.set()
+    ecriture.join(5)
+    suppression.join(5)
+
+    # La suppression voit la référence écrite entre-temps au lieu de la laisser pendante.
+    assert suppressions[0].status_code == 409
+    assert client.get(f"/characters/{ada}").status_code == 200
+
+
+def test_api_renommage_acte_et_scene(client, api) -> None:
+    ada = _personnage(client, "Ada")
+    actes = [
+        {"identifiant": "a1", "titre": "Arrivée",
+         "scenes": [{"identifiant": "s1", "titre": "Quai", "resume": "x", "personnages_ids": [ada]}]},
+        {"identifiant": "a2", "titre": "Départ", "scenes": [{"identifiant": "s2", "titre": "Cale", "resume": "y"}]},
+    ]
+    scenario = client.post("/scenarios", json={"titre": "Le port", "actes": actes}).json()["identifiant"]
+
+    assert client.patch(f"/scenarios/{scenario}/actes/a1", json={"identifiant": "a2"}).status_code == 409
+    assert client.patch(f"/scenarios/{scenario}/actes/a1", json={"identifiant": " "}).status_code == 422
+    acte = client.patch(f"/scenarios/{scenario}/actes/a1", json={"identifiant": "prologue"}).json()
+    assert acte["identifiant"] == "prologue"
+    scene = client.patch(f"/scenarios/{scenario}/actes/prologue/scenes/s1", json={"identifiant": "quai"}).json()
+    assert scene["identifiant"] == "quai"
+
+    attendu = [("prologue", "quai")]
+    references = client.get(f"/characters/{ada}/scenes").json()
+    assert [(reference["acte_id"], reference["scene_id"]) for reference in references] == attendu
+    # Après redémarrage, l'index reconstruit depuis le journal suit les renommages.
+    references = ScenarioRepository(api.scenario_repo.store_path.parent).references_personnage(ada)
+    assert [(reference["acte_id"], reference["scene_id"]) for reference in references] == attendu
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.api import transfert
+from .conftest import JETON_ADMIN
+from .test_rendus import _rendu
+
+ENTETES = {"X-Admin-Token": JETON_ADMIN}
+
+
+def _ligne(collection: str, donnees: dict[str, object]) -> bytes:
+    return json.dumps({"collection": collection, "donnees": donnees}).encode() + b"\n"
+
+
+def test_import_refuse_un_template_mal_forme(client) -> None:
+    prompt = {"identifiant": "p1", "nom": "Quai", "versions": [{"template": "Scène {lieu", "version": 1}]}
+
+    rapport = client.post("/admin/import", content=_ligne("prompts", prompt), headers=ENTETES).json()
+
+    assert rapport["erreurs_total"] == 1
+    assert rapport["collections"]["prompts"]["crees"] == 0
+    assert client.get("/prompts/p1").status_code == 404
+
+
+def test_rendus_importes_inacheves_ne_sont_pas_relances(client, api) -> None:
+    corps = _ligne("renders", _rendu("r1", "en_cours", tentatives=1)) + _ligne("renders", _rendu("r2", "en_attente"))
+
+    rapport = client.post("/admin/import", content=corps, headers=ENTETES).json()
+    assert rapport["collections"]["renders"]["crees"] == 2
+
+    assert api.reprendre_rendus_orphelins(demarrage=True) == {"repris": 0, "echecs": 0, "expires": 0}
+    for identifiant in ("r1", "r2"):
+        rendu = client.get(f"/renders/{identifiant}").json()
+        assert rendu["statut"] == "echec"
+        assert "importé" in rendu["erreur"]
+
+
+def test_export_par_morceaux_de_lignes_entieres(client, api, monkeypatch: pytest.MonkeyPatch) -> None:
+    for numero in range(20):
+        prompt = {"nom": f"p{numero}", "template": "Scène {lieu}", "variables": {"lieu": "quai"}}
+        assert client.post("/prompts", json=prompt).status_code == 201
+    monkeypatch.setattr(transfert, "OCTETS_PAR_MORCEAU", 1000)
+
+    morceaux = list(transfert.exporter_ndjson(api.depots_par_collection, ["prompts"]))
+
+    assert 1 < len(morceaux) < 20
+    assert all(morceau.endswith(b"\n") for morceau in morceaux)
+    lignes = b"".join(morceaux).splitlines()
+    assert sorted(json.loads(ligne)["donnees"]["nom"] for ligne in lignes) == sorted(f"p{n}" for n in range(20))
+    assert client.get("/admin/export?collections=prompts", headers=ENTETES).content == b"".join(morceaux)
+
+
+def test_import_par_morceaux_arbitraires_et_ligne_trop_longue(tmp_path) -> None:
+    depots = transfert.ouvrir_depots(tmp_path)
+    version = {"template": "Scène {lieu}", "version": 1, "variables": {"lieu": "quai"}}
+    prompts = [
+        {"identifiant": f"p{numero}", "nom": nom, "versions": [version]}
+        for numero, nom in enumerate(["Quai", "Quai" * 50, "Port"])
+    ]
+    flux = b"".join(_ligne("prompts", prompt) for prompt in prompts).rstrip(b"\n")
+    importeur = transfert.ImportNdjson(depots, longueur_ligne_max=200)
+
+    importeur.ajouter_morceaux(flux[debut:debut + 7] for debut in range(0, len(flux), 7))
+    rapport = importeur.terminer()
+
+    assert len(_ligne("prompts", prompts[1])) > 200 > len(_ligne("prompts", prompts[0]))
+    assert rapport["lignes"] == 3
+    assert rapport["collections"]["prompts"]["crees"] == 2
+    assert rapport["erreurs"] == [{"ligne": 2, "erreur": "Ligne de plus de 200 octets."}]
+    assert sorted(prompt.identifiant for prompt in depots["prompts"].lister()) == ["p0", "p2"]
+
+
+def test_import_strict_arrete_sur_une_ligne_trop_longue(client, api, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api, "IMPORT_LINE_MAX", 10)
+
+    reponse = client.post("/admin/import?strict=true", content=b'{"collection": "prompts"}\n', headers=ENTETES)
+
+    assert reponse.status_code == 400
+    assert reponse.json()["detail"]["erreur"] == "Ligne 1: Ligne de plus de 10 octets."